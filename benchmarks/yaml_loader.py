@@ -0,0 +1,51 @@
+"""Benchmark loading a large user reference file with the pure Python
+YAML loader and the libyaml C loader.
+
+Usage: python benchmarks/yaml_loader.py [number_of_keywords] [repeat]
+"""
+
+import sys
+import timeit
+from textwrap import dedent
+
+import yaml
+
+from regexapp.utils import YAMLLoader
+
+
+def generate_user_references(total):
+    """generate YAML content of user references with total keywords"""
+    fmt = dedent("""
+        keyword_{0}:
+          group: "benchmark"
+          description: "a benchmark keyword {0}"
+          pattern: "word_{0}_[a-z]+\\\\d+"
+          positive test:
+            case {0}: "word_{0}_abc123"
+          negative test:
+            case {0}: "xyz"
+    """)
+    return ''.join(fmt.format(i) for i in range(total))
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    content = generate_user_references(total)
+
+    loaders = [('SafeLoader (pure Python)', yaml.SafeLoader)]
+    if YAMLLoader.is_libyaml:
+        loaders.append(('CSafeLoader (libyaml)', YAMLLoader.Loader))
+    else:
+        print('PyYAML is not built with libyaml.  CSafeLoader is unavailable.')
+
+    print('Loading {} user reference keywords ({:,} bytes), best of {}'.format(
+        total, len(content), repeat))
+    for name, loader in loaders:
+        timer = timeit.Timer(lambda: yaml.load(content, Loader=loader))
+        elapsed = min(timer.repeat(repeat=repeat, number=1))
+        print('  {:<26} {:8.3f} s'.format(name, elapsed))
+
+
+if __name__ == '__main__':
+    main()
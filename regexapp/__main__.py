@@ -1,5 +1,4 @@
 
-from regexapp.main import Cli
+from regexapp.main import execute
 
-console = Cli()
-console.run()
+execute()
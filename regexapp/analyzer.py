@@ -0,0 +1,445 @@
+"""Module containing the logic for detecting pathological backtracking
+of regex patterns."""
+
+import re
+import math
+from time import perf_counter
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:     # pragma: no cover - Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from regexapp.exceptions import AnalyzerError
+
+
+# a representative alphabet, i.e. ASCII and one non-ASCII letter
+UNIVERSE = frozenset([chr(i) for i in range(128)] + ['\xe9'])
+
+REPEAT_OPS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+ATOMIC_OPS = tuple(
+    getattr(sre_constants, name) for name in ['POSSESSIVE_REPEAT', 'ATOMIC_GROUP']
+    if hasattr(sre_constants, name)
+)
+
+CATEGORY_TABLE = {
+    sre_constants.CATEGORY_DIGIT: lambda c: c in '0123456789',
+    sre_constants.CATEGORY_NOT_DIGIT: lambda c: c not in '0123456789',
+    sre_constants.CATEGORY_SPACE: lambda c: c in ' \t\n\r\f\v',
+    sre_constants.CATEGORY_NOT_SPACE: lambda c: c not in ' \t\n\r\f\v',
+    sre_constants.CATEGORY_WORD: lambda c: c.isalnum() or c == '_',
+    sre_constants.CATEGORY_NOT_WORD: lambda c: not (c.isalnum() or c == '_'),
+    sre_constants.CATEGORY_LINEBREAK: lambda c: c == '\n',
+    sre_constants.CATEGORY_NOT_LINEBREAK: lambda c: c != '\n',
+}
+
+
+def is_in_class(items, char):
+    """return True if a character belongs to a parsed character class"""
+    is_negated = bool(items) and items[0][0] is sre_constants.NEGATE
+    is_matched = False
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            is_matched = char == chr(av)
+        elif op is sre_constants.RANGE:
+            is_matched = av[0] <= ord(char) <= av[1]
+        elif op is sre_constants.CATEGORY:
+            is_matched = CATEGORY_TABLE.get(av, lambda c: True)(char)
+        if is_matched:
+            break
+    return is_matched != is_negated
+
+
+def get_min_width(items):
+    """return a minimum width of a sequence of parsed items"""
+    width = 0
+    for op, av in items:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL,
+                  sre_constants.ANY, sre_constants.IN):
+            width += 1
+        elif op is sre_constants.SUBPATTERN:
+            width += get_min_width(av[-1])
+        elif op in REPEAT_OPS or op in ATOMIC_OPS and isinstance(av, tuple):
+            width += av[0] * get_min_width(av[2])
+        elif op in ATOMIC_OPS:
+            width += get_min_width(av)
+        elif op is sre_constants.BRANCH:
+            width += min(get_min_width(alt) for alt in av[1])
+    return width
+
+
+def get_charset(items, is_first=False):
+    """return characters which a sequence of parsed items can consume
+
+    Parameters
+    ----------
+    items (list): a sequence of parsed items.
+    is_first (bool): only collect characters of the first position.
+            Default is False.
+
+    Returns
+    -------
+    frozenset: a set of characters of UNIVERSE.
+    """
+    charset = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            charset.add(chr(av) if chr(av) in UNIVERSE else '\xe9')
+        elif op is sre_constants.NOT_LITERAL:
+            charset |= UNIVERSE - {chr(av)}
+        elif op is sre_constants.ANY:
+            charset |= UNIVERSE - {'\n'}
+        elif op is sre_constants.IN:
+            charset |= {c for c in UNIVERSE if is_in_class(av, c)}
+        elif op is sre_constants.SUBPATTERN:
+            charset |= get_charset(av[-1], is_first=is_first)
+        elif op in REPEAT_OPS or op in ATOMIC_OPS and isinstance(av, tuple):
+            charset |= get_charset(av[2], is_first=is_first)
+        elif op in ATOMIC_OPS:
+            charset |= get_charset(av, is_first=is_first)
+        elif op is sre_constants.BRANCH:
+            for alt in av[1]:
+                charset |= get_charset(alt, is_first=is_first)
+        elif op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            charset |= UNIVERSE
+        if is_first and get_min_width([(op, av)]):
+            break
+    return frozenset(charset)
+
+
+def unwrap_repeat(item):
+    """return a repeat item if item is a repeat or a group of a single repeat"""
+    op, av = item
+    while op is sre_constants.SUBPATTERN and len(av[-1]) == 1:
+        op, av = av[-1][0]
+    return (op, av) if op in REPEAT_OPS else None
+
+
+def flatten(items):
+    """inline the content of groups in a sequence of parsed items"""
+    result = []
+    for op, av in items:
+        if op is sre_constants.SUBPATTERN:
+            result.extend(flatten(av[-1]))
+        else:
+            result.append((op, av))
+    return result
+
+
+def sort_chars(chars):
+    """sort characters with alphanumeric and printable characters first"""
+    return sorted(chars, key=lambda c: (not c.isalnum(), not c.isprintable(), c))
+
+
+def show_chars(chars, limit=5):
+    """return a short readable form of a set of characters"""
+    lst = sort_chars(chars)
+    text = ''.join(lst[:limit])
+    return repr(text + '...' if len(lst) > limit else text)
+
+
+def generate_sample(items):
+    """return a short text which a sequence of parsed items can match"""
+    lst = []
+    for op, av in items:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL,
+                  sre_constants.ANY, sre_constants.IN):
+            chars = get_charset([(op, av)])
+            chars and lst.append(sort_chars(chars)[0])
+        elif op is sre_constants.SUBPATTERN:
+            lst.append(generate_sample(av[-1]))
+        elif op in REPEAT_OPS or op in ATOMIC_OPS and isinstance(av, tuple):
+            lst.append(generate_sample(av[2]) * av[0])
+        elif op in ATOMIC_OPS:
+            lst.append(generate_sample(av))
+        elif op is sre_constants.BRANCH:
+            lst.append(generate_sample(av[1][0]))
+    return ''.join(lst)
+
+
+def contains_unbounded_repeat(item):
+    """return True if a parsed item has an unbounded repeat"""
+    op, av = item
+    if op in REPEAT_OPS and av[1] is sre_constants.MAXREPEAT:
+        return True
+    if op is sre_constants.SUBPATTERN:
+        return any(contains_unbounded_repeat(sub) for sub in av[-1])
+    if op in REPEAT_OPS:
+        return any(contains_unbounded_repeat(sub) for sub in av[2])
+    if op is sre_constants.BRANCH:
+        return any(contains_unbounded_repeat(sub) for alt in av[1] for sub in alt)
+    return False
+
+
+class PatternAnalyzer:
+    """Use to detect regex constructs which backtrack super-linearly.
+
+    Static analysis walks the sre_parse tree of a pattern and flags
+        + nested quantifiers, e.g. (a+)+ or ([^\\n]*\\n+)*,
+        + overlapping alternations inside a repeat, e.g. (ab|\\wb)+,
+        + adjacent quantifiers which consume the same characters, e.g. .+ +.
+    The first two can be exponential and the last one is polynomial.
+    Fuzzing measures match time on growing inputs which pump overlapping
+    characters and end with a failing character, and estimates growth order.
+
+    Attributes
+    ----------
+    pattern (str): a regex pattern.
+    issues (list): a list of issues which are dicts of kind, severity,
+            message, chars, and index of top-level item of pattern.
+    fuzz_result (dict): a result of fuzzing.  Default is None.
+
+    Properties
+    ----------
+    is_safe -> bool
+
+    Methods
+    -------
+    analyze() -> list
+    fuzz(max_size=4096, timeout=0.05) -> dict
+    get_report() -> str
+    """
+    growth_table = [(1.5, 'linear'), (2.5, 'quadratic'), (3.5, 'cubic')]
+
+    def __init__(self, pattern):
+        self.pattern = str(pattern)
+        self.issues = []
+        self.fuzz_result = None
+        self._index = 0
+        try:
+            self._parsed_pattern = sre_parse.parse(self.pattern)
+            self._compiled_pattern = re.compile(self.pattern)
+        except Exception as ex:
+            msg = 'CANT analyze pattern - {}: {}'.format(type(ex).__name__, ex)
+            raise AnalyzerError(msg)
+        self.analyze()
+
+    @property
+    def is_safe(self):
+        """True if there is no exponential issue and fuzzed growth is at
+        most quadratic which is inherent to re.search on a failing input"""
+        is_exponential = any(
+            issue['severity'] == 'exponential' for issue in self.issues
+        )
+        growth = self.fuzz_result['growth'] if self.fuzz_result else 'linear'
+        return not is_exponential and growth in ('linear', 'quadratic')
+
+    def add_issue(self, kind, severity, chars, fmt):
+        issue = dict(kind=kind, severity=severity, chars=chars,
+                     message=fmt.format(show_chars(chars)), index=self._index)
+        issue not in self.issues and self.issues.append(issue)
+
+    def analyze(self):
+        """walk a parsed pattern and collect issues
+
+        Returns
+        -------
+        list: a list of issues.
+        """
+        self.issues = []
+        items = list(self._parsed_pattern)
+        for index, item in enumerate(items):
+            self._index = index
+            self.walk(items, start=index, stop=index + 1)
+        return self.issues
+
+    def walk(self, items, in_repeat=False, start=0, stop=None):
+        for index, (op, av) in enumerate(items[start:stop], start):
+            if op in REPEAT_OPS:
+                low, high, body = av
+                if high > 1 and high > low:
+                    self.check_nested_quantifier(list(body))
+                self.walk(list(body), in_repeat=in_repeat or high > 1)
+                high is sre_constants.MAXREPEAT and self.check_adjacency(items, index)
+            elif op is sre_constants.SUBPATTERN:
+                self.walk(list(av[-1]), in_repeat=in_repeat)
+                unwrap_repeat((op, av)) and self.check_adjacency(items, index)
+            elif op is sre_constants.BRANCH:
+                in_repeat and self.check_alternation(av[1])
+                for alt in av[1]:
+                    self.walk(list(alt), in_repeat=in_repeat)
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                self.walk(list(av[1]), in_repeat=in_repeat)
+
+    def check_nested_quantifier(self, body):
+        """flag a repeated body which can be split into iterations in many
+        ways, i.e. a variable repeat inside it is the only mandatory part
+        and can consume the first characters of the next iteration"""
+        items = flatten(body)
+        if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+            for alt in items[0][1][1]:
+                self.check_nested_quantifier(list(alt))
+            return
+
+        first_chars = get_charset(items, is_first=True)
+        for index, item in enumerate(items):
+            repeat = unwrap_repeat(item)
+            if not repeat or repeat[1][1] <= max(repeat[1][0], 1):
+                continue
+            others = items[:index] + items[index + 1:]
+            if get_min_width(others):
+                continue
+            chars = get_charset([item]) & first_chars
+            if chars:
+                fmt = 'nested quantifier can split {} into iterations in many ways'
+                self.add_issue('nested_quantifier', 'exponential', chars, fmt)
+
+    def check_alternation(self, alternatives):
+        """flag alternatives of a repeat which can start with the same characters"""
+        charsets = [get_charset(list(alt), is_first=True) for alt in alternatives]
+        for i, first in enumerate(charsets):
+            for other in charsets[i + 1:]:
+                chars = first & other
+                if chars:
+                    fmt = 'overlapping alternatives inside a repeat can all start with {}'
+                    self.add_issue('overlapping_alternation', 'exponential', chars, fmt)
+
+    def check_adjacency(self, items, index):
+        """flag an unbounded repeat followed by another unbounded repeat, with
+        only optional items in between, when both consume the same characters"""
+        repeat = unwrap_repeat(items[index])
+        if not repeat or repeat[1][1] is not sre_constants.MAXREPEAT:
+            return
+
+        chars = get_charset([items[index]])
+        for item in items[index + 1:]:
+            other = unwrap_repeat(item)
+            if other and other[1][1] is sre_constants.MAXREPEAT:
+                overlap = chars & get_charset([item])
+                if overlap:
+                    fmt = 'adjacent quantifiers can both consume {}'
+                    self.add_issue('adjacent_quantifiers', 'polynomial', overlap, fmt)
+                return
+            if get_min_width([item]):
+                return
+
+    def get_candidates(self):
+        """return (prefix, pumped characters) pairs of fuzzing.  A prefix
+        is a sample text of the items before a vulnerable item so that
+        matching reaches the vulnerable item."""
+        items = list(self._parsed_pattern)
+        candidates = []
+        for issue in self.issues:
+            prefix = generate_sample(items[:issue['index']])
+            candidates.append((prefix, sort_chars(issue['chars'])[:3]))
+
+        index = next(
+            (i for i, item in enumerate(items) if contains_unbounded_repeat(item)),
+            len(items)
+        )
+        chars = sort_chars(get_charset(items[index:], is_first=True))[:3]
+        prefix = generate_sample(items[:index])
+        candidates.append((prefix, chars + ['a', '0', ' ']))
+        return candidates
+
+    def measure(self, text, repeat=3):
+        """return the best elapsed time of searching a pattern in text"""
+        search = self._compiled_pattern.search
+        number = 1
+        while True:
+            start = perf_counter()
+            for _ in range(number):
+                search(text)
+            elapsed = perf_counter() - start
+            if elapsed >= 0.001 or number >= 1000:
+                break
+            number *= 10
+
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            start = perf_counter()
+            for _ in range(number):
+                search(text)
+            best = min(best, (perf_counter() - start) / number)
+        return best
+
+    def fuzz(self, max_size=4096, timeout=0.05):
+        """measure match time on growing adversarial inputs and estimate
+        growth order of match time against input size
+
+        Parameters
+        ----------
+        max_size (int): a maximum number of pumped characters.  Default is 4096.
+        timeout (float): stop growing input once a search takes longer than
+                timeout seconds.  Default is 0.05.
+
+        Returns
+        -------
+        dict: a result of sizes, times, exponent, growth, and sample.
+        """
+        suffixes = ['!', '\x00', '\n', '']
+        samples = []
+        for prefix, chars in self.get_candidates():
+            for char in dict.fromkeys(chars):
+                for suffix in suffixes:
+                    text = prefix + char * 16 + suffix
+                    elapsed = self.measure(text, repeat=1)
+                    samples.append((elapsed, prefix, char, suffix))
+        _, prefix, char, suffix = max(samples)
+
+        sizes, times = [], []
+        size = 8
+        while size <= max_size:
+            elapsed = self.measure(prefix + char * size + suffix)
+            sizes.append(size)
+            times.append(elapsed)
+            if elapsed > timeout:
+                break
+
+            # grow slowly when match time explodes to keep fuzzing bounded
+            next_size = max(size + 1, int(size * 1.5))
+            if len(times) >= 2 and times[-2] > 0:
+                ratio = times[-1] / times[-2]
+                if ratio > 0 and elapsed * ratio ** 2 > timeout:
+                    next_size = size + 1
+            size = next_size
+
+        points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if t > 0]
+        points = points[len(points) // 2:] if len(points) >= 6 else points
+        exponent = 0.0
+        if len(points) >= 2:
+            mean_x = sum(x for x, _ in points) / len(points)
+            mean_y = sum(y for _, y in points) / len(points)
+            var_x = sum((x - mean_x) ** 2 for x, _ in points)
+            cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+            exponent = cov / var_x if var_x else 0.0
+
+        growth = 'exponential'
+        for limit, name in self.growth_table:
+            if exponent < limit:
+                growth = name
+                break
+        if times and times[-1] > timeout and sizes[-1] < 64:
+            growth = 'exponential'
+
+        self.fuzz_result = dict(
+            sizes=sizes, times=times, exponent=exponent, growth=growth,
+            sample=(prefix, char, suffix)
+        )
+        return self.fuzz_result
+
+    def get_report(self):
+        """return an analysis report of a pattern
+
+        Returns
+        -------
+        str: an analysis report.
+        """
+        lst = ['pattern: {}'.format(self.pattern)]
+        if self.issues:
+            lst.append('issues:')
+            for issue in self.issues:
+                lst.append('  - [{severity}] {message}'.format(**issue))
+        else:
+            lst.append('issues: NO')
+
+        if self.fuzz_result:
+            fmt = 'growth: {} (exponent {:.2f}, {} to {} chars, {:.3f} ms at most)'
+            result = self.fuzz_result
+            lst.append(fmt.format(
+                result['growth'], result['exponent'], result['sizes'][0],
+                result['sizes'][-1], max(result['times']) * 1000
+            ))
+        return '\n'.join(lst)
@@ -32,8 +32,8 @@ from regexapp.core import enclose_string
 from regexapp import PatternBuilder
 
 from regexapp.config import Data
+from regexapp.utils import YAMLLoader
 
-import yaml
 import re
 import platform
 
@@ -846,8 +846,8 @@ class Application:
                     REF.test(new_content)
                     open(fn_, 'w').write(new_content)
 
-                    yaml_obj = yaml.load(new_content, Loader=yaml.SafeLoader)
-                    REF.update(yaml_obj)
+                    for yaml_obj in YAMLLoader.load_all(new_content):
+                        yaml_obj and REF.update(yaml_obj)
 
                 except Exception as ex:
                     error = '{}: {}'.format(type(ex).__name__, ex)
@@ -0,0 +1,312 @@
+"""Module containing the logic for regexapp batch mode.
+
+A batch source is either a YAML manifest or a directory/glob of templates.
+
+Manifest:
+    defaults:                       # optional, applied to every item
+      platform: pytest
+      config: "author: John, email: john@example.com"
+    items:
+      - name: show_version          # optional, default is item_<index>
+        user_data: file::templates/show_version.txt
+        test_data: file::data/show_version.txt
+      - user_data: "digits(var_v1) word(var_v2)"
+        test: true                  # run test instead of building a script
+
+    file:: paths are relative to the manifest directory.
+
+Directory or glob:
+    Every matched file is a template.  A sibling file <stem>.test<suffix>
+    is its test data, i.e. show_version.txt and show_version.test.txt.
+"""
+
+import os
+import re
+import glob
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+from regexapp.utils import YAMLLoader
+from regexapp.exceptions import BatchError
+from regexapp.constant import ECODE
+
+
+file_pattern = re.compile(r'file( *name)?:: *(?P<filename>\S*)', re.I)
+
+
+def get_filename_argument(value, base_dir=''):
+    """return a file:: argument whose file name is joined with base_dir
+
+    Parameters
+    ----------
+    value (str): an inline text or file:: argument.
+    base_dir (str): a base directory of relative file name.  Default is empty.
+
+    Returns
+    -------
+    str: an argument which is an inline text or an absolute file:: argument.
+    """
+    match = file_pattern.match(value)
+    if not match:
+        return value
+    filename = os.path.join(base_dir, match.group('filename'))
+    return 'file::{}'.format(os.path.abspath(filename))
+
+
+def get_item_arguments(entry, base_dir='', no_cache=False):
+    """return CLI arguments of a batch entry
+
+    Parameters
+    ----------
+    entry (dict): a batch entry of user_data, test_data, test, platform,
+            and config.
+    base_dir (str): a base directory of relative file name.  Default is empty.
+    no_cache (bool): build without the on-disk build cache.  Default is False.
+
+    Returns
+    -------
+    list: a list of CLI arguments.
+    """
+    user_data = get_filename_argument(str(entry['user_data']), base_dir)
+    args = ['--user-data={}'.format(user_data)]
+
+    test_data = str(entry.get('test_data') or '')
+    if test_data:
+        test_data = get_filename_argument(test_data, base_dir)
+        args.append('--test-data={}'.format(test_data))
+        platform = str(entry.get('platform') or '')
+        if entry.get('test'):
+            args.append('--run-test')
+        elif platform:
+            args.append('--platform={}'.format(platform))
+
+    config = entry.get('config')
+    if isinstance(config, dict):
+        config = ', '.join('{}: {}'.format(*pair) for pair in config.items())
+    if config:
+        config = get_filename_argument(str(config), base_dir)
+        args.append('--config={}'.format(config))
+
+    no_cache and args.append('--no-cache')
+    return args
+
+
+def get_item_extension(args):
+    """return a result file extension of CLI arguments"""
+    platform = [arg for arg in args if arg.startswith('--platform=')]
+    return '.py' if platform else '.txt'
+
+
+def load_manifest(filename):
+    """load entries of a batch manifest
+
+    Parameters
+    ----------
+    filename (str): a YAML manifest file name.
+
+    Returns
+    -------
+    list: a list of batch entries.
+
+    Raises
+    ------
+    BatchError: raise exception if manifest is an invalid format.
+    """
+    try:
+        with open(filename) as stream:
+            content = YAMLLoader.load(stream)
+    except Exception as ex:
+        raise BatchError('CANT load {} - {}: {}'.format(filename, type(ex).__name__, ex))
+
+    defaults = dict()
+    if isinstance(content, dict):
+        defaults = content.get('defaults') or dict()
+        content = content.get('items')
+
+    if not isinstance(content, list) or not isinstance(defaults, dict):
+        fmt = '{} must be a list of items or a dictionary of defaults and items.'
+        raise BatchError(fmt.format(filename))
+
+    entries = []
+    for index, node in enumerate(content, 1):
+        if not isinstance(node, dict) or not node.get('user_data'):
+            fmt = 'item {} of {} must be a dictionary having user_data.'
+            raise BatchError(fmt.format(index, filename))
+        entry = dict(defaults, name='item_{}'.format(index))
+        entry.update(node)
+        entries.append(entry)
+    return entries
+
+
+def find_templates(source):
+    """find templates and their test data of a directory or glob
+
+    Parameters
+    ----------
+    source (str): a directory or a glob pattern.
+
+    Returns
+    -------
+    list: a list of batch entries.
+    """
+    pattern = os.path.join(source, '*') if os.path.isdir(source) else source
+    filenames = sorted(name for name in glob.glob(pattern) if os.path.isfile(name))
+    entries = []
+    for filename in filenames:
+        stem, suffix = os.path.splitext(filename)
+        if stem.endswith('.test'):
+            continue
+        test_filename = '{}.test{}'.format(stem, suffix)
+        entry = dict(name=os.path.basename(stem),
+                     user_data='file::{}'.format(os.path.abspath(filename)))
+        if os.path.isfile(test_filename):
+            entry.update(test_data='file::{}'.format(os.path.abspath(test_filename)))
+        entries.append(entry)
+    return entries
+
+
+def get_batch_items(source, platform='', test=False, config='', no_cache=False):
+    """return batch items of a manifest, a directory, or a glob.  CLI flags
+    are defaults of entries which do not specify them.
+
+    Parameters
+    ----------
+    source (str): a YAML manifest file name, a directory, or a glob pattern.
+    platform (str): a test script platform.  Default is empty.
+    test (bool): run test instead of building a script.  Default is False.
+    config (str): config settings for generated test script.  Default is empty.
+    no_cache (bool): build without the on-disk build cache.  Default is False.
+
+    Returns
+    -------
+    list: a list of tuple of item name and CLI arguments.
+
+    Raises
+    ------
+    BatchError: raise exception if there is no item or manifest is invalid.
+    """
+    is_manifest = os.path.isfile(source) and source.lower().endswith(('.yaml', '.yml'))
+    if is_manifest:
+        entries = load_manifest(source)
+        base_dir = os.path.dirname(os.path.abspath(source))
+    else:
+        entries = find_templates(source)
+        base_dir = os.getcwd()
+
+    if not entries:
+        raise BatchError('CANT find any template of {}'.format(source))
+
+    items, names = [], set()
+    defaults = dict(platform=platform, test=test, config=config)
+    for entry in entries:
+        for key, value in defaults.items():
+            entry.setdefault(key, value)
+        name = re.sub(r'[^\w.-]+', '_', str(entry['name'])).strip('._') or 'item'
+        unique_name, index = name, 1
+        while unique_name in names:
+            index += 1
+            unique_name = '{}_{}'.format(name, index)
+        names.add(unique_name)
+        args = get_item_arguments(entry, base_dir=base_dir, no_cache=no_cache)
+        items.append((unique_name, args))
+    return items
+
+
+def run_batch_item(name, args, output_dir=''):
+    """run CLI arguments of a batch item and write its output
+
+    Parameters
+    ----------
+    name (str): an item name.
+    args (list): a list of CLI arguments.
+    output_dir (str): a directory of result files.  Default is empty, i.e.
+            result will not be written.
+
+    Returns
+    -------
+    dict: a result of name, exit_code, elapsed, filename, and failure.
+    """
+    from regexapp.main import run_cli
+
+    start = perf_counter()
+    exit_code, output = run_cli(args)
+    elapsed = perf_counter() - start
+
+    filename, failure = '', ''
+    if exit_code != ECODE.SUCCESS:
+        failure = (output.strip().splitlines() or [''])[0]
+    if output_dir:
+        filename = os.path.join(output_dir, name + get_item_extension(args))
+        try:
+            with open(filename, 'w') as stream:
+                stream.write(output + '\n')
+        except Exception as ex:
+            filename = ''
+            exit_code = exit_code or int(ECODE.BAD)
+            failure = failure or '*** {}: {}'.format(type(ex).__name__, ex)
+
+    return dict(name=name, exit_code=exit_code, elapsed=elapsed,
+                filename=filename, failure=failure)
+
+
+def run_batch(items, output_dir='', workers=None):
+    """run batch items in one process, or over a process pool if workers
+    is greater than 1.
+
+    Parameters
+    ----------
+    items (list): a list of tuple of item name and CLI arguments.
+    output_dir (str): a directory of result files.  Default is empty, i.e.
+            results will not be written.
+    workers (int): a number of worker processes.  Default is None.
+
+    Returns
+    -------
+    list: a list of results of items in batch order.
+    """
+    output_dir and os.makedirs(output_dir, exist_ok=True)
+    if not workers or workers <= 1 or len(items) <= 1:
+        return [run_batch_item(name, args, output_dir) for name, args in items]
+
+    names, lst_of_args = zip(*items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(run_batch_item, names, lst_of_args,
+                               [output_dir] * len(items))
+        return list(results)
+
+
+def get_batch_report(results, elapsed=None):
+    """return a summary table of batch results
+
+    Parameters
+    ----------
+    results (list): a list of results which is returned by run_batch.
+    elapsed (float): a total elapsed time in seconds.  Default is None, i.e.
+            a sum of elapsed time of items.
+
+    Returns
+    -------
+    str: a batch report.
+    """
+    fmt = '{:<32} {:>4} {:>12}  {}'
+    headers = fmt.format('item', 'code', 'elapsed(ms)', 'output')
+    lst = [headers, '-' * len(headers)]
+    failures = []
+    for result in results:
+        lst.append(fmt.format(
+            result['name'], result['exit_code'],
+            '{:.3f}'.format(result['elapsed'] * 1000), result['filename']
+        ))
+        if result['exit_code'] != ECODE.SUCCESS:
+            failure = '{} (code {}): {}'
+            failures.append(failure.format(result['name'], result['exit_code'],
+                                           result['failure']))
+
+    if elapsed is None:
+        elapsed = sum(result['elapsed'] for result in results)
+    lst.append('-' * len(headers))
+    lst.append('Processed {} items, {} failures in {:.3f} ms.'.format(
+        len(results), len(failures), elapsed * 1000))
+    if failures:
+        lst.extend(['', 'Failures:'] + ['  {}'.format(item) for item in failures])
+    return '\n'.join(lst)
@@ -0,0 +1,338 @@
+"""Module containing the logic for caching parsed files and built patterns of regexapp."""
+
+import os
+import pickle
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from pathlib import Path, PurePath
+
+from regexapp.utils import YAMLLoader
+from regexapp.config import version as app_version
+
+import logging
+logger = logging.getLogger(__file__)
+
+
+class YAMLCache:
+    """Use to keep parsed YAML files in a binary format so that a YAML file
+    is only parsed again when it is changed.
+
+    A cached entry is keyed by the path, modification time, and size of
+    a YAML file.  Any failure of reading or writing a cache falls back
+    to parsing the YAML file.
+
+    Attributes
+    ----------
+    cache_dir (str): a cache directory.  Default is ~/.regexapp/cache.
+    version (int): a version of cached entry format.
+
+    Methods
+    -------
+    YAMLCache.get_signature(filename) -> tuple
+    get_cache_filename(filename, is_multi_document=False) -> str
+    load(filename, is_multi_document=False) -> object
+    clear() -> None
+    """
+    version = 1
+
+    def __init__(self, cache_dir=''):
+        self.cache_dir = cache_dir or str(
+            PurePath(Path.home(), '.regexapp', 'cache')
+        )
+
+    @classmethod
+    def get_signature(cls, filename):
+        """return a signature of a file
+
+        Parameters
+        ----------
+        filename (str): a file name.
+
+        Returns
+        -------
+        tuple: a tuple of absolute path, modification time, and size.
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def get_cache_filename(self, filename, is_multi_document=False):
+        """return a cache file name of a YAML file
+
+        Parameters
+        ----------
+        filename (str): a file name.
+        is_multi_document (bool): a cache of all documents.  Default is False.
+
+        Returns
+        -------
+        str: a cache file name.
+        """
+        path = os.path.abspath(filename)
+        digest = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        suffix = '.multi.pickle' if is_multi_document else '.pickle'
+        return str(PurePath(self.cache_dir, digest + suffix))
+
+    def load(self, filename, is_multi_document=False):
+        """load a YAML file from cache or parse it and refresh its cache
+
+        Parameters
+        ----------
+        filename (str): a file name.
+        is_multi_document (bool): parse all documents.  Default is False.
+
+        Returns
+        -------
+        object: a parsed YAML object or a list of parsed YAML objects
+                if is_multi_document is True.
+        """
+        signature = self.get_signature(filename)
+        cache_filename = self.get_cache_filename(
+            filename, is_multi_document=is_multi_document
+        )
+
+        try:
+            with open(cache_filename, 'rb') as stream:
+                version, cached_signature, yaml_obj = pickle.load(stream)
+            if version == self.version and cached_signature == signature:
+                return yaml_obj
+        except Exception as ex:     # noqa
+            pass
+
+        with open(filename) as stream:
+            if is_multi_document:
+                yaml_obj = list(YAMLLoader.load_all(stream))
+            else:
+                yaml_obj = YAMLLoader.load(stream)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_filename = '{}.{}.tmp'.format(cache_filename, os.getpid())
+            with open(tmp_filename, 'wb') as stream:
+                entry = (self.version, signature, yaml_obj)
+                pickle.dump(entry, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_filename, cache_filename)
+        except Exception as ex:
+            fmt = 'CANT cache %s - %s: %s'
+            logger.debug(fmt, filename, type(ex).__name__, ex)
+        return yaml_obj
+
+    def clear(self):
+        """remove all cached entries"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pickle'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+class BuildCache:
+    """Use to keep built patterns on disk so that rebuilding an edited
+    user data only builds its changed lines.
+
+    A built pattern is keyed by its user data, build options, and a digest
+    of references.  Any failure of reading or writing a cache falls back
+    to building a pattern.
+
+    Attributes
+    ----------
+    filename (str): a sqlite database file name.
+            Default is ~/.regexapp/cache/build.sqlite3.
+    max_entries (int): a maximum number of cached patterns.  Default is 100000.
+    version (int): a version of cached entry format.
+
+    Methods
+    -------
+    BuildCache.get_key(data, is_line=False, prepended_ws=False, appended_ws=False, ignore_case=False, digest='') -> str
+    connect() -> sqlite3.Connection
+    load(keys) -> dict
+    save(table) -> None
+    clear() -> None
+    """
+    version = 1
+    chunk_size = 500
+
+    def __init__(self, filename='', max_entries=100000):
+        self.filename = filename or str(
+            PurePath(Path.home(), '.regexapp', 'cache', 'build.sqlite3')
+        )
+        self.max_entries = max_entries
+
+    @classmethod
+    def get_key(cls, data, is_line=False, prepended_ws=False,
+                appended_ws=False, ignore_case=False, digest=''):
+        """return a cache key of user data
+
+        Parameters
+        ----------
+        data (str): a user data.
+        is_line (bool): a flag to use LinePattern.  Default is False.
+        prepended_ws (bool): prepend a whitespace at the beginning of a pattern.
+                Default is False.
+        appended_ws (bool): append a whitespace at the end of a pattern.
+                Default is False.
+        ignore_case (bool): prepend (?i) at the beginning of a pattern.
+                Default is False.
+        digest (str): a digest of references.  Default is empty.
+
+        Returns
+        -------
+        str: a cache key.
+        """
+        items = (cls.version, app_version, data, is_line, prepended_ws,
+                 appended_ws, ignore_case, digest)
+        return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+
+    def connect(self):
+        """return a connection to cache database"""
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        conn = sqlite3.connect(self.filename, timeout=5)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS patterns '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL)'
+        )
+        return conn
+
+    def load(self, keys):
+        """load cached patterns
+
+        Parameters
+        ----------
+        keys (iterable): a list of cache keys.
+
+        Returns
+        -------
+        dict: cached patterns, keyed by cache key.
+        """
+        keys = list(keys)
+        table = dict()
+        if not keys or not os.path.isfile(self.filename):
+            return table
+
+        try:
+            conn = self.connect()
+            try:
+                for index in range(0, len(keys), self.chunk_size):
+                    chunk = keys[index:index + self.chunk_size]
+                    sql = 'SELECT key, value FROM patterns WHERE key IN ({})'
+                    sql = sql.format(','.join('?' * len(chunk)))
+                    for key, value in conn.execute(sql, chunk):
+                        try:
+                            table[key] = pickle.loads(value)
+                        except Exception as ex:     # noqa
+                            pass
+            finally:
+                conn.close()
+        except Exception as ex:
+            fmt = 'CANT load build cache %s - %s: %s'
+            logger.debug(fmt, self.filename, type(ex).__name__, ex)
+        return table
+
+    def save(self, table):
+        """save built patterns
+
+        Parameters
+        ----------
+        table (dict): built patterns, keyed by cache key.
+        """
+        if not table:
+            return
+
+        try:
+            rows = [
+                (key, pickle.dumps(pattern, protocol=pickle.HIGHEST_PROTOCOL))
+                for key, pattern in table.items()
+            ]
+            conn = self.connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO patterns VALUES (?, ?)', rows
+                    )
+                    conn.execute(
+                        'DELETE FROM patterns WHERE rowid IN (SELECT rowid '
+                        'FROM patterns ORDER BY rowid DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,)
+                    )
+            finally:
+                conn.close()
+        except Exception as ex:
+            fmt = 'CANT save build cache %s - %s: %s'
+            logger.debug(fmt, self.filename, type(ex).__name__, ex)
+
+    def clear(self):
+        """remove all cached patterns"""
+        if os.path.isfile(self.filename):
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+
+
+class MemoryBuildCache(BuildCache):
+    """Use to keep built patterns in memory for a long-running process,
+    i.e. watch mode, so that rebuilding an edited user data only builds
+    its changed lines without touching disk.
+
+    Attributes
+    ----------
+    max_entries (int): a maximum number of cached patterns.  Default is 100000.
+    table (OrderedDict): cached patterns, keyed by cache key, in least
+            recently used order.
+
+    Methods
+    -------
+    load(keys) -> dict
+    save(table) -> None
+    clear() -> None
+    """
+    def __init__(self, max_entries=100000):
+        super().__init__(filename=':memory:', max_entries=max_entries)
+        self.table = OrderedDict()
+
+    def __len__(self):
+        return len(self.table)
+
+    def load(self, keys):
+        """load cached patterns
+
+        Parameters
+        ----------
+        keys (iterable): a list of cache keys.
+
+        Returns
+        -------
+        dict: cached patterns, keyed by cache key.
+        """
+        table = dict()
+        for key in keys:
+            if key in self.table:
+                self.table.move_to_end(key)
+                table[key] = self.table[key]
+        return table
+
+    def save(self, table):
+        """save built patterns and evict the least recently used patterns
+
+        Parameters
+        ----------
+        table (dict): built patterns, keyed by cache key.
+        """
+        self.table.update(table)
+        for key in table:
+            self.table.move_to_end(key)
+        while len(self.table) > self.max_entries:
+            self.table.popitem(last=False)
+
+    def clear(self):
+        """remove all cached patterns"""
+        self.table.clear()
+
+
+YAML_CACHE = YAMLCache()
+
+BUILD_CACHE = BuildCache()
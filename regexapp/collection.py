@@ -1,12 +1,24 @@
 """Module containing the logic for the collection of pattern."""
 
 import re
-import yaml
-import string
+import hashlib
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
 from textwrap import dedent
 from pathlib import Path, PurePath
 from copy import copy
-
+from types import MappingProxyType
+from collections import OrderedDict
+from threading import RLock
+
+from regexapp.cache import YAMLCache
+from regexapp.cache import YAML_CACHE
+from regexapp.utils import YAMLLoader
+from regexapp.ir import TextNode
+from regexapp.ir import ElementNode
+from regexapp.ir import AnchorNode
+from regexapp.ir import FlagNode
+from regexapp.ir import emit
 from regexapp.exceptions import EscapePatternError
 from regexapp.exceptions import PatternReferenceError
 from regexapp.exceptions import TextPatternError
@@ -35,9 +47,20 @@ def validate_pattern(pattern, flags=0, exception_cls=None):
         raise exception_cls(msg)
 
 
+# characters which are escaped by do_soft_regex_escape, i.e. regex
+# metacharacters and whitespace characters which re.escape escapes
+SOFT_ESCAPE_TABLE = str.maketrans(
+    {char: '\\' + char for char in '^$.?*+|{}[]()\t\n\r\x0b\x0c'}
+)
+
+
 def do_soft_regex_escape(pattern, is_validated=True):
     """Escape special characters in a string.  This method will help
     consistency pattern during invoking re.escape on different Python version.
+    Escaping is driven by SOFT_ESCAPE_TABLE so that output is identical
+    across Python versions.  Since other characters are kept as is, a result
+    can only be an invalid pattern if text has backslash, and validation is
+    skipped for text without backslash.
 
     Parameters
     ----------
@@ -53,19 +76,28 @@ def do_soft_regex_escape(pattern, is_validated=True):
     EscapePatternError: if error during validating pattern.
     """
     pattern = str(pattern)
-    chk1, chk2 = string.punctuation + ' ', '^$.?*+|{}[]()'
-    result = []
-    for char in pattern:
-        echar = re.escape(char)
-        if char in chk1:
-            result.append(echar if char in chk2 else char)
-        else:
-            result.append(echar)
-    new_pattern = ''.join(result)
-    is_validated and validate_pattern(new_pattern, exception_cls=EscapePatternError)
+    new_pattern = pattern.translate(SOFT_ESCAPE_TABLE)
+    if is_validated and '\\' in pattern:
+        validate_pattern(new_pattern, exception_cls=EscapePatternError)
     return new_pattern
 
 
+def rebuild_pattern(cls, pattern):
+    """recreate a pattern instance without converting its data again.
+    This function is used when a pattern is copied or pickled.
+
+    Parameters
+    ----------
+    cls (class): a pattern class, i.e. TextPattern, ElementPattern, ...
+    pattern (str): a regex pattern.
+
+    Returns
+    -------
+    str: a new instance of pattern class.
+    """
+    return str.__new__(cls, pattern)
+
+
 class VarCls:
     """Use to store variable for pattern
 
@@ -84,8 +116,15 @@ class VarCls:
     def __init__(self, name='', pattern='', option=''):
         self.name = str(name).strip()
         self.pattern = str(pattern)
-        self.option = ','.join(re.split(r'\s*_\s*', str(option).title()))
-        self.option = self.option.replace(' ', '')
+        self.option = ''
+        if option:
+            self.option = ','.join(re.split(r'\s*_\s*', str(option).title()))
+            self.option = self.option.replace(' ', '')
+
+    def __copy__(self):
+        new_instance = self.__class__.__new__(self.__class__)
+        new_instance.__dict__.update(self.__dict__)
+        return new_instance
 
     @property
     def is_empty(self):
@@ -109,18 +148,265 @@ class VarCls:
         return result
 
 
-class PatternReference(dict):
+class PatternContext:
+    """Use to hold the state of a single pattern construction so that
+    building patterns is reentrant and thread-safe
+
+    Attribute
+    ---------
+    variable (VarCls): a regex variable of an element pattern.
+    or_empty (bool): a flag if element pattern is expecting a zero match.
+    prepended_pattern (str): a start of string pattern of an element pattern.
+    appended_pattern (str): an end of string pattern of an element pattern.
+    variables (list): a list of variables of a line pattern.
+    nodes (list): a list of IR nodes of a line pattern.
+    """
+    def __init__(self):
+        self.variable = VarCls()
+        self.or_empty = False
+        self.prepended_pattern = ''
+        self.appended_pattern = ''
+        self.variables = []
+        self.nodes = []
+
+
+class ElementArgument:
+    """Use to store a classified argument of an element keyword
+
+    Attribute
+    ---------
+    kind (str): a kind of argument, i.e. var, format, word_bound, head,
+            tail, repetition, occurrence, meta_data, or, or text.
+    text (str): an argument text.
+    value (str): a variable name for var, a case for or, otherwise,
+            an argument text.
+    """
+    __slots__ = ('kind', 'text', 'value')
+
+    def __init__(self, kind, text, value=''):
+        self.kind = kind
+        self.text = text
+        self.value = value or text
+
+    def __repr__(self):
+        fmt = '{}(kind={!r}, text={!r}, value={!r})'
+        return fmt.format(type(self).__name__, self.kind, self.text, self.value)
+
+
+def run_reference_test(name, patterns, positive_samples, negative_samples):
+    """run positive and negative samples of a keyword reference.  A sample
+    passes when it fully matches any of patterns for positive test, or
+    none of patterns for negative test.
+
+    Parameters
+    ----------
+    name (str): a keyword.
+    patterns (list): a list of regex patterns of keyword.
+    positive_samples (list): a list of (case, sample) pairs.
+    negative_samples (list): a list of (case, sample) pairs.
+
+    Returns
+    -------
+    dict: a result of name, total, failures, compile_time, elapsed, and slowest.
+    """
+    result = dict(name=name, failures=[], compile_time=0.0,
+                  elapsed=0.0, slowest=0.0,
+                  total=len(positive_samples) + len(negative_samples))
+
+    start = perf_counter()
+    try:
+        compiled_patterns = [re.compile(pattern) for pattern in patterns]
+    except Exception as ex:
+        fmt = 'CANT compile pattern - {}: {}'
+        result['failures'].append(fmt.format(type(ex).__name__, ex))
+        return result
+    result['compile_time'] = perf_counter() - start
+
+    for kind, samples in [('positive', positive_samples),
+                          ('negative', negative_samples)]:
+        for case, sample in samples:
+            start = perf_counter()
+            is_matched = any(pat.fullmatch(sample) for pat in compiled_patterns)
+            elapsed = perf_counter() - start
+            result['elapsed'] += elapsed
+            result['slowest'] = max(result['slowest'], elapsed)
+            if is_matched != (kind == 'positive'):
+                fmt = '{} test {!r} FAILED with {!r}'
+                result['failures'].append(fmt.format(kind, case, sample))
+    return result
+
+
+class LazyDict(dict):
+    """Use to populate a dictionary on first access instead of on creation
+
+    Parameters
+    ----------
+    lazy (bool): defer loading until first access.  Default is False.
+
+    Attribute
+    ---------
+    is_loaded (bool): True if data is loaded.
+    load_error (Exception): an error of the last failed loading, or None.
+
+    Methods
+    -------
+    load() -> None
+    load_data() -> None
+    reset_data() -> None
+    """
+    _load_lock = RLock()
+
+    def __init__(self, lazy=False):
+        super().__init__()
+        self.is_loaded = False
+        self.load_error = None
+        self._is_loading = False
+        lazy or self.load()
+
+    def load(self):
+        """load data once.  Concurrent callers wait until data is loaded.
+        A failed loading is recorded in load_error and its partial data is
+        removed so that a next access loads data from scratch."""
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if self.is_loaded or self._is_loading:
+                return
+            self._is_loading = True
+            try:
+                self.load_data()
+                self.is_loaded = True
+                self.load_error = None
+            except Exception as ex:
+                self.load_error = ex
+                self.reset_data()
+                raise
+            finally:
+                self._is_loading = False
+
+    def load_data(self):
+        """populate data.  It must be implemented by subclass."""
+        raise NotImplementedError
+
+    def reset_data(self):
+        """remove partially loaded data"""
+        dict.clear(self)
+
+    def __contains__(self, key):
+        self.load()
+        return super().__contains__(key)
+
+    def __getitem__(self, key):
+        self.load()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self.load()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.load()
+        super().__delitem__(key)
+
+    def __iter__(self):
+        self.load()
+        return super().__iter__()
+
+    def __len__(self):
+        self.load()
+        return super().__len__()
+
+    def __repr__(self):
+        self.load()
+        return super().__repr__()
+
+    def __eq__(self, other):
+        self.load()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self.load()
+        return super().__ne__(other)
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        self.load()
+        return super().get(key, default)
+
+    def keys(self):
+        self.load()
+        return super().keys()
+
+    def values(self):
+        self.load()
+        return super().values()
+
+    def items(self):
+        self.load()
+        return super().items()
+
+    def copy(self):
+        self.load()
+        return super().copy()
+
+    def pop(self, *args):
+        self.load()
+        return super().pop(*args)
+
+    def popitem(self):
+        self.load()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.load()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.load()
+        super().update(*args, **kwargs)
+
+
+class PatternReference(LazyDict):
     """Use to load regular expression pattern from system_references.yaml
     or/and user_references.yaml
 
+    References are modeled as two layers.  A baseline layer holds references
+    which are loaded from system_references.yaml and user_references.yaml,
+    and a small overlay holds inline references, e.g. add_reference.  An
+    inline reference shadows a baseline reference of the same name, and
+    removing it reveals the baseline reference again.  Dictionary access
+    reads the merged view of both layers without copying any reference.
+
+    Parameters
+    ----------
+    lazy (bool): defer loading references until first lookup.
+            Default is False.
+
     Attribute
     ---------
     sys_ref_loc (str): a system references file name.
     user_ref_loc (str): a user references file name.
+    generation (int): a counter which is increased whenever a reference
+            is added, updated, or removed.
+    baseline (MappingProxyType): a read-only view of the baseline layer.
 
     Methods
     -------
+    load_data() -> None
+    reload() -> None
     load_reference(filename) -> None
+    PatternReference.get_system_keys() -> frozenset
+    get_self_test_cases() -> list
+    run_self_tests(workers=None) -> list
+    PatternReference.get_self_test_report(results) -> str
+    increase_generation() -> int
+    get_digest() -> str
+    is_inline(name) -> bool
+    set_inline(name, value) -> None
+    remove_inline(name) -> object
+    snapshot() -> dict
+    restore(snapshot) -> None
     PatternReference.get_pattern_layout(name) -> str
     is_valid_format(name, value) -> bool
     is_violated(dict_obj) -> bool
@@ -136,13 +422,210 @@ class PatternReference(dict):
     sys_ref_loc = str(PurePath(Path(__file__).parent, 'system_references.yaml'))
     # regex patterns - from user references
     user_ref_loc = str(PurePath(Path.home(), '.regexapp', 'user_references.yaml'))
+    # keyword names of system references, keyed by file signature
+    _system_keys = (None, frozenset())
 
-    def __init__(self):
-        super().__init__()
-        self.load_reference(self.sys_ref_loc)
-        self.load_reference(self.user_ref_loc)
+    def __init__(self, lazy=False):
+        self.generation = 0
         self.test_result = ''
         self.violated_format = ''
+        self._baseline = dict()
+        self._overlay = dict()
+        self._digest = (None, '')
+        super().__init__(lazy=lazy)
+
+    def load_data(self):
+        """load system and user references"""
+        self.load_reference(self.sys_ref_loc)
+        self.load_reference(self.user_ref_loc)
+
+    def reload(self):
+        """reload system and user references, i.e. after user_references.yaml
+        is edited.  Inline references are kept on top of reloaded references."""
+        with self._load_lock:
+            self._is_loading = True
+            overlay, self._overlay = self._overlay, dict()
+            try:
+                self.reset_data()
+                self.load_data()
+            except Exception as ex:
+                self._overlay = overlay
+                self.reset_data()
+                self.load_error = ex
+                self.is_loaded = False
+                raise
+            else:
+                self._overlay = overlay
+                dict.update(self, overlay)
+                self.load_error = None
+                self.is_loaded = True
+            finally:
+                self._is_loading = False
+                self.increase_generation()
+
+    def reset_data(self):
+        """remove partially loaded references but keep inline references"""
+        self._baseline.clear()
+        dict.clear(self)
+        dict.update(self, self._overlay)
+
+    @property
+    def baseline(self):
+        self.load()
+        return MappingProxyType(self._baseline)
+
+    def __setitem__(self, key, value):
+        self.load()
+        if key in self._overlay:
+            self._overlay[key] = value
+        else:
+            self._baseline[key] = value
+        dict.__setitem__(self, key, value)
+        self.increase_generation()
+
+    def __delitem__(self, key):
+        self.load()
+        if key not in self._overlay and key not in self._baseline:
+            raise KeyError(key)
+        self._overlay.pop(key, None)
+        self._baseline.pop(key, None)
+        dict.__delitem__(self, key)
+        self.increase_generation()
+
+    def pop(self, key, *args):
+        self.load()
+        if not dict.__contains__(self, key):
+            if args:
+                return args[0]
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def popitem(self):
+        self.load()
+        if not dict.__len__(self):
+            raise KeyError('popitem(): dictionary is empty')
+        key = list(dict.keys(self))[-1]
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        self.load()
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        self[key] = default
+        return default
+
+    def clear(self):
+        self.load()
+        self._overlay.clear()
+        self._baseline.clear()
+        dict.clear(self)
+        self.increase_generation()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def is_inline(self, name):
+        """return True if name is an inline reference
+
+        Parameters
+        ----------
+        name (str): a keyword.
+
+        Returns
+        -------
+        bool: True if name is in overlay.
+        """
+        return name in self._overlay
+
+    def set_inline(self, name, value):
+        """add or replace an inline reference in overlay
+
+        Parameters
+        ----------
+        name (str): a keyword.
+        value (dict): a reference.
+        """
+        self.load()
+        self._overlay[name] = value
+        dict.__setitem__(self, name, value)
+        self.increase_generation()
+
+    def remove_inline(self, name):
+        """remove an inline reference from overlay and reveal a baseline
+        reference of the same name if any
+
+        Parameters
+        ----------
+        name (str): a keyword.
+
+        Returns
+        -------
+        object: a removed reference.
+
+        Raises
+        ------
+        KeyError: if name is not an inline reference.
+        """
+        self.load()
+        value = self._overlay.pop(name)
+        if name in self._baseline:
+            dict.__setitem__(self, name, self._baseline[name])
+        else:
+            dict.__delitem__(self, name)
+        self.increase_generation()
+        return value
+
+    def snapshot(self):
+        """return a shallow copy of overlay
+
+        Returns
+        -------
+        dict: inline references.
+        """
+        return dict(self._overlay)
+
+    def restore(self, snapshot):
+        """replace overlay with a snapshot
+
+        Parameters
+        ----------
+        snapshot (dict): inline references which is returned by snapshot.
+        """
+        for name in list(self._overlay):
+            name in snapshot or self.remove_inline(name)
+
+        for name, value in snapshot.items():
+            if name not in self._overlay or self._overlay[name] != value:
+                self.set_inline(name, value)
+
+    def increase_generation(self):
+        """increase generation counter to notify any reference cache
+
+        Returns
+        -------
+        int: a new generation number.
+        """
+        self.generation += 1
+        return self.generation
+
+    def get_digest(self):
+        """return a digest of merged references.  Unlike generation, a
+        digest is the same for the same references in any process.
+
+        Returns
+        -------
+        str: a hex digest.
+        """
+        self.load()
+        generation, digest = self._digest
+        if generation != self.generation:
+            content = repr(sorted(dict.items(self)))
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            self._digest = (self.generation, digest)
+        return digest
 
     def load_reference(self, filename):
         """Load reference from YAML references file.
@@ -170,11 +653,9 @@ class PatternReference(dict):
                 return
 
         try:
-            with node.open() as stream:
-                yaml_obj = yaml.load(stream, Loader=yaml.SafeLoader)
-
+            for yaml_obj in YAML_CACHE.load(filename, is_multi_document=True):
                 if not yaml_obj:
-                    return
+                    continue
 
                 if not isinstance(yaml_obj, dict):
                     fmt = '{} must be structure as dictionary.'
@@ -299,20 +780,145 @@ class PatternReference(dict):
         -------
         bool: True there is a violation.
         """
-        sys_ref = yaml.load(open(self.sys_ref_loc), Loader=yaml.SafeLoader)
+        sys_keys = self.get_system_keys()
         fmt = '{} is ALREADY existed in system_references.yaml'
-        for name in dict_obj:
-            if 'datetime' not in name:
-                if name in sys_ref:
-                    self.violated_format = fmt.format(name)
-                    return True
-        return False
+        violations = [
+            fmt.format(name) for name in dict_obj
+            if 'datetime' not in name and name in sys_keys
+        ]
+        if violations:
+            self.violated_format = '\n'.join(violations)
+        return bool(violations)
+
+    @classmethod
+    def get_system_keys(cls):
+        """return keyword names of system references.  They are computed
+        once per version of system_references.yaml.
+
+        Returns
+        -------
+        frozenset: keyword names of system references.
+        """
+        signature = YAMLCache.get_signature(cls.sys_ref_loc)
+        cached_signature, sys_keys = cls._system_keys
+        if cached_signature != signature:
+            sys_keys = frozenset()
+            for yaml_obj in YAML_CACHE.load(cls.sys_ref_loc, is_multi_document=True):
+                if isinstance(yaml_obj, dict):
+                    sys_keys |= frozenset(yaml_obj)
+            cls._system_keys = (signature, sys_keys)
+        return sys_keys
+
+    def get_self_test_cases(self):
+        """collect positive and negative samples of every keyword.  Each
+        format of a datetime keyword is a separate case which is tested with
+        samples whose description mentions that format, e.g. format1.
+
+        Returns
+        -------
+        list: a list of (name, patterns, positive samples, negative samples).
+        """
+        def get_samples(node):
+            samples = []
+            for case, value in (node if isinstance(node, dict) else {}).items():
+                values = value if isinstance(value, (list, tuple)) else [value]
+                samples.extend((case, str(item)) for item in values)
+            return samples
+
+        cases = []
+        for name, node in self.items():
+            if not isinstance(node, dict):
+                continue
+            positive = get_samples(node.get('positive test'))
+            negative = get_samples(node.get('negative test'))
+            formats = OrderedDict(
+                (key, value) for key, value in node.items()
+                if re.match(r'format\d*$', key)
+            )
+            if formats:
+                table = OrderedDict((key, ([], [])) for key in formats)
+                others = ([], [])
+                for index, samples in enumerate([positive, negative]):
+                    for case, sample in samples:
+                        match = re.search(r'\b(format\d*)\b', str(case))
+                        key = match.group(1) if match else ''
+                        bucket = table.get(key, others)
+                        bucket[index].append((case, sample))
+                for key, (pos, neg) in table.items():
+                    label = '{}.{}'.format(name, key)
+                    cases.append((label, [formats[key]], pos, neg))
+                if others[0] or others[1]:
+                    cases.append((name, list(formats.values())) + others)
+            elif 'pattern' in node:
+                cases.append((name, [str(node['pattern'])], positive, negative))
+        return cases
+
+    def run_self_tests(self, workers=None):
+        """run positive and negative samples of every keyword.  Each pattern
+        is compiled once, and cases are distributed over a process pool if
+        workers is greater than 1.
+
+        Parameters
+        ----------
+        workers (int): a number of worker processes.  Default is None.
+
+        Returns
+        -------
+        list: a list of results of keywords in reference order.
+        """
+        cases = self.get_self_test_cases()
+        if not workers or workers <= 1 or len(cases) <= 1:
+            return [run_reference_test(*case) for case in cases]
+
+        chunksize = max(len(cases) // (workers * 4), 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(run_reference_test, *zip(*cases),
+                                   chunksize=chunksize)
+            return list(results)
+
+    @classmethod
+    def get_self_test_report(cls, results):
+        """return a timing table of self-test results.  Keywords are sorted
+        by their slowest sample so that backtracking-prone patterns are on top.
+
+        Parameters
+        ----------
+        results (list): a list of results which is returned by run_self_tests.
+
+        Returns
+        -------
+        str: a self-test report.
+        """
+        fmt = '{:<32} {:>7} {:>6} {:>12} {:>10} {:>12}'
+        headers = fmt.format('keyword', 'samples', 'failed',
+                             'compile(ms)', 'total(ms)', 'slowest(ms)')
+        lst = [headers, '-' * len(headers)]
+        failures = []
+        for result in sorted(results, key=lambda item: -item['slowest']):
+            lst.append(fmt.format(
+                result['name'], result['total'], len(result['failures']),
+                '{:.3f}'.format(result['compile_time'] * 1000),
+                '{:.3f}'.format(result['elapsed'] * 1000),
+                '{:.3f}'.format(result['slowest'] * 1000),
+            ))
+            for failure in result['failures']:
+                failures.append('{}: {}'.format(result['name'], failure))
+
+        total = sum(result['total'] for result in results)
+        lst.append('-' * len(headers))
+        lst.append('Tested {} keywords, {} samples, {} failures.'.format(
+            len(results), total, len(failures)))
+        if failures:
+            lst.extend(['', 'Failures:'] + ['  {}'.format(item) for item in failures])
+        return '\n'.join(lst)
 
     def test(self, content):
-        """test pattern reference.
+        """test pattern reference.  Documents of content are validated
+        incrementally and every violation is reported at once.
+
         Parameters
         ----------
-        content (str): a content of YAML format.
+        content (str): a content of YAML format.  It can have many documents.
 
         Returns
         -------
@@ -323,36 +929,53 @@ class PatternReference(dict):
         PatternReferenceError: raise exception if a content is
                 an invalid format or violate system_references.yaml
         """
-
+        violations = []
+        is_empty = True
+        names = set()
         try:
-            yaml_obj = yaml.load(content, Loader=yaml.SafeLoader)
+            for index, yaml_obj in enumerate(YAMLLoader.load_all(content), 1):
+                if not yaml_obj:
+                    continue
+
+                is_empty = False
+                if not isinstance(yaml_obj, dict):
+                    fmt = 'content must be structure of dictionary (document {}).'
+                    violations.append(fmt.format(index))
+                    continue
+
+                for name, value in yaml_obj.items():
+                    if not self.is_valid_format(name, value):
+                        violations.append(self.violated_format)
+                    if self.is_violated({name: value}):
+                        violations.append(self.violated_format)
+                    elif name in names:
+                        fmt = '{} is DUPLICATED in document {}'
+                        violations.append(fmt.format(name, index))
+                    names.add(name)
         except Exception as ex:
-            msg = '{} - {}'.format(type(ex).__name__, ex)
-            raise PatternReferenceError(msg)
+            is_empty = False
+            violations.append('{} - {}'.format(type(ex).__name__, ex))
 
-        if not yaml_obj:
+        if violations:
+            self.violated_format = '\n'.join(violations)
+            raise PatternReferenceError(self.violated_format)
+
+        if is_empty:
             logger.warning('CANT test an empty content')
             self.test_result = 'not_tested'
             return True
 
-        if not isinstance(yaml_obj, dict):
-            msg = 'content must be structure of dictionary.'
-            raise PatternReferenceError(msg)
-
-        for name, value in yaml_obj.items():
-            if not self.is_valid_format(name, value):
-                raise PatternReferenceError(self.violated_format)
-
-        if self.is_violated(yaml_obj):
-            raise PatternReferenceError(self.violated_format)
-
         self.test_result = 'tested'
         return True
 
 
-class SymbolCls(dict):
+class SymbolCls(LazyDict):
     """Use to load symbols.yaml
 
+    Parameters
+    ----------
+    lazy (bool): defer loading symbols until first lookup.  Default is False.
+
     Attribute
     ---------
     filename (str): a system references file name.
@@ -360,15 +983,15 @@ class SymbolCls(dict):
 
     filename = str(PurePath(Path(__file__).parent, 'symbols.yaml'))
 
-    def __init__(self):
-        stream = open(self.filename)
-        obj = yaml.load(stream, Loader=yaml.SafeLoader)
-        super().__init__(obj)
+    def load_data(self):
+        """load symbols"""
+        obj = YAML_CACHE.load(self.filename)
+        self.update(obj)
 
 
-REF = PatternReference()
+REF = PatternReference(lazy=True)
 
-SYMBOL = SymbolCls()
+SYMBOL = SymbolCls(lazy=True)
 
 
 class TextPattern(str):
@@ -414,6 +1037,9 @@ class TextPattern(str):
         self.text = text
         self.as_is = as_is
 
+    def __reduce__(self):
+        return rebuild_pattern, (self.__class__, str(self)), self.__dict__
+
     def __add__(self, other):
         result = super().__add__(other)
         result_pat = TextPattern(result, as_is=True)
@@ -600,21 +1226,27 @@ class ElementPattern(str):
 
     Methods
     -------
-    ElementPattern.get_pattern(data) -> str
-    ElementPattern.build_pattern(keyword, params) -> str
-    ElementPattern.build_custom_pattern(keyword, params) -> bool, str
-    ElementPattern.build_datetime_pattern(keyword, params) -> bool, str
-    ElementPattern.build_choice_pattern(keyword, params) -> bool, str
-    ElementPattern.build_data_pattern(keyword, params) -> bool, str
+    ElementPattern.get_pattern(data, context=None) -> str
+    ElementPattern.get_memo(key) -> tuple
+    ElementPattern.set_memo(key, pattern, context) -> None
+    ElementPattern.clear_memo() -> None
+    ElementPattern.build_pattern(keyword, params, context=None) -> str
+    ElementPattern.classify_argument(arg) -> ElementArgument
+    ElementPattern.get_arguments(params) -> list
+    ElementPattern.apply_arguments(lst, arguments, context=None, is_repeatable=False, added_parentheses=True) -> str
+    ElementPattern.build_custom_pattern(keyword, params, context=None) -> bool, str
+    ElementPattern.build_datetime_pattern(keyword, params, context=None) -> bool, str
+    ElementPattern.build_choice_pattern(keyword, params, context=None) -> bool, str
+    ElementPattern.build_data_pattern(keyword, params, context=None) -> bool, str
     ElementPattern.build_start_pattern(keyword, params) -> bool, str
     ElementPattern.build_end_pattern(keyword, params) -> bool, str
     ElementPattern.build_raw_pattern(keyword, params) -> bool, str
     ElementPattern.build_default_pattern(keyword, params) -> bool, str
     ElementPattern.join_list(lst) -> str
-    ElementPattern.add_var_name(pattern, name='') -> str
+    ElementPattern.add_var_name(pattern, name='', context=None) -> str
     ElementPattern.add_word_bound(pattern, word_bound='', added_parentheses=True) -> str
-    ElementPattern.add_start_of_string(pattern, head='') -> str
-    ElementPattern.add_end_of_string(pattern, tail='') -> str
+    ElementPattern.add_start_of_string(pattern, head='', context=None) -> str
+    ElementPattern.add_end_of_string(pattern, tail='', context=None) -> str
     ElementPattern.add_repetition(lst, repetition='') -> list
     ElementPattern.add_occurrence(lst, occurrence='') -> list
     ElementPattern.add_case_occurrence(lst, first, last, is_phrase) -> bool
@@ -640,45 +1272,111 @@ class ElementPattern(str):
         ])
     )
     meta_data_pattern = r'^meta_data_\w+'
-    _variable = None
+
+    # a master pattern to classify an argument in one scan.  Alternatives
+    # are tried in the order of precedence of argument kinds.
+    argument_pattern = re.compile('|'.join([
+        r'(?P<var>(?i:var_)(?P<name>\w+)$)',
+        r'(?P<format>format)',
+        '(?P<word_bound>{})'.format(word_bound_pattern),
+        '(?P<head>{})'.format(head_pattern),
+        '(?P<tail>{})'.format(tail_pattern),
+        '(?P<repetition>{})'.format(repetition_pattern),
+        '(?P<occurrence>{})'.format(occurrence_pattern),
+        '(?P<meta_data>{})'.format(meta_data_pattern),
+        r'(?P<or>(?i:or_)(?P<case>[^,]+))',
+    ]))
+
+    # memo of built patterns and their metadata, keyed by (text, REF.generation)
+    memo_maxsize = 4096
+    _memo = dict()
+    _memo_generation = None
+    _memo_lock = RLock()
 
     def __new__(cls, text, as_is=False):
-        cls._variable = VarCls()
-        cls._or_empty = False
-        cls._prepended_pattern = ''
-        cls._appended_pattern = ''
+        context = PatternContext()
         data = str(text)
 
-        if as_is:
-            return str.__new__(cls, data)
-
-        if data:
-            pattern = cls.get_pattern(data)
+        if as_is or not data:
+            pattern = data
         else:
-            pattern = ''
-        return str.__new__(cls, pattern)
+            key = (data, REF.generation)
+            memo = cls.get_memo(key)
+            if memo:
+                pattern, variable, or_empty, prepended_pattern, appended_pattern = memo
+                context.variable = copy(variable)
+                context.or_empty = or_empty
+                context.prepended_pattern = prepended_pattern
+                context.appended_pattern = appended_pattern
+            else:
+                pattern = cls.get_pattern(data, context=context)
+                cls.set_memo(key, pattern, context)
+
+        instance = str.__new__(cls, pattern)
+        instance.variable = context.variable
+        instance.or_empty = context.or_empty
+        instance.prepended_pattern = context.prepended_pattern
+        instance.appended_pattern = context.appended_pattern
+        return instance
 
     def __init__(self, text, as_is=False):
         self.text = text
         self.as_is = as_is
-        self.variable = self._variable
-        self.or_empty = self._or_empty
-        self.prepended_pattern = self._prepended_pattern
-        self.appended_pattern = self._appended_pattern
 
-        # clear class variable after initialization
-        self._variable = VarCls()
-        self._or_empty = False
-        self._prepended_pattern = ''
-        self._appended_pattern = ''
+    def __reduce__(self):
+        return rebuild_pattern, (self.__class__, str(self)), self.__dict__
 
     @classmethod
-    def get_pattern(cls, text):
+    def get_memo(cls, key):
+        """get a memoized pattern and its metadata
+
+        Parameters
+        ----------
+        key (tuple): a pair of element text and reference generation.
+
+        Returns
+        -------
+        tuple: pattern, variable, or_empty, prepended_pattern, and
+                appended_pattern if key was memoized, otherwise, empty tuple.
+        """
+        with cls._memo_lock:
+            if cls._memo_generation != REF.generation:
+                cls._memo.clear()
+                cls._memo_generation = REF.generation
+            return cls._memo.get(key, ())
+
+    @classmethod
+    def set_memo(cls, key, pattern, context):
+        """memoize a built pattern with its metadata
+
+        Parameters
+        ----------
+        key (tuple): a pair of element text and reference generation.
+        pattern (str): a built pattern.
+        context (PatternContext): a build context of pattern.
+        """
+        with cls._memo_lock:
+            if len(cls._memo) >= cls.memo_maxsize:
+                cls._memo.pop(next(iter(cls._memo)))
+            cls._memo[key] = (
+                pattern, copy(context.variable), context.or_empty,
+                context.prepended_pattern, context.appended_pattern
+            )
+
+    @classmethod
+    def clear_memo(cls):
+        """remove all memoized patterns"""
+        with cls._memo_lock:
+            cls._memo.clear()
+
+    @classmethod
+    def get_pattern(cls, text, context=None):
         """convert data to regex pattern
 
         Parameters
         ----------
         text (str): a text
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
@@ -688,12 +1386,13 @@ class ElementPattern(str):
         ------
         ElementPatternError: raise an exception if pattern is invalid.
         """
+        context = context or PatternContext()
         sep_pat = r'(?P<keyword>\w+)[(](?P<params>.*)[)]$'
         match = re.match(sep_pat, text.strip())
         if match:
             keyword = match.group('keyword')
             params = match.group('params').strip()
-            pattern = cls.build_pattern(keyword, params)
+            pattern = cls.build_pattern(keyword, params, context=context)
         else:
             pattern = do_soft_regex_escape(text)
 
@@ -701,13 +1400,14 @@ class ElementPattern(str):
         return pattern
 
     @classmethod
-    def build_pattern(cls, keyword, params):
+    def build_pattern(cls, keyword, params, context=None):
         """build a regex pattern over given keyword, params
 
         Parameters
         ----------
         keyword (str): a custom keyword
         params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
@@ -725,23 +1425,33 @@ class ElementPattern(str):
         if is_built:
             return end_pattern
 
-        is_built, symbol_pattern = cls.build_symbol_pattern(keyword, params)
+        is_built, symbol_pattern = cls.build_symbol_pattern(
+            keyword, params, context=context
+        )
         if is_built:
             return symbol_pattern
 
-        is_built, datetime_pattern = cls.build_datetime_pattern(keyword, params)
+        is_built, datetime_pattern = cls.build_datetime_pattern(
+            keyword, params, context=context
+        )
         if is_built:
             return datetime_pattern
 
-        is_built, choice_pattern = cls.build_choice_pattern(keyword, params)
+        is_built, choice_pattern = cls.build_choice_pattern(
+            keyword, params, context=context
+        )
         if is_built:
             return choice_pattern
 
-        is_built, data_pattern = cls.build_data_pattern(keyword, params)
+        is_built, data_pattern = cls.build_data_pattern(
+            keyword, params, context=context
+        )
         if is_built:
             return data_pattern
 
-        is_built, custom_pattern = cls.build_custom_pattern(keyword, params)
+        is_built, custom_pattern = cls.build_custom_pattern(
+            keyword, params, context=context
+        )
         if is_built:
             return custom_pattern
 
@@ -749,27 +1459,66 @@ class ElementPattern(str):
         return default_pattern
 
     @classmethod
-    def build_custom_pattern(cls, keyword, params):
-        """build a custom pattern over given keyword, params
+    def classify_argument(cls, arg):
+        """classify an argument of an element keyword
 
         Parameters
         ----------
-        keyword (str): a custom keyword
-        params (str): a list of parameters
+        arg (str): an argument.
 
         Returns
         -------
-        tuple: status, a regex pattern.
+        ElementArgument: a classified argument.
         """
-        if keyword not in REF:
-            return False, ''
+        match = cls.argument_pattern.match(arg)
+        if not match:
+            return ElementArgument('text', arg)
 
+        kind = match.lastgroup
+        if kind == 'var':
+            return ElementArgument(kind, arg, value=match.group('name'))
+        elif kind == 'or':
+            return ElementArgument(kind, arg, value=match.group('case'))
+        return ElementArgument(kind, arg)
+
+    @classmethod
+    def get_arguments(cls, params):
+        """split and classify parameters of an element keyword
+
+        Parameters
+        ----------
+        params (str): a list of parameters
+
+        Returns
+        -------
+        list: a list of ElementArgument.
+        """
         arguments = re.split(r' *, *', params) if params else []
+        return [cls.classify_argument(arg) for arg in arguments]
 
-        lst = [REF.get(keyword).get('pattern')]
+    @classmethod
+    def apply_arguments(cls, lst, arguments, context=None,
+                        is_repeatable=False, added_parentheses=True):
+        """apply classified arguments to a list of sub-patterns
+
+        Parameters
+        ----------
+        lst (list): a list of sub-patterns.
+        arguments (list): a list of ElementArgument.
+        context (PatternContext): a build context.  Default is None.
+        is_repeatable (bool): support repetition and occurrence arguments.
+                Default is False.
+        added_parentheses (bool): always add parentheses to pattern when
+                adding word bound, otherwise, only for multiple sub-patterns.
+                Default is True.
 
-        name, vpat = '', r'var_(?P<name>\w+)$'
-        or_pat = r'or_(?P<case>[^,]+)'
+        Returns
+        -------
+        str: a regex pattern.
+        """
+        context = context or PatternContext()
+        lst = lst[:]
+        name = ''
         is_empty = False
         word_bound = ''
         head = ''
@@ -777,81 +1526,107 @@ class ElementPattern(str):
         is_repeated = False
         is_occurrence = False
 
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match:
-                name = match.group('name') if not name else name
-            elif re.match(cls.word_bound_pattern, arg):
+        for argument in arguments:
+            kind, arg = argument.kind, argument.text
+            if kind in ('repetition', 'occurrence') and not is_repeatable:
+                kind = 'text'
+
+            if kind == 'var':
+                name = name or argument.value
+            elif kind == 'word_bound':
                 if arg == 'word_bound_raw':
                     'word_bound' not in lst and lst.append('word_bound')
                 else:
                     word_bound = arg
-            elif re.match(cls.head_pattern, arg):
+            elif kind == 'head':
                 if arg == 'head_raw':
                     'head' not in lst and lst.append('head')
                 else:
                     head = arg
-            elif re.match(cls.tail_pattern, arg):
+            elif kind == 'tail':
                 if arg == 'tail_raw':
                     'tail' not in lst and lst.append('tail')
                 else:
                     tail = arg
-            elif re.match(cls.repetition_pattern, arg):
+            elif kind == 'repetition':
                 if not is_repeated or not is_occurrence:
                     lst = cls.add_repetition(lst, repetition=arg)
                     is_repeated = True
-            elif re.match(cls.occurrence_pattern, arg):
+            elif kind == 'occurrence':
                 if not is_repeated or not is_occurrence:
                     lst = cls.add_occurrence(lst, occurrence=arg)
                     is_occurrence = True
-            elif re.match(cls.meta_data_pattern, arg):
+            elif kind == 'meta_data':
                 if arg == 'meta_data_raw':
                     'meta_data' not in lst and lst.append('meta_data')
                 else:
-                    cls._variable.option = arg.lstrip('meta_data_')
-            else:
-                match = re.match(or_pat, arg, flags=re.I)
-                if match:
-                    case = match.group('case')
-                    if case == 'empty':
-                        is_empty = True
-                        cls._or_empty = is_empty
-                    else:
-                        if case in REF:
-                            pat = REF.get(case).get('pattern')
-                            pat not in lst and lst.append(pat)
-                        else:
-                            pat = case
-                            pat not in lst and lst.append(pat)
+                    context.variable.option = arg.lstrip('meta_data_')
+            elif kind == 'or':
+                case = argument.value
+                if case == 'empty':
+                    is_empty = True
+                    context.or_empty = is_empty
                 else:
-                    pat = do_soft_regex_escape(arg)
+                    pat = REF.get(case).get('pattern') if case in REF else case
                     pat not in lst and lst.append(pat)
+            else:
+                pat = do_soft_regex_escape(arg)
+                pat not in lst and lst.append(pat)
 
         is_empty and lst.append('')
         is_multiple = len(lst) > 1
         pattern = cls.join_list(lst)
         pattern = cls.add_word_bound(
-            pattern, word_bound=word_bound, added_parentheses=is_multiple
+            pattern, word_bound=word_bound,
+            added_parentheses=added_parentheses or is_multiple
         )
-        pattern = cls.add_var_name(pattern, name=name)
-        pattern = cls.add_head_of_string(pattern, head=head)
-        pattern = cls.add_tail_of_string(pattern, tail=tail)
+        pattern = cls.add_var_name(pattern, name=name, context=context)
+        pattern = cls.add_head_of_string(pattern, head=head, context=context)
+        pattern = cls.add_tail_of_string(pattern, tail=tail, context=context)
         pattern = pattern.replace('__comma__', ',')
+        return pattern
+
+    @classmethod
+    def build_custom_pattern(cls, keyword, params, context=None):
+        """build a custom pattern over given keyword, params
+
+        Parameters
+        ----------
+        keyword (str): a custom keyword
+        params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
+
+        Returns
+        -------
+        tuple: status, a regex pattern.
+        """
+        context = context or PatternContext()
+        if keyword not in REF:
+            return False, ''
+
+        arguments = cls.get_arguments(params)
+        lst = [REF.get(keyword).get('pattern')]
+        pattern = cls.apply_arguments(
+            lst, arguments, context=context,
+            is_repeatable=True, added_parentheses=False
+        )
         return True, pattern
 
     @classmethod
-    def build_symbol_pattern(cls, keyword, params):
+    def build_symbol_pattern(cls, keyword, params, context=None):
         """build a symbol over given keyword, params
 
         Parameters
         ----------
         keyword (str): a symbol keyword
         params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         tuple: status, a regex pattern.
         """
+        context = context or PatternContext()
         if keyword != 'symbol' or not params.strip():
             return False, ''
 
@@ -870,91 +1645,28 @@ class ElementPattern(str):
 
         val = SYMBOL.get(symbol_name, do_soft_regex_escape(symbol_name))
         lst = [val]
-
-        name, vpat = '', r'var_(?P<name>\w+)$'
-        or_pat = r'or_(?P<case>[^,]+)'
-        is_empty = False
-        word_bound = ''
-        head = ''
-        tail = ''
-        is_repeated = False
-        is_occurrence = False
-
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match:
-                name = match.group('name') if not name else name
-            elif re.match(cls.word_bound_pattern, arg):
-                if arg == 'word_bound_raw':
-                    'word_bound' not in lst and lst.append('word_bound')
-                else:
-                    word_bound = arg
-            elif re.match(cls.head_pattern, arg):
-                if arg == 'head_raw':
-                    'head' not in lst and lst.append('head')
-                else:
-                    head = arg
-            elif re.match(cls.tail_pattern, arg):
-                if arg == 'tail_raw':
-                    'tail' not in lst and lst.append('tail')
-                else:
-                    tail = arg
-            elif re.match(cls.repetition_pattern, arg):
-                if not is_repeated or not is_occurrence:
-                    lst = cls.add_repetition(lst, repetition=arg)
-                    is_repeated = True
-            elif re.match(cls.occurrence_pattern, arg):
-                if not is_repeated or not is_occurrence:
-                    lst = cls.add_occurrence(lst, occurrence=arg)
-                    is_occurrence = True
-            elif re.match(cls.meta_data_pattern, arg):
-                if arg == 'meta_data_raw':
-                    'meta_data' not in lst and lst.append('meta_data')
-                else:
-                    cls._variable.option = arg.lstrip('meta_data_')
-            else:
-                match = re.match(or_pat, arg, flags=re.I)
-                if match:
-                    case = match.group('case')
-                    if case == 'empty':
-                        is_empty = True
-                        cls._or_empty = is_empty
-                    else:
-                        if case in REF:
-                            pat = REF.get(case).get('pattern')
-                            pat not in lst and lst.append(pat)
-                        else:
-                            pat = case
-                            pat not in lst and lst.append(pat)
-                else:
-                    pat = do_soft_regex_escape(arg)
-                    pat not in lst and lst.append(pat)
-
-        is_empty and lst.append('')
-        is_multiple = len(lst) > 1
-        pattern = cls.join_list(lst)
-        pattern = cls.add_word_bound(
-            pattern, word_bound=word_bound, added_parentheses=is_multiple
+        arguments = [cls.classify_argument(arg) for arg in arguments]
+        pattern = cls.apply_arguments(
+            lst, arguments, context=context,
+            is_repeatable=True, added_parentheses=False
         )
-        pattern = cls.add_var_name(pattern, name=name)
-        pattern = cls.add_head_of_string(pattern, head=head)
-        pattern = cls.add_tail_of_string(pattern, tail=tail)
-        pattern = pattern.replace('__comma__', ',')
         return True, pattern
 
     @classmethod
-    def build_datetime_pattern(cls, keyword, params):
+    def build_datetime_pattern(cls, keyword, params, context=None):
         """build a datetime pattern over given keyword, params
 
         Parameters
         ----------
         keyword (str): a custom keyword
         params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         tuple: status, a regex pattern.
         """
+        context = context or PatternContext()
         if keyword not in REF:
             return False, ''
 
@@ -963,231 +1675,61 @@ class ElementPattern(str):
         if not fmt_lst:
             return False, ''
 
-        arguments = re.split(r' *, *', params) if params else []
+        arguments = cls.get_arguments(params)
         lst = []
-        name, vpat = '', r'var_(?P<name>\w+)$'
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match:
-                name = match.group('name') if not name else name
-            elif arg.startswith('format'):
-                pat = node.get(arg)
+        for argument in arguments:
+            if argument.kind == 'format':
+                pat = node.get(argument.text)
                 pat not in lst and lst.append(pat)
-            # else:
-            #     pat = arg
-            #     pat not in lst and lst.append(pat)
         if not lst:
             lst.append(node.get('format'))
 
-        or_pat = r'or_(?P<case>[^,]+)'
-        is_empty = False
-        word_bound = ''
-        head = ''
-        tail = ''
-
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match or arg.startswith('format'):
-                continue
-            elif re.match(cls.word_bound_pattern, arg):
-                if arg == 'word_bound_raw':
-                    'word_bound' not in lst and lst.append('word_bound')
-                else:
-                    word_bound = arg
-            elif re.match(cls.head_pattern, arg):
-                if arg == 'head_raw':
-                    'head' not in lst and lst.append('head')
-                else:
-                    head = arg
-            elif re.match(cls.tail_pattern, arg):
-                if arg == 'tail_raw':
-                    'tail' not in lst and lst.append('tail')
-                else:
-                    tail = arg
-            elif re.match(cls.meta_data_pattern, arg):
-                if arg == 'meta_data_raw':
-                    'meta_data' not in lst and lst.append('meta_data')
-                else:
-                    cls._variable.option = arg.lstrip('meta_data_')
-            else:
-                match = re.match(or_pat, arg, flags=re.I)
-                if match:
-                    case = match.group('case')
-                    if case == 'empty':
-                        is_empty = True
-                        cls._or_empty = is_empty
-                    else:
-                        if case in REF:
-                            pat = REF.get(case).get('pattern')
-                            pat not in lst and lst.append(pat)
-                        else:
-                            pat = case
-                            pat not in lst and lst.append(pat)
-                else:
-                    pat = do_soft_regex_escape(arg)
-                    pat not in lst and lst.append(pat)
-
-        is_empty and lst.append('')
-        pattern = cls.join_list(lst)
-        pattern = cls.add_word_bound(pattern, word_bound=word_bound)
-        pattern = cls.add_var_name(pattern, name=name)
-        pattern = cls.add_head_of_string(pattern, head=head)
-        pattern = cls.add_tail_of_string(pattern, tail=tail)
-        pattern = pattern.replace('__comma__', ',')
+        arguments = [arg for arg in arguments if arg.kind != 'format']
+        pattern = cls.apply_arguments(lst, arguments, context=context)
         return True, pattern
 
     @classmethod
-    def build_choice_pattern(cls, keyword, params):
+    def build_choice_pattern(cls, keyword, params, context=None):
         """build a choice pattern over given keyword, params
 
         Parameters
         ----------
         keyword (str): a custom keyword
         params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         str: a regex pattern.
         """
+        context = context or PatternContext()
         if keyword != 'choice':
             return False, ''
 
-        arguments = re.split(r' *, *', params) if params else []
-        lst = []
-
-        name, vpat = '', r'var_(?P<name>\w+)$'
-        or_pat = r'or_(?P<case>[^,]+)'
-        is_empty = False
-        word_bound = ''
-        head = ''
-        tail = ''
-
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match:
-                name = match.group('name') if not name else name
-            elif re.match(cls.word_bound_pattern, arg):
-                if arg == 'word_bound_raw':
-                    'word_bound' not in lst and lst.append('word_bound')
-                else:
-                    word_bound = arg
-            elif re.match(cls.head_pattern, arg):
-                if arg == 'head_raw':
-                    'head' not in lst and lst.append('head')
-                else:
-                    head = arg
-            elif re.match(cls.tail_pattern, arg):
-                if arg == 'tail_raw':
-                    'tail' not in lst and lst.append('tail')
-                else:
-                    tail = arg
-            elif re.match(cls.meta_data_pattern, arg):
-                if arg == 'meta_data_raw':
-                    'meta_data' not in lst and lst.append('meta_data')
-                else:
-                    cls._variable.option = arg.lstrip('meta_data_')
-            else:
-                match = re.match(or_pat, arg, flags=re.I)
-                if match:
-                    case = match.group('case')
-                    if case == 'empty':
-                        is_empty = True
-                        cls._or_empty = is_empty
-                    else:
-                        if case in REF:
-                            pat = REF.get(case).get('pattern')
-                            pat not in lst and lst.append(pat)
-                        else:
-                            pat = case
-                            pat not in lst and lst.append(pat)
-                else:
-                    pat = do_soft_regex_escape(arg)
-                    pat not in lst and lst.append(pat)
-
-        is_empty and lst.append('')
-        pattern = cls.join_list(lst)
-        pattern = cls.add_word_bound(pattern, word_bound=word_bound)
-        pattern = cls.add_var_name(pattern, name=name)
-        pattern = cls.add_head_of_string(pattern, head=head)
-        pattern = cls.add_tail_of_string(pattern, tail=tail)
-        pattern = pattern.replace('__comma__', ',')
+        arguments = cls.get_arguments(params)
+        pattern = cls.apply_arguments([], arguments, context=context)
         return True, pattern
 
     @classmethod
-    def build_data_pattern(cls, keyword, params):
+    def build_data_pattern(cls, keyword, params, context=None):
         """build a data pattern over given keyword, params
 
         Parameters
         ----------
         keyword (str): a custom keyword
         params (str): a list of parameters
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         str: a regex pattern.
         """
+        context = context or PatternContext()
         if keyword != 'data':
             return False, ''
 
-        arguments = re.split(r' *, *', params) if params else []
-        lst = []
-
-        name, vpat = '', r'var_(?P<name>\w+)$'
-        or_pat = r'or_(?P<case>[^,]+)'
-        is_empty = False
-        word_bound = ''
-        head = ''
-        tail = ''
-
-        for arg in arguments:
-            match = re.match(vpat, arg, flags=re.I)
-            if match:
-                name = match.group('name') if not name else name
-            elif re.match(cls.word_bound_pattern, arg):
-                if arg == 'word_bound_raw':
-                    'word_bound' not in lst and lst.append('word_bound')
-                else:
-                    word_bound = arg
-            elif re.match(cls.head_pattern, arg):
-                if arg == 'head_raw':
-                    'head' not in lst and lst.append('head')
-                else:
-                    head = arg
-            elif re.match(cls.tail_pattern, arg):
-                if arg == 'tail_raw':
-                    'tail' not in lst and lst.append('tail')
-                else:
-                    tail = arg
-            elif re.match(cls.meta_data_pattern, arg):
-                if arg == 'meta_data_raw':
-                    'meta_data' not in lst and lst.append('meta_data')
-                else:
-                    cls._variable.option = arg.lstrip('meta_data_')
-            else:
-                match = re.match(or_pat, arg, flags=re.I)
-                if match:
-                    case = match.group('case')
-                    if case == 'empty':
-                        is_empty = True
-                        cls._or_empty = is_empty
-                    else:
-                        if case in REF:
-                            pat = REF.get(case).get('pattern')
-                            pat not in lst and lst.append(pat)
-                        else:
-                            pat = case
-                            pat not in lst and lst.append(pat)
-                else:
-                    pat = do_soft_regex_escape(arg)
-                    pat not in lst and lst.append(pat)
-
-        is_empty and lst.append('')
-        pattern = cls.join_list(lst)
-        pattern = cls.add_word_bound(pattern, word_bound=word_bound)
-        pattern = cls.add_var_name(pattern, name=name)
-        pattern = cls.add_head_of_string(pattern, head=head)
-        pattern = cls.add_tail_of_string(pattern, tail=tail)
-        pattern = pattern.replace('__comma__', ',')
+        arguments = cls.get_arguments(params)
+        pattern = cls.apply_arguments([], arguments, context=context)
         return True, pattern
 
     @classmethod
@@ -1312,21 +1854,23 @@ class ElementPattern(str):
         return result
 
     @classmethod
-    def add_var_name(cls, pattern, name=''):
+    def add_var_name(cls, pattern, name='', context=None):
         """add var name to regex pattern
 
         Parameters
         ----------
         pattern (str): a pattern
         name (str): a regex variable name
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         str: new pattern with variable name.
         """
+        context = context or PatternContext()
         if name:
-            cls._variable.name = name
-            cls._variable.pattern = pattern
+            context.variable.name = name
+            context.variable.pattern = pattern
             if pattern.startswith('(') and pattern.endswith(')'):
                 sub_pat = pattern[1:-1]
                 if pattern.endswith('|)'):
@@ -1334,7 +1878,7 @@ class ElementPattern(str):
                 else:
                     try:
                         re.compile(sub_pat)
-                        cls._variable.pattern = sub_pat
+                        context.variable.pattern = sub_pat
                         new_pattern = '(?P<{}>{})'.format(name, sub_pat)
                     except Exception as ex:     # noqa
                         new_pattern = '(?P<{}>{})'.format(name, pattern)
@@ -1377,18 +1921,20 @@ class ElementPattern(str):
         return new_pattern
 
     @classmethod
-    def add_head_of_string(cls, pattern, head=''):
+    def add_head_of_string(cls, pattern, head='', context=None):
         """prepend start of string i.e ^ or ^\\s* or ^\\s+ or ^ * or ^ + regex pattern
 
         Parameters
         ----------
         pattern (str): a pattern
         head (str): start of string case.  Default is empty.
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         str: new pattern with start of string pattern
         """
+        context = context or PatternContext()
         if head:
             case1, case2 = r'^\s*', r'^\s+'
             case3, case4 = r'^ *', r'^ +'
@@ -1402,73 +1948,75 @@ class ElementPattern(str):
 
             if head == 'head_ws' and not pattern.startswith(case1):
                 new_pattern = '{}{}'.format(case1, pattern)
-                cls._prepended_pattern = case1
+                context.prepended_pattern = case1
             elif head == 'head_ws_plus' and not pattern.startswith(case2):
                 new_pattern = '{}{}'.format(case2, pattern)
-                cls._prepended_pattern = case2
+                context.prepended_pattern = case2
             elif head == 'head_space' and not pattern.startswith(case3):
                 new_pattern = '{}{}'.format(case3, pattern)
-                cls._prepended_pattern = case3
+                context.prepended_pattern = case3
             elif head == 'head_space_plus' and not pattern.startswith(case4):
                 new_pattern = '{}{}'.format(case4, pattern)
-                cls._prepended_pattern = case4
+                context.prepended_pattern = case4
             elif head == 'head_spaces' and not pattern.startswith(case4):
                 new_pattern = '{}{}'.format(case4, pattern)
-                cls._prepended_pattern = case4
+                context.prepended_pattern = case4
             elif head == 'head' and not pattern.startswith(case5):
                 new_pattern = '{}{}'.format(case5, pattern)
-                cls._prepended_pattern = case5
+                context.prepended_pattern = case5
             elif head == 'head_just_ws' and not pattern.startswith(case6):
                 new_pattern = '{}{}'.format(case6, pattern)
-                cls._prepended_pattern = case6
+                context.prepended_pattern = case6
             elif head == 'head_just_ws_plus' and not pattern.startswith(case7):
                 new_pattern = '{}{}'.format(case7, pattern)
-                cls._prepended_pattern = case7
+                context.prepended_pattern = case7
             elif head == 'head_just_space' and not pattern.startswith(case8):
                 new_pattern = '{}{}'.format(case8, pattern)
-                cls._prepended_pattern = case8
+                context.prepended_pattern = case8
             elif head == 'head_just_space_plus' and not pattern.startswith(case9):
                 new_pattern = '{}{}'.format(case9, pattern)
-                cls._prepended_pattern = case9
+                context.prepended_pattern = case9
             elif head == 'head_just_spaces' and not pattern.startswith(case9):
                 new_pattern = '{}{}'.format(case9, pattern)
-                cls._prepended_pattern = case9
+                context.prepended_pattern = case9
             elif head == 'head_whitespace' and not pattern.startswith(case10):
                 new_pattern = '{}{}'.format(case10, pattern)
-                cls._prepended_pattern = case10
+                context.prepended_pattern = case10
             elif head == 'head_whitespace_plus' and not pattern.startswith(case11):
                 new_pattern = '{}{}'.format(case11, pattern)
-                cls._prepended_pattern = case11
+                context.prepended_pattern = case11
             elif head == 'head_whitespaces' and not pattern.startswith(case11):
                 new_pattern = '{}{}'.format(case11, pattern)
-                cls._prepended_pattern = case11
+                context.prepended_pattern = case11
             elif head == 'head_just_whitespace' and not pattern.startswith(case12):
                 new_pattern = '{}{}'.format(case12, pattern)
-                cls._prepended_pattern = case12
+                context.prepended_pattern = case12
             elif head == 'head_just_whitespace_plus' and not pattern.startswith(case13):
                 new_pattern = '{}{}'.format(case13, pattern)
-                cls._prepended_pattern = case13
+                context.prepended_pattern = case13
             elif head == 'head_just_whitespaces' and not pattern.startswith(case13):
                 new_pattern = '{}{}'.format(case13, pattern)
-                cls._prepended_pattern = case13
+                context.prepended_pattern = case13
             else:
                 new_pattern = pattern
             return new_pattern
         return pattern
 
     @classmethod
-    def add_tail_of_string(cls, pattern, tail=''):
+    def add_tail_of_string(cls, pattern, tail='', context=None):
         """append end of string i.e $ or \\s*$ or $\\s+$ or  *$ or  +$ regex pattern
 
         Parameters
         ----------
         pattern (str): a pattern
         tail (str): end of string case.  Default is empty.
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
         str: new pattern with end of string pattern
         """
+        context = context or PatternContext()
         if tail:
             case1, case2 = r'\s*$', r'\s+$'
             case3, case4 = r' *$', r' +$'
@@ -1482,55 +2030,55 @@ class ElementPattern(str):
 
             if tail == 'tail_ws' and not pattern.endswith(case1):
                 new_pattern = '{}{}'.format(pattern, case1)
-                cls._appended_pattern = case1
+                context.appended_pattern = case1
             elif tail == 'tail_ws_plus' and not pattern.endswith(case2):
                 new_pattern = '{}{}'.format(pattern, case2)
-                cls._appended_pattern = case2
+                context.appended_pattern = case2
             elif tail == 'tail_space' and not pattern.endswith(case3):
                 new_pattern = '{}{}'.format(pattern, case3)
-                cls._appended_pattern = case3
+                context.appended_pattern = case3
             elif tail == 'tail_space_plus' and not pattern.endswith(case4):
                 new_pattern = '{}{}'.format(pattern, case4)
-                cls._appended_pattern = case4
+                context.appended_pattern = case4
             elif tail == 'tail_spaces' and not pattern.endswith(case4):
                 new_pattern = '{}{}'.format(pattern, case4)
-                cls._appended_pattern = case4
+                context.appended_pattern = case4
             elif tail == 'tail' and not pattern.endswith(case5):
                 new_pattern = '{}{}'.format(pattern, case5)
-                cls._appended_pattern = case5
+                context.appended_pattern = case5
             elif tail == 'tail_just_ws' and not pattern.startswith(case6):
                 new_pattern = '{}{}'.format(pattern, case6)
-                cls._appended_pattern = case6
+                context.appended_pattern = case6
             elif tail == 'tail_just_ws_plus' and not pattern.startswith(case7):
                 new_pattern = '{}{}'.format(pattern, case7)
-                cls._appended_pattern = case7
+                context.appended_pattern = case7
             elif tail == 'tail_just_space' and not pattern.startswith(case8):
                 new_pattern = '{}{}'.format(pattern, case8)
-                cls._appended_pattern = case8
+                context.appended_pattern = case8
             elif tail == 'tail_just_space_plus' and not pattern.startswith(case9):
                 new_pattern = '{}{}'.format(pattern, case9)
-                cls._appended_pattern = case9
+                context.appended_pattern = case9
             elif tail == 'tail_just_spaces' and not pattern.startswith(case9):
                 new_pattern = '{}{}'.format(pattern, case9)
-                cls._appended_pattern = case9
+                context.appended_pattern = case9
             elif tail == 'tail_whitespace' and not pattern.startswith(case10):
                 new_pattern = '{}{}'.format(pattern, case10)
-                cls._appended_pattern = case10
+                context.appended_pattern = case10
             elif tail == 'tail_whitespace_plus' and not pattern.startswith(case11):
                 new_pattern = '{}{}'.format(pattern, case11)
-                cls._appended_pattern = case11
+                context.appended_pattern = case11
             elif tail == 'tail_whitespaces' and not pattern.startswith(case11):
                 new_pattern = '{}{}'.format(pattern, case11)
-                cls._appended_pattern = case11
+                context.appended_pattern = case11
             elif tail == 'tail_just_whitespace' and not pattern.startswith(case12):
                 new_pattern = '{}{}'.format(pattern, case12)
-                cls._appended_pattern = case12
+                context.appended_pattern = case12
             elif tail == 'tail_just_whitespace_plus' and not pattern.startswith(case13):
                 new_pattern = '{}{}'.format(pattern, case13)
-                cls._appended_pattern = case13
+                context.appended_pattern = case13
             elif tail == 'tail_just_whitespaces' and not pattern.startswith(case13):
                 new_pattern = '{}{}'.format(pattern, case13)
-                cls._appended_pattern = case13
+                context.appended_pattern = case13
             else:
                 new_pattern = pattern
             return new_pattern
@@ -1716,10 +2264,12 @@ class LinePattern(str):
 
     Attributes:
     variables (list): a list of pattern variable
-    items (list): a list of sub-pattern
+    nodes (list): a list of IR nodes, i.e. literal, whitespace, element,
+            anchor, or flag node.
 
     Properties
     ----------
+    items (list): a list of sub-pattern
     statement (str): a template statement
 
     Parameters
@@ -1734,35 +2284,43 @@ class LinePattern(str):
 
     Methods
     -------
-    LinePattern.get_pattern(text) -> str
-    LinePattern.readjust_if_or_empty(lst) -> None
-    LinePattern.ensure_start_of_line_pattern(lst) -> None
-    LinePattern.ensure_end_of_line_pattern(lst) -> None
-    LinePattern.prepend_whitespace(lst) -> None
-    LinePattern.prepend_ignorecase_flag(lst) -> None
-    LinePattern.append_whitespace(lst) -> None
+    LinePattern.get_pattern(text, context=None) -> str
+    LinePattern.get_nodes(line, context=None) -> list
+    LinePattern.get_text_node(text) -> TextNode
+    LinePattern.strip_text_node(node, is_left=True) -> TextNode
+    LinePattern.readjust_if_or_empty(nodes) -> None
+    LinePattern.ensure_start_of_line_pattern(nodes) -> None
+    LinePattern.ensure_end_of_line_pattern(nodes) -> None
+    LinePattern.prepend_whitespace(nodes) -> None
+    LinePattern.prepend_ignorecase_flag(nodes) -> None
+    LinePattern.append_whitespace(nodes) -> None
 
     Raises
     ------
     LinePatternError: raise an exception if pattern is invalid.
 
     """
-
-    _variables = None
+    # memo of text patterns, keyed by text
+    memo_maxsize = 4096
+    _text_memo = dict()
+    _text_memo_lock = RLock()
 
     def __new__(cls, text, prepended_ws=False, appended_ws=False,
                 ignore_case=False):
-        cls._variables = list()
-        cls._items = list()
+        context = PatternContext()
         data = str(text)
         if data:
             pattern = cls.get_pattern(
                 data, prepended_ws=prepended_ws,
-                appended_ws=appended_ws, ignore_case=ignore_case
+                appended_ws=appended_ws, ignore_case=ignore_case,
+                context=context
             )
         else:
             pattern = r'^\s*$'
-        return str.__new__(cls, pattern)
+        instance = str.__new__(cls, pattern)
+        instance.variables = context.variables
+        instance.nodes = context.nodes
+        return instance
 
     def __init__(self, text,
                  prepended_ws=False, appended_ws=False,
@@ -1772,30 +2330,21 @@ class LinePattern(str):
         self.appended_ws = appended_ws
         self.ignore_case = ignore_case
 
-        self.variables = self._variables
-        self.items = self._items
+    def __reduce__(self):
+        return rebuild_pattern, (self.__class__, str(self)), self.__dict__
 
-        # clear class variable after initialization
-        self._variables = list()
-        self._items = list()
+    @property
+    def items(self):
+        return [node.pattern for node in self.nodes]
 
     @property
     def statement(self):
-        lst = []
-        for item in self.items:
-            if isinstance(item, ElementPattern):
-                if not item.variable.is_empty:
-                    lst.append(item.variable.var_name)
-                else:
-                    lst.append(item)
-            else:
-                lst.append(item)
-        return ''.join(lst)
+        return ''.join(node.statement for node in self.nodes)
 
     @classmethod
     def get_pattern(cls, text,
                     prepended_ws=False, appended_ws=False,
-                    ignore_case=False):
+                    ignore_case=False, context=None):
         """convert text to regex pattern
 
         Parameters
@@ -1807,6 +2356,7 @@ class LinePattern(str):
                 Default is False.
         ignore_case (bool): prepend (?i) at the beginning of a pattern.
                 Default is False.
+        context (PatternContext): a build context.  Default is None.
 
         Returns
         -------
@@ -1816,231 +2366,293 @@ class LinePattern(str):
         ------
         LinePatternError: raise an exception if pattern is invalid.
         """
+        context = context or PatternContext()
         line = str(text)
 
-        lst = []
+        nodes = cls.get_nodes(line, context=context)
+        if len(nodes) == 1:
+            node = nodes[0]
+            value = node.text if isinstance(node, TextNode) else node.pattern
+            if value.strip() == '':
+                return r'^\s*$'
+        elif not nodes:
+            if line.strip() == '':
+                return r'^\s*$'
+            nodes.append(cls.get_text_node(line))
+
+        cls.readjust_if_or_empty(nodes)
+        cls.ensure_start_of_line_pattern(nodes)
+        cls.ensure_end_of_line_pattern(nodes)
+        prepended_ws and cls.prepend_whitespace(nodes)
+        ignore_case and cls.prepend_ignorecase_flag(nodes)
+        appended_ws and cls.append_whitespace(nodes)
+        context.nodes = nodes
+        pattern = emit(nodes)
+        validate_pattern(pattern, exception_cls=LinePatternError)
+        return pattern
+
+    @classmethod
+    def get_nodes(cls, line, context=None):
+        """split a line text to a list of text and element nodes
+
+        Parameters
+        ----------
+        line (str): a line text.
+        context (PatternContext): a build context.  Default is None.
+
+        Returns
+        -------
+        list: a list of IR nodes.
+        """
+        context = context or PatternContext()
+        nodes = []
         start = 0
         m = None
         for m in re.finditer(r'\w+[(][^)]*[)]', line):
             pre_match = m.string[start:m.start()]
             if pre_match:
-                lst.append(TextPattern(pre_match))
+                nodes.append(cls.get_text_node(pre_match))
             elm_pat = ElementPattern(m.group())
             if not elm_pat.variable.is_empty:
-                cls._variables.append(elm_pat.variable)
-            lst.append(elm_pat)
+                context.variables.append(elm_pat.variable)
+            nodes.append(ElementNode.from_pattern(elm_pat))
             start = m.end()
         else:
             if m and start:
                 after_match = m.string[start:]
                 if after_match:
-                    lst.append(TextPattern(after_match))
+                    nodes.append(cls.get_text_node(after_match))
+        return nodes
 
-        if len(lst) == 1 and lst[0].strip() == '':
-            return r'^\s*$'
-        elif not lst:
-            if line.strip() == '':
-                return r'^\s*$'
-            lst.append(TextPattern(line))
-
-        cls.readjust_if_or_empty(lst)
-        cls.ensure_start_of_line_pattern(lst)
-        cls.ensure_end_of_line_pattern(lst)
-        prepended_ws and cls.prepend_whitespace(lst)
-        ignore_case and cls.prepend_ignorecase_flag(lst)
-        appended_ws and cls.append_whitespace(lst)
-        cls._items = lst
-        pattern = ''.join(lst)
-        validate_pattern(pattern, exception_cls=LinePatternError)
-        return pattern
+    @classmethod
+    def get_text_node(cls, text):
+        """convert a text to a text node
+
+        Parameters
+        ----------
+        text (str): a text.
+
+        Returns
+        -------
+        TextNode: a whitespace or literal node.
+        """
+        with cls._text_memo_lock:
+            pattern = cls._text_memo.get(text)
+            if pattern is None:
+                pattern = TextPattern.get_pattern(text)
+                if len(cls._text_memo) >= cls.memo_maxsize:
+                    cls._text_memo.pop(next(iter(cls._text_memo)))
+                cls._text_memo[text] = pattern
+        return TextNode.create(pattern, text=text)
+
+    @classmethod
+    def strip_text_node(cls, node, is_left=True):
+        """strip leading or trailing whitespace of a text node
+
+        Parameters
+        ----------
+        node (TextNode): a text node.
+        is_left (bool): strip leading whitespace, otherwise, trailing
+                whitespace.  Default is True.
+
+        Returns
+        -------
+        TextNode: a new text node.
+        """
+        if not node.is_derived:
+            value = node.pattern.lstrip() if is_left else node.pattern.rstrip()
+            return TextNode.create(value)
+
+        text = node.text.lstrip() if is_left else node.text.rstrip()
+        return cls.get_text_node(text)
 
     @classmethod
-    def readjust_if_or_empty(cls, lst):
-        """readjust pattern if ElementPattern has or_empty flag
+    def readjust_if_or_empty(cls, nodes):
+        """readjust pattern if element node has or_empty flag
+
+        A node which precedes or follows an or_empty element is rewritten
+        to a plain text node, and it is no longer treated as an element.
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if len(lst) < 2:
+        if len(nodes) < 2:
             return
 
-        total = len(lst)
+        total = len(nodes)
 
         ws_pat = r'\s*'
-        for index, item in enumerate(lst[1:], 1):
-            prev_item = lst[index-1]
-            is_prev_item_text_pat = isinstance(prev_item, (TextPattern, str))
-            is_item_elm_pat = isinstance(item, ElementPattern)
-            if is_prev_item_text_pat and is_item_elm_pat:
-                if item.or_empty:
-                    if prev_item.endswith(' '):
-                        lst[index-1] = prev_item.rstrip() + ws_pat
-                    elif prev_item.endswith(r'\s'):
-                        lst[index-1] = prev_item + '*'
-                    elif index == total - 1:
-                        if prev_item.endswith(' +'):
-                            lst[index-1] = prev_item[:-2] + ws_pat
-                        elif prev_item.endswith(r'\s+'):
-                            lst[index-1] = prev_item[:-3] + ws_pat
-
-        index = len(lst) - 1
-        is_stopped = False
-        while index > 0 and not is_stopped:
-            prev_item, item = lst[index-1], lst[index]
-            is_prev_item_text_pat = isinstance(prev_item, (TextPattern, str))
-            is_item_elm_pat = isinstance(item, ElementPattern)
-            if is_prev_item_text_pat and is_item_elm_pat:
-                if item.or_empty:
-                    if prev_item.endswith(' '):
-                        lst[index - 1] = prev_item.rstrip() + ws_pat
-                    elif prev_item.endswith(r'\s'):
-                        lst[index - 1] = prev_item + '*'
-                    elif prev_item.endswith(' +'):
-                        lst[index - 1] = prev_item[:-2] + ws_pat
-                    elif prev_item.endswith(r'\s+'):
-                        lst[index - 1] = prev_item[:-3] + ws_pat
-            else:
-                is_stopped = True
+
+        def append(node, suffix, is_stripped=False):
+            if isinstance(node, TextNode) and node.is_derived:
+                if is_stripped:
+                    node = cls.strip_text_node(node, is_left=False)
+                pattern = node.pattern + suffix
+                return TextNode.create(pattern, text=pattern)
+            pattern = node.pattern.rstrip() if is_stripped else node.pattern
+            return TextNode.create(pattern + suffix)
+
+        def replace(node, size):
+            return TextNode.create(node.pattern[:-size] + ws_pat)
+
+        def readjust(index, is_replaced=True):
+            prev_item = nodes[index-1]
+            prev_pat = prev_item.pattern
+            if prev_pat.endswith(' '):
+                nodes[index-1] = append(prev_item, ws_pat, is_stripped=True)
+            elif prev_pat.endswith(r'\s'):
+                nodes[index-1] = append(prev_item, '*')
+            elif is_replaced:
+                if prev_pat.endswith(' +'):
+                    nodes[index-1] = replace(prev_item, 2)
+                elif prev_pat.endswith(r'\s+'):
+                    nodes[index-1] = replace(prev_item, 3)
+
+        for index in range(1, total):
+            item = nodes[index]
+            if isinstance(item, ElementNode) and item.or_empty:
+                readjust(index, is_replaced=index == total - 1)
+
+        index = len(nodes) - 1
+        while index > 0 and isinstance(nodes[index], ElementNode):
+            nodes[index].or_empty and readjust(index)
             index -= 2
 
-        index = len(lst) - 1
-        is_stopped = False
+        index = len(nodes) - 1
         is_prev_containing_empty = False
-        while index > 0 and not is_stopped:
-            prev_item, item = lst[index-1], lst[index]
-            is_prev_item_elm_pat = isinstance(prev_item, ElementPattern)
-            is_item_text_pat = isinstance(item, (TextPattern, str))
-            if is_prev_item_elm_pat and is_item_text_pat:
-                if prev_item.or_empty:
-                    if item in [' ', ' +', r'\s', r'\s+']:
-                        lst[index] = ws_pat
-                    is_prev_containing_empty = True
-                else:
-                    if item in [' ', ' +', r'\s', r'\s+'] and is_prev_containing_empty:
-                        lst[index] = ws_pat
-                    is_prev_containing_empty = False
+        while index > 0 and isinstance(nodes[index-1], ElementNode):
+            prev_item, item = nodes[index-1], nodes[index]
+            is_ws = item.pattern in [' ', ' +', r'\s', r'\s+']
+            if prev_item.or_empty:
+                if is_ws:
+                    nodes[index] = TextNode.create(ws_pat)
+                is_prev_containing_empty = True
             else:
-                is_stopped = True
+                if is_ws and is_prev_containing_empty:
+                    nodes[index] = TextNode.create(ws_pat)
+                is_prev_containing_empty = False
             index -= 2
 
     @classmethod
-    def ensure_start_of_line_pattern(cls, lst):
+    def ensure_start_of_line_pattern(cls, nodes):
         """Ensure a start pattern does not contain duplicate whitespace
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if len(lst) < 2:
+        if len(nodes) < 2:
             return
 
-        curr, nxt = lst[0], lst[1]
+        curr, nxt = nodes[0], nodes[1]
+        is_nxt_text = isinstance(nxt, TextNode) and nxt.is_derived
 
-        if curr == '^':
-            if isinstance(nxt, TextPattern):
-                if nxt == ' ':
-                    lst.pop(1)
+        if curr.pattern == '^':
+            if is_nxt_text:
+                if nxt.pattern == ' ':
+                    nodes.pop(1)
                     return
-                if re.match(' [^+*]', nxt):
-                    lst[1] = nxt.lstrip()
+                if re.match(' [^+*]', nxt.pattern):
+                    nodes[1] = cls.strip_text_node(nxt, is_left=True)
                     return
 
-        match = re.match(r'(?P<pre_ws>( |\\s)[*+]*)', nxt)
-        if re.match(r'(\^|\\A)( |\\s)[*+]*$', curr):
-            if isinstance(nxt, TextPattern) and match:
+        match = re.match(r'(?P<pre_ws>( |\\s)[*+]*)', nxt.pattern)
+        if re.match(r'(\^|\\A)( |\\s)[*+]*$', curr.pattern):
+            if is_nxt_text and match:
                 index = len(match.group('pre_ws'))
-                new_val = nxt[index:]
+                new_val = nxt.pattern[index:]
                 if new_val == '':
-                    lst.pop(1)
+                    nodes.pop(1)
                 else:
-                    lst[1] = new_val
+                    nodes[1] = TextNode.create(new_val)
 
         # clean up any invalid a start of string pattern
-        for index, node in enumerate(lst[1:], 1):
-            if isinstance(node, ElementPattern) and node.prepended_pattern:
-                lst[index] = node.remove_head_of_string()
+        for node in nodes[1:]:
+            if isinstance(node, ElementNode) and node.prepended_pattern:
+                node.remove_head_of_string()
 
     @classmethod
-    def ensure_end_of_line_pattern(cls, lst):
+    def ensure_end_of_line_pattern(cls, nodes):
         """Ensure an end pattern does not contain duplicate whitespace
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if len(lst) < 2:
+        if len(nodes) < 2:
             return
 
-        last, prev = lst[-1], lst[-2]
+        last, prev = nodes[-1], nodes[-2]
+        is_prev_text = isinstance(prev, TextNode) and prev.is_derived
 
-        if last == '$':
-            if isinstance(prev, TextPattern):
-                if prev == ' ':
-                    lst.pop(-2)
+        if last.pattern == '$':
+            if is_prev_text:
+                if prev.pattern == ' ':
+                    nodes.pop(-2)
                     return
-                if not re.search(' [+*]$', prev):
-                    lst[-2] = prev.rstrip()
+                if not re.search(' [+*]$', prev.pattern):
+                    nodes[-2] = cls.strip_text_node(prev, is_left=False)
                     return
 
-        match = re.search(r'(?P<post_ws>( |\\s)[*+]*)$', prev)
-        if re.match(r'( |\\s)[*+]?(\$|\\Z)$', last):
-            if isinstance(prev, TextPattern) and match:
+        match = re.search(r'(?P<post_ws>( |\\s)[*+]*)$', prev.pattern)
+        if re.match(r'( |\\s)[*+]?(\$|\\Z)$', last.pattern):
+            if is_prev_text and match:
                 index = len(match.group('post_ws'))
-                new_val = prev[:-index]
+                new_val = prev.pattern[:-index]
                 if new_val == '':
-                    lst.pop(-2)
+                    nodes.pop(-2)
                 else:
-                    lst[-2] = new_val
+                    nodes[-2] = TextNode.create(new_val)
 
         # clean up any invalid a start of string pattern
-        for index, node in enumerate(lst[:-1]):
-            if isinstance(node, ElementPattern) and node.appended_pattern:
-                lst[index] = node.remove_tail_of_string()
+        for node in nodes[:-1]:
+            if isinstance(node, ElementNode) and node.appended_pattern:
+                node.remove_tail_of_string()
 
     @classmethod
-    def prepend_whitespace(cls, lst):
-        """prepend whitespace pattern to list
+    def prepend_whitespace(cls, nodes):
+        """prepend whitespace pattern to list of nodes
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if not lst:
+        if not nodes:
             return
 
         pat = r'(\^|\\A)( |\\s)[*+]?'
-        if not re.match(pat, lst[0]):
-            lst.insert(0, r'^\s*')
+        if not re.match(pat, nodes[0].pattern):
+            nodes.insert(0, AnchorNode(r'^\s*'))
 
     @classmethod
-    def prepend_ignorecase_flag(cls, lst):
-        """prepend regex ignorecase flag, i.e. (?i) to list
+    def prepend_ignorecase_flag(cls, nodes):
+        """prepend regex ignorecase flag, i.e. (?i) to list of nodes
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if not lst:
+        if not nodes:
             return
 
         pat = r'[(][?]i[)]'
-        if not re.match(pat, lst[0]):
-            lst.insert(0, '(?i)')
+        if not re.match(pat, nodes[0].pattern):
+            nodes.insert(0, FlagNode('(?i)'))
 
     @classmethod
-    def append_whitespace(cls, lst):
-        """append whitespace pattern to list
+    def append_whitespace(cls, nodes):
+        """append whitespace pattern to list of nodes
 
         Parameters
         ----------
-        lst (list): a list of pattern
+        nodes (list): a list of IR nodes
         """
-        if not lst:
+        if not nodes:
             return
         pat = r'( |\\s)[*+]?(\$|\\Z)$'
-        if not re.search(pat, lst[-1]):
-            lst.append(r'\s*$')
+        if not re.search(pat, nodes[-1].pattern):
+            nodes.append(AnchorNode(r'\s*$'))
 
 
 class MultilinePattern(str):
@@ -2052,6 +2664,16 @@ class MultilinePattern(str):
     ignore_case (bool): prepend (?i) at the beginning of a pattern.
             Default is False.
 
+    Attributes
+    ----------
+    line_patterns (list): a list of LinePattern of every line.
+
+    Methods
+    -------
+    MultilinePattern.from_line_patterns(line_patterns) -> MultilinePattern
+    MultilinePattern.get_pattern(lines, ignore_case=False) -> str
+    MultilinePattern.join_line_patterns(line_patterns) -> str
+    MultilinePattern.reformat(pattern, is_first=False, is_last=False) -> str
     """
     def __new__(cls, text, ignore_case=False):
 
@@ -2065,11 +2687,28 @@ class MultilinePattern(str):
             'text argument must be string or list of string'
             raise MultilinePatternError(text)
 
-        if lines:
-            pattern = cls.get_pattern(lines, ignore_case=ignore_case)
-        else:
-            pattern = r'^\s*$'
-        return str.__new__(cls, pattern)
+        line_patterns = [LinePattern(line, ignore_case=ignore_case) for line in lines]
+        return cls.from_line_patterns(line_patterns)
+
+    @classmethod
+    def from_line_patterns(cls, line_patterns):
+        """create a multiline pattern from built line patterns, e.g. line
+        patterns which are loaded from a build cache
+
+        Parameters
+        ----------
+        line_patterns (list): a list of LinePattern.
+
+        Returns
+        -------
+        MultilinePattern: a multiline pattern.
+        """
+        instance = str.__new__(cls, cls.join_line_patterns(line_patterns))
+        instance.line_patterns = list(line_patterns)
+        return instance
+
+    def __reduce__(self):
+        return rebuild_pattern, (self.__class__, str(self)), self.__dict__
 
     @classmethod
     def get_pattern(cls, lines, ignore_case=False):
@@ -2087,16 +2726,29 @@ class MultilinePattern(str):
 
         """
 
-        if not lines:
-            return r'^\s*$'
-
         line_patterns = []
         for line in lines:
             line_pat = LinePattern(line, ignore_case=ignore_case)
             line_patterns.append(line_pat)
 
+        return cls.join_line_patterns(line_patterns)
+
+    @classmethod
+    def join_line_patterns(cls, line_patterns):
+        """glue line patterns to a regex pattern which matches them in order
+
+        Parameters
+        ----------
+        line_patterns (list): a list of LinePattern.
+
+        Returns
+        -------
+        str: a regex pattern.
+        """
+        if not line_patterns:
+            return r'^\s*$'
+
         first, last = line_patterns[0], line_patterns[-1]
-        last = line_patterns[-1]
 
         if len(line_patterns) == 1:
             return first
@@ -2186,6 +2838,9 @@ class PatternBuilder(str):
         validate_pattern(pattern, exception_cls=PatternBuilderError)
         return str.__new__(cls, pattern)
 
+    def __reduce__(self):
+        return rebuild_pattern, (self.__class__, str(self)), self.__dict__
+
     @classmethod
     def get_pattern(cls, text):
         """convert text to regex pattern
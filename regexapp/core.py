@@ -1,17 +1,27 @@
+import os
 import re
+import mmap
+from array import array
+from pathlib import PurePath
 from datetime import datetime
+from regexapp import ElementPattern
 from regexapp import LinePattern
 from regexapp import MultilinePattern
 from regexapp.exceptions import RegexBuilderError
 from regexapp.exceptions import PatternReferenceError
 from regexapp.collection import REF
+from regexapp.analyzer import PatternAnalyzer
+from regexapp.matcher import CombinedMatcher
+from regexapp.matcher import MultilineMatcher
+from regexapp.matcher import PrefilterIndex
 import regexapp
-from copy import copy, deepcopy
+from copy import copy
 from collections import OrderedDict
 from textwrap import indent
 from textwrap import dedent
-
-BASELINE_REF = deepcopy(REF)
+from threading import RLock
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
 
 def is_pro_edition():
@@ -120,6 +130,332 @@ def save_file(filename, content):
             stream.write(content)
 
 
+def build_patterns(lst_of_user_data, is_line=False, prepended_ws=False,
+                   appended_ws=False, ignore_case=False, references=None):
+    """build a list of patterns from a list of user data
+
+    Parameters
+    ----------
+    lst_of_user_data (list): a list of user data.
+    is_line (bool): a flag to use LinePattern.  Default is False.
+    prepended_ws (bool): prepend a whitespace at the beginning of a pattern.
+            Default is False.
+    appended_ws (bool): append a whitespace at the end of a pattern.
+            Default is False.
+    ignore_case (bool): prepend (?i) at the beginning of a pattern.
+            Default is False.
+    references (dict): inline references which need to be synchronized
+            before building, e.g. in a worker process.  Default is None.
+
+    Returns
+    -------
+    list: a list of LinePattern or MultilinePattern in the same order as user data.
+    """
+    references is not None and sync_inline_references(references)
+    patterns = []
+    for user_data in lst_of_user_data:
+        if is_line:
+            pattern = LinePattern(
+                user_data,
+                prepended_ws=prepended_ws,
+                appended_ws=appended_ws,
+                ignore_case=ignore_case
+            )
+        else:
+            pattern = MultilinePattern(user_data, ignore_case=ignore_case)
+        patterns.append(pattern)
+    return patterns
+
+
+def build_patterns_in_parallel(lst_of_user_data, executor=None, workers=None,
+                               **kwargs):
+    """build a list of patterns by splitting user data to chunks and
+    building these chunks over a pool of workers
+
+    Parameters
+    ----------
+    lst_of_user_data (list): a list of user data.
+    executor (concurrent.futures.Executor): an executor.  Default is None.
+            ProcessPoolExecutor will be created if executor is not provided.
+    workers (int): total number of workers.  Default is None.
+    kwargs (dict): keyword arguments for build_patterns.
+
+    Returns
+    -------
+    list: a list of LinePattern or MultilinePattern in the same order as user data.
+    """
+    is_own_executor = executor is None
+    if is_own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers or None)
+
+    if not isinstance(executor, ThreadPoolExecutor):
+        # a worker process does not share inline references with this process
+        kwargs.update(references=get_inline_references())
+
+    total_workers = workers or os.cpu_count() or 1
+    size = max(len(lst_of_user_data) // (total_workers * 4), 1)
+    chunks = [
+        lst_of_user_data[index:index + size]
+        for index in range(0, len(lst_of_user_data), size)
+    ]
+
+    try:
+        futures = [executor.submit(build_patterns, chunk, **kwargs) for chunk in chunks]
+        patterns = []
+        for future in futures:
+            patterns.extend(future.result())
+        return patterns
+    finally:
+        is_own_executor and executor.shutdown()
+
+
+def get_inline_references():
+    """return references which are added or changed by add_reference
+
+    Returns
+    -------
+    dict: a dictionary of inline references.
+    """
+    return REF.snapshot()
+
+
+def sync_inline_references(references):
+    """synchronize inline references of PatternReference, e.g. in worker process
+
+    Parameters
+    ----------
+    references (dict): inline references which is returned by get_inline_references.
+    """
+    REF.restore(references)
+
+
+class PatternCache:
+    """Use to store compiled regex patterns with LRU eviction
+
+    Attributes
+    ----------
+    maxsize (int): maximum number of compiled patterns.  Default is 1024.
+    hits (int): total number of lookups that found a compiled pattern.
+    misses (int): total number of lookups that needed a compilation.
+
+    Methods
+    -------
+    compile(pattern, flags=0) -> re.Pattern
+    search(pattern, string, flags=0) -> re.Match
+    clear() -> None
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = max(int(maxsize), 1)
+        self.hits = 0
+        self.misses = 0
+        self._table = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, item):
+        pattern, flags = item if isinstance(item, tuple) else (item, 0)
+        return (str(pattern), flags) in self._table
+
+    def compile(self, pattern, flags=0):
+        """return a compiled pattern from cache or compile a new one
+
+        Parameters
+        ----------
+        pattern (str): a regex pattern.
+        flags (int): regex flags.  Default is 0.
+
+        Returns
+        -------
+        re.Pattern: a compiled regex pattern.
+        """
+        key = (str(pattern), flags)
+        with self._lock:
+            compiled_pattern = self._table.get(key)
+            if compiled_pattern is not None:
+                self.hits += 1
+                self._table.move_to_end(key)
+                return compiled_pattern
+
+            self.misses += 1
+            compiled_pattern = re.compile(key[0], flags=flags)
+            self._table[key] = compiled_pattern
+            if len(self._table) > self.maxsize:
+                self._table.popitem(last=False)
+            return compiled_pattern
+
+    def search(self, pattern, string, flags=0):
+        """scan through string looking for a match to the cached pattern
+
+        Parameters
+        ----------
+        pattern (str): a regex pattern.
+        string (str): a data.
+        flags (int): regex flags.  Default is 0.
+
+        Returns
+        -------
+        re.Match: a match object or None.
+        """
+        return self.compile(pattern, flags=flags).search(string)
+
+    def clear(self):
+        """remove all compiled patterns and reset counters"""
+        with self._lock:
+            self._table.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class StreamTestResult:
+    """Use to hold a constant-size summary of a streaming test
+
+    Attributes
+    ----------
+    patterns (list): a list of patterns.
+    sample_size (int): maximum number of kept samples per pattern.  Default is 5.
+    total_lines (int): total number of tested lines.
+    counters (list): total number of matched lines per pattern.
+    samples (list): a bounded list of (line number, groupdict or matched text)
+            per pattern.
+
+    Properties
+    ----------
+    test_result -> bool
+
+    Methods
+    -------
+    add(line_number, index, match) -> None
+    get_report() -> str
+    """
+    def __init__(self, patterns, sample_size=5):
+        self.patterns = patterns
+        self.sample_size = sample_size
+        self.total_lines = 0
+        self.counters = [0 for _ in patterns]
+        self.samples = [[] for _ in patterns]
+
+    @property
+    def test_result(self):
+        return bool(self.counters) and all(self.counters)
+
+    def add(self, line_number, index, match):
+        """count a match and keep it as a sample if there is room
+
+        Parameters
+        ----------
+        line_number (int): a line number of test data.
+        index (int): an index of matched pattern.
+        match (re.Match): a match object.
+        """
+        self.counters[index] += 1
+        samples = self.samples[index]
+        if len(samples) < self.sample_size:
+            samples.append((line_number, match.groupdict() or match.group()))
+
+    def get_report(self):
+        """return a test report without echoing test data
+
+        Returns
+        -------
+        str: a test report.
+        """
+        result = ['Tested Lines: {}'.format(self.total_lines), '']
+        result += ['Matched Result:', '-' * 14]
+        for pat, counter, samples in zip(self.patterns, self.counters, self.samples):
+            result.append('pattern: {}'.format(pat))
+            result.append('matched: {}'.format(counter or 'NO'))
+            for line_number, sample in samples:
+                result.append('  line {}: {}'.format(line_number, sample))
+            result.append('-' * 10)
+        return '\n'.join(result)
+
+
+def read_lines(data, use_mmap=False, encoding='utf-8'):
+    """lazily read lines from a file or an iterable of lines
+
+    Parameters
+    ----------
+    data (str, PurePath, iterable): a file path or an iterable of lines.
+    use_mmap (bool): read file via memory-map.  Default is False.
+    encoding (str): a file encoding.  Default is utf-8.
+
+    Returns
+    -------
+    generator: yield lines without line ending.
+    """
+    if isinstance(data, (str, PurePath)):
+        if use_mmap:
+            with open(data, 'rb') as stream:
+                if os.fstat(stream.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for line in iter(mm.readline, b''):
+                        yield line.decode(encoding, errors='replace').rstrip('\r\n')
+        else:
+            with open(data, encoding=encoding, errors='replace') as stream:
+                for line in stream:
+                    yield line.rstrip('\r\n')
+    else:
+        for line in data:
+            if isinstance(line, bytes):
+                line = line.decode(encoding, errors='replace')
+            yield str(line).rstrip('\r\n')
+
+
+def get_columns(records):
+    """convert parsed records to columns
+
+    Parameters
+    ----------
+    records (iterable): parsed records which are dicts of line_number,
+            index, and matched variables.
+
+    Returns
+    -------
+    dict: a dictionary of columns.  line_number and index columns are
+            arrays of integers and a variable column is a list of values
+            where None is filled for records without that variable.
+    """
+    line_numbers, indexes = array('q'), array('q')
+    columns = dict(line_number=line_numbers, index=indexes)
+    variable_columns = []
+    total = 0
+    for record in records:
+        line_numbers.append(record['line_number'])
+        indexes.append(record['index'])
+        for name in record:
+            if name not in columns:
+                columns[name] = [None] * total
+                variable_columns.append((name, columns[name]))
+        for name, column in variable_columns:
+            column.append(record.get(name))
+        total += 1
+    return columns
+
+
+def get_variables(pattern):
+    """return variables of a line pattern or a multiline pattern
+
+    Parameters
+    ----------
+    pattern (LinePattern, MultilinePattern): a regex pattern.
+
+    Returns
+    -------
+    list: a list of dicts of name, pattern, and option of variables.
+    """
+    line_patterns = getattr(pattern, 'line_patterns', [pattern])
+    variables = []
+    for line_pattern in line_patterns:
+        for variable in getattr(line_pattern, 'variables', []):
+            if not variable.is_empty:
+                variables.append(dict(name=variable.name, pattern=variable.pattern,
+                                      option=variable.option))
+    return variables
+
+
 class RegexBuilder:
     """Use for building regex pattern
 
@@ -166,12 +502,27 @@ class RegexBuilder:
     pattern_user_data_table (OrderedDict): a variable holds (pattern, user_data) pair.
     test_data_pattern_table (OrderedDict): a variable holds (test_data, pattern) pair.
     pattern_test_data_table (OrderedDict): a variable holds (pattern, test_data) pair.
+    pattern_cache (PatternCache): a store of compiled patterns which is shared
+            by RegexBuilder instances.
+    stream_test_result (StreamTestResult): a summary of the last streaming test.
+    analysis_report (str): a report of backtracking analysis.
+    multiline_threshold (int): a minimum number of test data lines to match
+            multiline patterns line by line in linear time.  Default is 1000.
 
     Methods
     -------
     RegexBuilder.validate_data(data, name) -> bool
-    build() -> None
-    test(showed=True) -> bool
+    RegexBuilder.build_patterns(lst_of_user_data, executor=None, workers=None, **kwargs) -> list
+    build(executor=None, workers=None, cache=None) -> None
+    test(showed=True, engine='default') -> bool
+    get_lst_of_test_data() -> list
+    get_matched_result(lst_of_test_data, engine='default') -> list
+    test_stream(data, use_mmap=False, sample_size=5, encoding='utf-8') -> generator
+    parse(data, columnar=False) -> list or dict
+    parse_iter(stream, use_mmap=False, encoding='utf-8') -> generator
+    iter_records(tested=False, stream=None) -> generator
+    analyze(fuzzed=False, showed=False, max_size=4096, timeout=0.05) -> bool
+    bulk_search(lines) -> generator
     create_unittest() -> str
     create_pytest() -> str
     create_rf_test() -> str
@@ -181,6 +532,9 @@ class RegexBuilder:
     ------
     RegexBuilderError: if user_data or test_data is invalid format.
     """
+    pattern_cache = PatternCache()
+    multiline_threshold = 1000
+
     def __init__(self, user_data='', test_data='',
                  prepended_ws=False, appended_ws=False, ignore_case=False,
                  test_name='', is_line=False,
@@ -212,6 +566,8 @@ class RegexBuilder:
         self.pattern_user_data_table = OrderedDict()    # pattern via user data
         self.test_data_pattern_table = OrderedDict()    # test data via pattern
         self.pattern_test_data_table = OrderedDict()    # pattern via test data
+        self.stream_test_result = None
+        self.analysis_report = ''
 
     @classmethod
     def validate_data(cls, **kwargs):
@@ -248,8 +604,44 @@ class RegexBuilder:
             is_validated &= True if data else False
         return is_validated
 
-    def build(self):
-        """Build regex pattern"""
+    @classmethod
+    def build_patterns(cls, lst_of_user_data, executor=None, workers=None,
+                       **kwargs):
+        """build a list of patterns serially or in parallel
+
+        Parameters
+        ----------
+        lst_of_user_data (list): a list of user data.
+        executor (concurrent.futures.Executor): an executor.  Default is None.
+        workers (int): total number of worker processes.  Default is None.
+        kwargs (dict): keyword arguments for build_patterns.
+
+        Returns
+        -------
+        list: a list of LinePattern or MultilinePattern in the same order as user data.
+        """
+        if not lst_of_user_data:
+            return []
+
+        if executor or workers and workers > 1 and len(lst_of_user_data) > 1:
+            return build_patterns_in_parallel(
+                lst_of_user_data, executor=executor, workers=workers, **kwargs
+            )
+        return build_patterns(lst_of_user_data, **kwargs)
+
+    def build(self, executor=None, workers=None, cache=None):
+        """Build regex pattern
+
+        Parameters
+        ----------
+        executor (concurrent.futures.Executor): an executor which is used to
+                build chunks of user data in parallel.  Default is None.
+        workers (int): total number of worker processes if executor is not
+                provided.  Default is None, i.e. build serially.
+        cache (BuildCache): a build cache which keeps built patterns on
+                disk so that only changed user data are built.  A multiline
+                pattern is cached per line.  Default is None.
+        """
         data = self.user_data
         self.__class__.validate_data(user_data=data)
 
@@ -271,27 +663,68 @@ class RegexBuilder:
                     else:
                         lst_of_user_data.append(str(item))
 
-        for user_data in lst_of_user_data:
+        kwargs = dict(
+            is_line=self.is_line, prepended_ws=self.prepended_ws,
+            appended_ws=self.appended_ws, ignore_case=self.ignore_case
+        )
+        if cache is None:
+            patterns = self.build_patterns(
+                lst_of_user_data, executor=executor, workers=workers, **kwargs
+            )
+        else:
+            # a multiline pattern is cached per line pattern so that
+            # editing a line of a template only rebuilds that line
             if self.is_line:
-                pattern = LinePattern(
-                    user_data,
-                    prepended_ws=self.prepended_ws,
-                    appended_ws=self.appended_ws,
-                    ignore_case=self.ignore_case
-                )
+                lines, line_kwargs = lst_of_user_data, kwargs
             else:
-                pattern = MultilinePattern(user_data, ignore_case=self.ignore_case)
+                lines = [line for user_data in lst_of_user_data
+                         for line in user_data.splitlines()]
+                line_kwargs = dict(kwargs, is_line=True, prepended_ws=False,
+                                   appended_ws=False)
+
+            digest = REF.get_digest()
+            keys = [cache.get_key(line, digest=digest, **line_kwargs) for line in lines]
+            table = cache.load(keys)
+            missing = OrderedDict()
+            for key, line in zip(keys, lines):
+                key in table or missing.setdefault(key, line)
+
+            built_patterns = self.build_patterns(
+                list(missing.values()), executor=executor, workers=workers,
+                **line_kwargs
+            )
+            built_table = dict(zip(missing, built_patterns))
+            cache.save(built_table)
+            table.update(built_table)
+            line_patterns = [table[key] for key in keys]
 
+            if self.is_line:
+                patterns = line_patterns
+            else:
+                patterns, start = [], 0
+                for user_data in lst_of_user_data:
+                    stop = start + len(user_data.splitlines())
+                    pattern = MultilinePattern.from_line_patterns(line_patterns[start:stop])
+                    patterns.append(pattern)
+                    start = stop
+
+        for user_data, pattern in zip(lst_of_user_data, patterns):
             pattern not in self.patterns and self.patterns.append(pattern)
             self.user_data_pattern_table[user_data] = pattern
             self.pattern_user_data_table[pattern] = user_data
 
-    def test(self, showed=False):
+    def test(self, showed=False, engine='default'):
         """test regex pattern via test data.
 
         Parameters
         ----------
         showed (bool): show test report if set to True.  Default is False.
+        engine (str): a matching engine, i.e. default or combined.
+                combined engine merges line patterns into a single pattern
+                and scans every test line once.  Only a matched line is
+                searched by the other candidate patterns, and it falls back
+                to default engine if patterns can not be merged.
+                Default is default.
 
         Returns
         -------
@@ -305,33 +738,20 @@ class RegexBuilder:
             showed and print(self.test_report)
             return False
 
-        if self.is_line:
-            lst_of_test_data = data[:] if isinstance(data, (list, tuple)) else data.splitlines()
-        else:
-            if isinstance(data, str):
-                lst_of_test_data = [data]
-            else:
-                lst_of_test_data = []
-                for item in data:
-                    if isinstance(item, (list, tuple)):
-                        lst_of_test_data.append('\n'.join(map(str, item)))
-                    else:
-                        lst_of_test_data.append(str(item))
-
+        lst_of_test_data = self.get_lst_of_test_data()
         result = ['Test Data:', '-' * 9, '\n'.join(lst_of_test_data), '']
         result += ['Matched Result:', '-' * 14]
 
+        matched_result = self.get_matched_result(lst_of_test_data, engine=engine)
+
         test_result = True
-        for pat in self.patterns:
-            is_matched = False
+        for pat, matches in zip(self.patterns, matched_result):
+            is_matched = bool(matches)
             lst = []
-            for test_data in lst_of_test_data:
-                match = re.search(pat, test_data)
-                if match:
-                    is_matched = True
-                    match.groupdict() and lst.append(match.groupdict())
-                    self.test_data_pattern_table[test_data] = pat
-                    self.pattern_test_data_table[pat] = test_data
+            for test_data, groupdict in matches:
+                groupdict and lst.append(groupdict)
+                self.test_data_pattern_table[test_data] = pat
+                self.pattern_test_data_table[pat] = test_data
 
             test_result &= is_matched
             tr = 'NO' if not is_matched else lst if lst else 'YES'
@@ -345,6 +765,315 @@ class RegexBuilder:
 
         return test_result
 
+    def get_lst_of_test_data(self):
+        """return test data as a list of lines if is_line is True, otherwise,
+        a list of multiline test data
+
+        Returns
+        -------
+        list: a list of test data.
+        """
+        data = self.test_data
+        if self.is_line:
+            return data[:] if isinstance(data, (list, tuple)) else data.splitlines()
+
+        if isinstance(data, str):
+            return [data]
+
+        lst_of_test_data = []
+        for item in data:
+            if isinstance(item, (list, tuple)):
+                lst_of_test_data.append('\n'.join(map(str, item)))
+            else:
+                lst_of_test_data.append(str(item))
+        return lst_of_test_data
+
+    def get_matched_result(self, lst_of_test_data, engine='default'):
+        """match patterns against a list of test data
+
+        Parameters
+        ----------
+        lst_of_test_data (list): a list of test data.
+        engine (str): a matching engine, i.e. default or combined.
+                Default is default.  Multiline patterns are matched line by
+                line when test data reaches multiline_threshold lines.
+
+        Returns
+        -------
+        list: a list of (test_data, groupdict) pairs for every pattern.
+
+        Raises
+        ------
+        RegexBuilderError: if engine is unsupported.
+        """
+        if engine not in ('default', 'combined'):
+            fmt = '{!r} engine is unsupported.  Use default or combined.'
+            raise RegexBuilderError(fmt.format(engine))
+
+        matched_result = [[] for _ in self.patterns]
+
+        if engine == 'combined' and self.is_line:
+            matcher = CombinedMatcher(self.patterns, cache=self.pattern_cache)
+            if matcher.is_combined:
+                for test_data in lst_of_test_data:
+                    for index, groupdict in matcher.search_all(test_data):
+                        matched_result[index].append((test_data, groupdict))
+                return matched_result
+
+        prefilter = PrefilterIndex(self.patterns, cache=self.pattern_cache)
+        multiline_matchers = []
+        for test_data in lst_of_test_data:
+            if self.is_line or test_data.count('\n') < self.multiline_threshold:
+                for index, match in prefilter.search(test_data):
+                    matched_result[index].append((test_data, match.groupdict()))
+                continue
+
+            if not multiline_matchers:
+                multiline_matchers = [
+                    MultilineMatcher(pattern, cache=self.pattern_cache)
+                    for pattern in self.patterns
+                ]
+            for index in prefilter.get_candidates(test_data):
+                groupdict = multiline_matchers[index].search(test_data)
+                if groupdict is not None:
+                    matched_result[index].append((test_data, groupdict))
+        return matched_result
+
+    def test_stream(self, data, use_mmap=False, sample_size=5,
+                    encoding='utf-8'):
+        """test line patterns against a stream of test data.  Lines are read
+        lazily and only per-pattern counters and a bounded sample of matches
+        are kept so that memory stays constant regardless of input size.
+        test_result and test_report are updated after the stream is consumed.
+
+        Parameters
+        ----------
+        data (str, PurePath, iterable): a file path or an iterable of lines.
+        use_mmap (bool): read file via memory-map.  Default is False.
+        sample_size (int): maximum number of kept samples per pattern.
+                Default is 5.
+        encoding (str): a file encoding.  Default is utf-8.
+
+        Returns
+        -------
+        generator: yield a match record as a dict of line_number, index,
+                pattern, and groupdict.
+
+        Raises
+        ------
+        RegexBuilderError: if patterns are multiline patterns, i.e. is_line
+                is False, because they can not be matched line by line.
+        """
+        if not self.is_line:
+            fmt = ('CANT run streaming test with multiline patterns.  '
+                   'Use is_line=True or test().')
+            raise RegexBuilderError(fmt)
+
+        result = StreamTestResult(self.patterns, sample_size=sample_size)
+        self.stream_test_result = result
+        prefilter = PrefilterIndex(self.patterns, cache=self.pattern_cache)
+
+        for line_number, line in enumerate(read_lines(data, use_mmap, encoding), 1):
+            result.total_lines = line_number
+            for index, match in prefilter.search(line):
+                result.add(line_number, index, match)
+                yield dict(line_number=line_number, index=index,
+                           pattern=self.patterns[index],
+                           groupdict=match.groupdict())
+
+        self.test_result = result.test_result
+        self.test_report = result.get_report()
+
+    def parse(self, data, columnar=False):
+        """parse test data to structured records
+
+        Parameters
+        ----------
+        data (str, list): a text or a list of lines.
+        columnar (bool): return columns instead of records.  Default is False.
+
+        Returns
+        -------
+        list: a list of records, i.e. dicts of line_number, index, and
+                matched variables, if columnar is False, otherwise,
+                dict: a dictionary of columns.
+        """
+        lines = data.splitlines() if isinstance(data, str) else data
+        records = self.parse_iter(lines)
+        return get_columns(records) if columnar else list(records)
+
+    def parse_iter(self, stream, use_mmap=False, encoding='utf-8'):
+        """lazily parse a stream of test data to structured records.
+        Both line patterns and multiline patterns are matched line by line.
+        A multiline record is yielded once its last line is matched and
+        its line_number is the first line of the record.  Line patterns of
+        a multiline pattern are matched on the nearest following lines and
+        a partial record which spans multiline_threshold lines is dropped.
+
+        Parameters
+        ----------
+        stream (str, PurePath, iterable): a file path or an iterable of lines.
+        use_mmap (bool): read file via memory-map.  Default is False.
+        encoding (str): a file encoding.  Default is utf-8.
+
+        Returns
+        -------
+        generator: yield a record as a dict of line_number, index of
+                matched pattern, and matched variables.
+
+        Raises
+        ------
+        RegexBuilderError: if a pattern variable is named line_number or index.
+        """
+        reserved_names = ('line_number', 'index')
+        for pattern in self.patterns:
+            groupindex = self.pattern_cache.compile(pattern).groupindex
+            names = [name for name in reserved_names if name in groupindex]
+            if names:
+                fmt = 'CANT parse with {} variable(s) which are reserved record fields.'
+                raise RegexBuilderError(fmt.format(', '.join(names)))
+
+        lines = read_lines(stream, use_mmap=use_mmap, encoding=encoding)
+        if self.is_line:
+            prefilter = PrefilterIndex(self.patterns, cache=self.pattern_cache)
+            for line_number, line in enumerate(lines, 1):
+                for index, match in prefilter.search(line):
+                    record = dict(line_number=line_number, index=index)
+                    record.update(match.groupdict())
+                    yield record
+            return
+
+        matchers = [
+            MultilineMatcher(pattern, cache=self.pattern_cache)
+            for pattern in self.patterns
+        ]
+        for line_number, line in enumerate(lines, 1):
+            for index, matcher in enumerate(matchers):
+                result = matcher.feed(line_number, line, window=self.multiline_threshold)
+                if result:
+                    record = dict(line_number=result[0], index=index)
+                    record.update(result[1])
+                    yield record
+
+    def iter_records(self, tested=False, stream=None):
+        """lazily yield structured records of built patterns and, if tested
+        is True, of matches and test results.  A record is a dict whose type
+        is one of
+            pattern: index, pattern, and variables
+            match: index, line_number, and groups of matched variables
+            result: index, match_count, and matched
+            summary: test_result
+        line_number of a multiline match is the first line of matched test data.
+
+        Parameters
+        ----------
+        tested (bool): test patterns via test data.  Default is False.
+        stream (str, PurePath, iterable): a file path or an iterable of lines
+                which is tested instead of test_data.  It is read lazily if
+                is_line is True, otherwise, it is read into memory.
+                Default is None.
+
+        Returns
+        -------
+        generator: yield records in order of being produced.
+        """
+        for index, pattern in enumerate(self.patterns):
+            yield dict(type='pattern', index=index, pattern=str(pattern),
+                       variables=get_variables(pattern))
+
+        if not tested:
+            return
+
+        if stream is None:
+            self.__class__.validate_data(test_data=self.test_data)
+        counters = [0 for _ in self.patterns]
+        if self.is_line:
+            lines = self.get_lst_of_test_data() if stream is None else stream
+            records = self.test_stream(lines, sample_size=0)
+            for record in records:
+                counters[record['index']] += 1
+                yield dict(type='match', index=record['index'],
+                           line_number=record['line_number'],
+                           groups=record['groupdict'])
+        else:
+            line_number = 1
+            if stream is None:
+                lst_of_test_data = self.get_lst_of_test_data()
+            else:
+                lst_of_test_data = ['\n'.join(read_lines(stream))]
+            for test_data in lst_of_test_data:
+                matched_result = self.get_matched_result([test_data])
+                for index, matches in enumerate(matched_result):
+                    for _, groupdict in matches:
+                        counters[index] += 1
+                        yield dict(type='match', index=index,
+                                   line_number=line_number, groups=groupdict)
+                line_number += test_data.count('\n') + 1
+            self.test_result = bool(counters) and all(counters)
+
+        for index, counter in enumerate(counters):
+            yield dict(type='result', index=index, match_count=counter,
+                       matched=counter > 0)
+        yield dict(type='summary', test_result=self.test_result)
+
+    def analyze(self, fuzzed=False, showed=False, max_size=4096, timeout=0.05):
+        """detect pathological backtracking of generated patterns
+
+        Parameters
+        ----------
+        fuzzed (bool): measure match time on growing inputs.  Default is False.
+        showed (bool): show analysis report if set to True.  Default is False.
+        max_size (int): a maximum size of fuzzed input.  Default is 4096.
+        timeout (float): stop fuzzing a pattern once a search takes longer
+                than timeout seconds.  Default is 0.05.
+
+        Returns
+        -------
+        bool: True if every pattern is safe, otherwise, False.
+
+        Notes
+        -----
+        A multiline pattern joins its line patterns with a glue, i.e.
+        [^\\r\\n]*[\\r\\n]+([^\\r\\n]*[\\r\\n]+)*, which is a nested quantifier
+        by construction.  Its line patterns are analyzed one by one instead,
+        and large test data are matched line by line via MultilineMatcher.
+        """
+        is_safe = True
+        lst = []
+        for pattern in self.patterns:
+            line_patterns = getattr(pattern, 'line_patterns', None)
+            if line_patterns:
+                lst.append('multiline pattern: {}'.format(pattern))
+                lst.append('glue: SKIPPED - line patterns are analyzed one by one')
+            for line_pattern in line_patterns or [pattern]:
+                analyzer = PatternAnalyzer(line_pattern)
+                fuzzed and analyzer.fuzz(max_size=max_size, timeout=timeout)
+                is_safe &= analyzer.is_safe
+                lst.append(analyzer.get_report())
+                lst.append('safe: {}'.format('YES' if analyzer.is_safe else 'NO'))
+                lst.append('-' * 10)
+
+        self.analysis_report = '\n'.join(lst)
+        showed and print(self.analysis_report)
+        return is_safe
+
+    def bulk_search(self, lines):
+        """search generated patterns against many lines.  Only patterns whose
+        required literal exists in a line are run against that line.
+
+        Parameters
+        ----------
+        lines (str, iterable): a text or an iterable of lines.
+
+        Returns
+        -------
+        generator: yield (line index, pattern, match object) items.
+        """
+        lines = lines.splitlines() if isinstance(lines, str) else lines
+        prefilter = PrefilterIndex(self.patterns, cache=self.pattern_cache)
+        for line_index, index, match in prefilter.search_all(lines):
+            yield line_index, self.patterns[index], match
+
     def create_unittest(self):
         """dynamically generate Python unittest script
 
@@ -412,19 +1141,22 @@ def add_reference(name='', pattern='', **kwargs):
     obj = dict(pattern=pattern,
                description='inline_{}_{}'.format(name, pattern))
     if name not in REF:
-        REF[name] = obj
+        REF.set_inline(name, obj)
     else:
         if name == 'datetime':
+            node = dict(REF['datetime'])
             for key, value in kwargs.items():
                 if re.match(r'format\d+$', key):
-                    REF['datetime'][key] = value
+                    node[key] = value
+            REF.set_inline(name, node)
         else:
-            if name not in BASELINE_REF:
-                REF[name] = obj
+            if REF.is_inline(name):
+                REF.set_inline(name, obj)
             else:
                 fmt = ('{} already exists in system_references.yaml '
                        'or user_references.yaml')
                 raise PatternReferenceError(fmt.format(name))
+    ElementPattern.clear_memo()
 
 
 def remove_reference(name=''):
@@ -445,18 +1177,17 @@ def remove_reference(name=''):
         PatternReferenceError(fmt.format(name))
 
     if name in REF:
-        if name not in BASELINE_REF:
-            REF.pop(name)
+        if REF.is_inline(name):
+            REF.remove_inline(name)
         else:
-            if name == 'datetime':
-                REF['datetime'] = deepcopy(BASELINE_REF['datetime'])
-            else:
+            if name != 'datetime':
                 fmt = ('CANT remove {!r} from system_references.yaml '
                        'or user_references.yaml')
                 raise PatternReferenceError(fmt.format(name))
     else:
         fmt = 'CANT remove {!r} keyword because it does not exist.'
         raise PatternReferenceError(fmt.format(name))
+    ElementPattern.clear_memo()
 
 
 class DynamicTestScriptBuilder:
@@ -35,3 +35,15 @@ class PatternBuilderError(PatternError):
 
 class RegexBuilderError(Exception):
     """Use to capture error for RegexBuilder class."""
+
+
+class MatcherError(Exception):
+    """Use to capture error for matcher of RegexBuilder class."""
+
+
+class AnalyzerError(Exception):
+    """Use to capture error for analyzer of regex pattern."""
+
+
+class BatchError(Exception):
+    """Use to capture error for batch mode of regexapp CLI."""
@@ -0,0 +1,183 @@
+"""Module containing the intermediate representation of regexapp line patterns."""
+
+
+class Node:
+    """Use to store a piece of a line pattern
+
+    Attributes
+    ----------
+    kind (str): a kind of node.
+    pattern (str): a regex pattern of node.
+
+    Properties
+    ----------
+    statement -> str
+    """
+    __slots__ = ('pattern',)
+    kind = ''
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.pattern)
+
+    @property
+    def statement(self):
+        return self.pattern
+
+
+class TextNode(Node):
+    """Use to store a text piece of a line pattern
+
+    Attributes
+    ----------
+    text (str, None): a source text of pattern.  None if pattern was
+            rewritten and it is no longer derived from a text.
+
+    Properties
+    ----------
+    is_derived -> bool
+
+    Methods
+    -------
+    TextNode.create(pattern, text=None) -> TextNode
+    """
+    __slots__ = ('text',)
+    kind = 'text'
+    whitespace_patterns = frozenset([' ', ' *', ' +', r'\s', r'\s*', r'\s+'])
+
+    def __init__(self, pattern, text=None):
+        super().__init__(pattern)
+        self.text = text
+
+    @property
+    def is_derived(self):
+        """True if pattern is derived from a source text"""
+        return self.text is not None
+
+    @classmethod
+    def create(cls, pattern, text=None):
+        """create a whitespace or literal node for a text pattern
+
+        Parameters
+        ----------
+        pattern (str): a regex pattern.
+        text (str, None): a source text of pattern.  Default is None.
+
+        Returns
+        -------
+        TextNode: a WhitespaceNode or LiteralNode instance.
+        """
+        if pattern in cls.whitespace_patterns:
+            return WhitespaceNode(pattern, text=text)
+        return LiteralNode(pattern, text=text)
+
+
+class LiteralNode(TextNode):
+    """Use to store a literal text of a line pattern"""
+    __slots__ = ()
+    kind = 'literal'
+
+
+class WhitespaceNode(TextNode):
+    """Use to store a whitespace run of a line pattern"""
+    __slots__ = ()
+    kind = 'whitespace'
+
+
+class ElementNode(Node):
+    """Use to store an element of a line pattern
+
+    Attributes
+    ----------
+    variable (VarCls): a regex variable.
+    or_empty (bool): a flag if element is expecting a zero match.
+    prepended_pattern (str): a start of string pattern of element.
+    appended_pattern (str): an end of string pattern of element.
+
+    Methods
+    -------
+    ElementNode.from_pattern(pattern) -> ElementNode
+    remove_head_of_string() -> None
+    remove_tail_of_string() -> None
+    """
+    __slots__ = ('variable', 'or_empty', 'prepended_pattern', 'appended_pattern')
+    kind = 'element'
+    anchor_patterns = frozenset([
+        '^', '^ *', '^ +', r'^\s*', r'^\s+',
+        '$', ' *$', ' +$', r'\s*$', r'\s+$'
+    ])
+
+    def __init__(self, pattern, variable=None, or_empty=False,
+                 prepended_pattern='', appended_pattern=''):
+        super().__init__(pattern)
+        self.variable = variable
+        self.or_empty = or_empty
+        self.prepended_pattern = prepended_pattern
+        self.appended_pattern = appended_pattern
+
+    @property
+    def statement(self):
+        if self.variable is not None and not self.variable.is_empty:
+            return self.variable.var_name
+        return self.pattern
+
+    @classmethod
+    def from_pattern(cls, pattern):
+        """create a node from an element pattern
+
+        Parameters
+        ----------
+        pattern (ElementPattern): an element pattern.
+
+        Returns
+        -------
+        ElementNode: an AnchorNode if pattern is a start or end of string
+                pattern, otherwise, an ElementNode instance.
+        """
+        node_cls = AnchorNode if pattern in cls.anchor_patterns else cls
+        return node_cls(
+            str(pattern), variable=pattern.variable,
+            or_empty=pattern.or_empty,
+            prepended_pattern=pattern.prepended_pattern,
+            appended_pattern=pattern.appended_pattern
+        )
+
+    def remove_head_of_string(self):
+        """remove a start of string pattern i.e ^ or ^\\s* or ^\\s+ or ^ * or ^ +"""
+        if self.prepended_pattern and self.pattern.startswith('^'):
+            self.pattern = self.pattern[len(self.prepended_pattern):]
+            self.prepended_pattern = ''
+
+    def remove_tail_of_string(self):
+        """remove an end of string pattern i.e $ or \\s*$ or \\s+$ or  *$ or  +$"""
+        if self.appended_pattern and self.pattern.endswith('$'):
+            self.pattern = self.pattern[:-len(self.appended_pattern)]
+            self.appended_pattern = ''
+
+
+class AnchorNode(ElementNode):
+    """Use to store a start or end of string pattern of a line pattern"""
+    __slots__ = ()
+    kind = 'anchor'
+
+
+class FlagNode(Node):
+    """Use to store an inline flag of a line pattern, i.e. (?i)"""
+    __slots__ = ()
+    kind = 'flag'
+
+
+def emit(nodes):
+    """emit a regex pattern of a list of nodes
+
+    Parameters
+    ----------
+    nodes (list): a list of Node.
+
+    Returns
+    -------
+    str: a regex pattern.
+    """
+    return ''.join(node.pattern for node in nodes)
@@ -1,16 +1,21 @@
 """Module containing the logic for the regexapp entry-points."""
 
+import os
+import io
 import sys
 import argparse
 import re
-import yaml
+import json
+from contextlib import redirect_stdout
+from contextlib import redirect_stderr
 # from os import path
 # from textwrap import dedent
-from regexapp.application import Application
 from regexapp import RegexBuilder
 from regexapp.core import enclose_string
 
 from regexapp.utils import Printer
+from regexapp.utils import YAMLLoader
+from regexapp.cache import BUILD_CACHE
 
 from regexapp.constant import ECODE
 
@@ -28,6 +33,7 @@ def run_gui_application(options):
     if end user requests `--gui`
     """
     if options.gui:
+        from regexapp.application import Application
         app = Application()
         app.run()
         sys.exit(ECODE.SUCCESS)
@@ -54,10 +60,79 @@ def show_dependency(options):
         sys.exit(ECODE.SUCCESS)
 
 
+def check_references(options):
+    """Run positive and negative tests of every keyword reference.
+
+    Parameters
+    ----------
+    options (argparse.Namespace): argparse.Namespace instance.
+
+    Returns
+    -------
+    None: will print a timing table per keyword and call ``sys.exit`` with
+    ``ECODE.SUCCESS`` if every test passes, otherwise, ``ECODE.BAD``
+    if end user requests `--check-references`
+    """
+    if options.check_references:
+        from regexapp.collection import REF
+        results = REF.run_self_tests(workers=options.jobs)
+        print(REF.get_self_test_report(results))
+        is_passed = not any(result['failures'] for result in results)
+        sys.exit(ECODE.SUCCESS if is_passed else ECODE.BAD)
+
+
+def process_batch(options):
+    """Process templates of a batch manifest, a directory, or a glob.
+
+    Parameters
+    ----------
+    options (argparse.Namespace): argparse.Namespace instance.
+
+    Returns
+    -------
+    None: will write results to output directory, print a summary table,
+    and call ``sys.exit`` with ``ECODE.SUCCESS`` if every item passes,
+    otherwise, ``ECODE.BAD`` if end user requests `--batch`
+    """
+    if options.batch:
+        from time import perf_counter
+        from regexapp.batch import get_batch_items
+        from regexapp.batch import run_batch
+        from regexapp.batch import get_batch_report
+        from regexapp.exceptions import BatchError
+
+        try:
+            items = get_batch_items(
+                options.batch, platform=options.platform, test=options.test,
+                config=options.config, no_cache=options.no_cache
+            )
+        except BatchError as ex:
+            print('*** {}: {}'.format(type(ex).__name__, ex))
+            sys.exit(ECODE.BAD)
+
+        start = perf_counter()
+        results = run_batch(items, output_dir=options.output_dir,
+                            workers=options.jobs)
+        elapsed = perf_counter() - start
+        print(get_batch_report(results, elapsed=elapsed))
+        is_passed = all(result['exit_code'] == ECODE.SUCCESS for result in results)
+        sys.exit(ECODE.SUCCESS if is_passed else ECODE.BAD)
+
+
 class Cli:
-    """regexapp console CLI application."""
+    """regexapp console CLI application.
 
-    def __init__(self):
+    Parameters
+    ----------
+    args (list): a list of CLI arguments.  Default is None, i.e. sys.argv.
+
+    Attributes
+    ----------
+    test_stream (file): stdin if test data is streamed line by line, i.e.
+            -t - with --run-test and is_line config.  Default is None.
+    """
+
+    def __init__(self, args=None):
 
         parser = argparse.ArgumentParser(
             prog='regexapp',
@@ -73,13 +148,15 @@ class Cli:
         parser.add_argument(
             '-u', '--user-data', type=str, dest='user_data',
             default='',
-            help='Required flag: user snippet for regex generation.'
+            help='Required flag: user snippet for regex generation.  Use - for stdin.'
         )
 
         parser.add_argument(
             '-t', '--test-data', type=str, dest='test_data',
             default='',
-            help='User test data.'
+            help=('User test data.  Use - for stdin which is streamed line by line '
+                  'only with --run-test and is_line config, otherwise, '
+                  'stdin is read entirely.')
         )
 
         parser.add_argument(
@@ -99,14 +176,73 @@ class Cli:
             help='Config settings for generated test script.'
         )
 
+        parser.add_argument(
+            '-j', '--jobs', type=int, dest='jobs',
+            default=0,
+            help=('Number of worker processes to build regex patterns '
+                  'or to check references in parallel.')
+        )
+
+        parser.add_argument(
+            '--no-cache', action='store_true', dest='no_cache',
+            help='Build every regex pattern without the on-disk build cache.'
+        )
+
+        parser.add_argument(
+            '--check-references', action='store_true', dest='check_references',
+            help='Run positive and negative tests of every keyword reference.'
+        )
+
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Detect pathological backtracking of generated regex patterns.'
+        )
+
+        parser.add_argument(
+            '--output', type=str, dest='output_format',
+            choices=['text', 'json', 'ndjson'], default='text',
+            help=('An output format of building and testing regex patterns.  '
+                  'ndjson streams a record per line.  Default is text.')
+        )
+
+        parser.add_argument(
+            '--watch', action='store_true',
+            help=('Rebuild and retest regex patterns whenever user data file, '
+                  'test data file, or user_references.yaml is changed.')
+        )
+
+        parser.add_argument(
+            '--batch', type=str, default='',
+            help=('Process many templates in one process.  It is a YAML '
+                  'manifest, a directory, or a glob of templates.')
+        )
+
+        parser.add_argument(
+            '--output-dir', type=str, dest='output_dir',
+            default='regexapp_output',
+            help='A directory of batch results.  Default is regexapp_output.'
+        )
+
+        parser.add_argument(
+            '--connect', type=str, default='',
+            help=('Send this request to a regexapp server which listens on '
+                  'a Unix domain socket, i.e. regexapp serve --socket PATH.')
+        )
+
         parser.add_argument(
             '-d', '--dependency', action='store_true',
             help='Show Regexapp dependent package(s).'
         )
 
+        self.args = sys.argv[1:] if args is None else list(args)
         self.parser = parser
-        self.options = self.parser.parse_args()
+        self.options = self.parser.parse_args(self.args)
         self.kwargs = dict()
+        self.test_stream = None
+
+    @property
+    def build_cache(self):
+        return None if self.options.no_cache else BUILD_CACHE
 
     def validate_cli_flags(self):
         """Validate argparse `options`.
@@ -114,13 +250,25 @@ class Cli:
         Returns
         -------
         bool: show ``self.parser.print_help()`` and call ``sys.exit(ECODE.BAD)`` if
-        user_data flag is empty, otherwise, return True
+        user_data flag is empty, otherwise, return True.  ``-`` user_data or
+        test_data is read from stdin.
         """
 
         if not self.options.user_data:
             self.parser.print_help()
             sys.exit(ECODE.BAD)
 
+        if self.options.platform and self.options.output_format != 'text':
+            fmt = '*** CANT generate {} test script with --output {}.'
+            print(fmt.format(self.options.platform, self.options.output_format))
+            sys.exit(ECODE.BAD)
+
+        if self.options.user_data == '-':
+            if self.options.test_data == '-':
+                print('*** CANT read both user data and test data from stdin.')
+                sys.exit(ECODE.BAD)
+            self.options.user_data = sys.stdin.read()
+
         pattern = r'file( *name)?:: *(?P<filename>\S*)'
         m = re.match(pattern, self.options.user_data, re.I)
         if m:
@@ -165,7 +313,7 @@ class Cli:
 
             if content:
                 try:
-                    kwargs = yaml.load(content, Loader=yaml.SafeLoader)
+                    kwargs = YAMLLoader.load(content)
                     if isinstance(kwargs, dict):
                         self.kwargs = kwargs
                     else:
@@ -177,16 +325,58 @@ class Cli:
                     print(failure)
                     sys.exit(ECODE.BAD)
 
+        if self.options.test_data == '-':
+            if self.options.test and self.kwargs.get('is_line'):
+                self.test_stream = sys.stdin
+            else:
+                self.options.test_data = sys.stdin.read()
+
         return True
 
+    def print_records(self, records):
+        """Print structured records as one JSON document or as JSON lines.
+
+        Parameters
+        ----------
+        records (iterable): records which are yielded by RegexBuilder.iter_records.
+        """
+        if self.options.output_format == 'ndjson':
+            for record in records:
+                print(json.dumps(record), flush=True)
+            return
+
+        document = dict(patterns=[], matches=[])
+        for record in records:
+            kind = record.pop('type')
+            if kind == 'pattern':
+                document['patterns'].append(record)
+            elif kind == 'match':
+                document['matches'].append(record)
+            elif kind == 'result':
+                document['patterns'][record.pop('index')].update(record)
+            elif kind == 'summary':
+                document.update(record)
+            else:
+                document.setdefault(kind, []).append(record)
+        print(json.dumps(document, indent=2))
+
     def build_regex_pattern(self):
         """Build regex pattern"""
         factory = RegexBuilder(
             user_data=self.options.user_data,
             **self.kwargs
         )
-        factory.build()
+        factory.build(workers=self.options.jobs, cache=self.build_cache)
         patterns = factory.patterns
+        if self.options.output_format != 'text':
+            if not patterns:
+                fmt = 'CANT generate regex pattern from\n{}'
+                message = fmt.format(self.options.user_data)
+                self.print_records([dict(type='error', message=message)])
+                sys.exit(ECODE.BAD)
+            self.print_records(factory.iter_records())
+            sys.exit(ECODE.SUCCESS)
+
         total = len(patterns)
         if total >= 1:
             if total == 1:
@@ -216,7 +406,7 @@ class Cli:
                 test_data=self.options.test_data,
                 **self.kwargs
             )
-            factory.build()
+            factory.build(workers=self.options.jobs, cache=self.build_cache)
             test_script = getattr(factory, method_name)()
             print('\n{}\n'.format(test_script))
             sys.exit(ECODE.SUCCESS)
@@ -231,23 +421,139 @@ class Cli:
                 test_data=self.options.test_data,
                 **self.kwargs
             )
-            factory.build()
+            factory.build(workers=self.options.jobs, cache=self.build_cache)
+            if self.options.output_format != 'text':
+                if not factory.patterns:
+                    fmt = 'CANT generate regex pattern from\n{}'
+                    message = fmt.format(self.options.user_data)
+                    self.print_records([dict(type='error', message=message)])
+                    sys.exit(ECODE.BAD)
+                records = factory.iter_records(tested=True, stream=self.test_stream)
+                self.print_records(records)
+                sys.exit(ECODE.SUCCESS)
+            if self.test_stream is not None:
+                fmt = 'line {} - pattern{}: {}'
+                for record in factory.test_stream(self.test_stream, sample_size=0):
+                    match = record['groupdict'] or 'YES'
+                    print(fmt.format(record['line_number'], record['index'] + 1, match),
+                          flush=True)
+                print(factory.test_report)
+                print(factory.test_result)
+                sys.exit(ECODE.SUCCESS)
             test_result = factory.test(showed=True)
             print(test_result)
             sys.exit(ECODE.SUCCESS)
 
+    def analyze_patterns(self):
+        """Analyze backtracking of generated regex patterns"""
+        if self.options.analyze:
+            factory = RegexBuilder(
+                user_data=self.options.user_data,
+                **self.kwargs
+            )
+            factory.build(workers=self.options.jobs, cache=self.build_cache)
+            is_safe = factory.analyze(fuzzed=True, showed=True)
+            sys.exit(ECODE.SUCCESS if is_safe else ECODE.BAD)
+
+    def watch_files(self):
+        """Rebuild and retest regex patterns whenever watched files change"""
+        if self.options.watch:
+            from regexapp.watcher import FileWatcher
+            from regexapp.watcher import WatchSession
+
+            options = self.parser.parse_args(self.args)
+            if options.user_data == '-' or options.test_data == '-':
+                print('*** CANT watch user data or test data from stdin.')
+                sys.exit(ECODE.BAD)
+
+            session = WatchSession(options.user_data, test_data=options.test_data,
+                                   kwargs=self.kwargs)
+            watcher = FileWatcher(session.filenames)
+            mode = 'inotify' if watcher.is_inotify else 'polling'
+            print('Watching ({}): {}'.format(mode, ', '.join(watcher.filenames)))
+            try:
+                print(session.run(), flush=True)
+                while True:
+                    changes = watcher.wait()
+                    print(session.run(changes), flush=True)
+            except KeyboardInterrupt:
+                sys.exit(ECODE.SUCCESS)
+            finally:
+                watcher.close()
+
+    def connect_server(self):
+        """Send CLI arguments to a regexapp server and show its response"""
+        if self.options.connect:
+            from regexapp.server import send_request
+            args, is_skipped = [], False
+            for arg in self.args:
+                if is_skipped or arg.startswith('--connect='):
+                    is_skipped = False
+                elif arg == '--connect':
+                    is_skipped = True
+                else:
+                    args.append(arg)
+
+            try:
+                request = dict(args=args, cwd=os.getcwd())
+                response = send_request(self.options.connect, request)
+            except Exception as ex:
+                failure = '*** CANT connect to {} - {}: {}'
+                print(failure.format(self.options.connect, type(ex).__name__, ex))
+                sys.exit(ECODE.BAD)
+
+            response.get('output') and print(response.get('output'))
+            sys.exit(response.get('exit_code', ECODE.BAD))
+
     def run(self):
         """Take CLI arguments, parse it, and process."""
+        self.connect_server()
         show_dependency(self.options)
+        check_references(self.options)
+        process_batch(self.options)
         self.validate_cli_flags()
         run_gui_application(self.options)
+        self.watch_files()
+        self.analyze_patterns()
         if not self.options.test_data:
             self.build_regex_pattern()
         self.run_test()
         self.build_test_script()
 
 
+def run_cli(args):
+    """Run regexapp console CLI with a list of arguments and capture its output.
+
+    Parameters
+    ----------
+    args (list): a list of CLI arguments.
+
+    Returns
+    -------
+    tuple: an exit code and a captured output of stdout and stderr.
+    """
+    stream = io.StringIO()
+    exit_code = ECODE.SUCCESS
+    with redirect_stdout(stream), redirect_stderr(stream):
+        try:
+            console = Cli(args=args)
+            console.run()
+        except SystemExit as ex:
+            if ex.code is None or isinstance(ex.code, int):
+                exit_code = ex.code or ECODE.SUCCESS
+            else:
+                print(ex.code)
+                exit_code = ECODE.BAD
+        except Exception as ex:
+            print('*** {}: {}'.format(type(ex).__name__, ex))
+            exit_code = ECODE.BAD
+    return int(exit_code), stream.getvalue().rstrip('\n')
+
+
 def execute():
     """Execute regexapp console CLI."""
+    if sys.argv[1:2] == ['serve']:
+        from regexapp.server import serve
+        serve(sys.argv[2:])
     app = Cli()
     app.run()
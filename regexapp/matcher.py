@@ -0,0 +1,540 @@
+"""Module containing the logic for matching patterns against test data."""
+
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:     # pragma: no cover - Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from regexapp.exceptions import MatcherError
+from regexapp.analyzer import get_charset
+
+
+def is_ascii(text):
+    """return True if text only contains ASCII characters"""
+    try:
+        text.encode('ascii')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def get_literal_runs(parsed_pattern):
+    """collect runs of consecutive literal characters which must appear in
+    any matched text of a parsed pattern
+
+    Parameters
+    ----------
+    parsed_pattern (sre_parse.SubPattern): a parsed pattern.
+
+    Returns
+    -------
+    list: a list of literal strings.
+    """
+    runs, chars = [], []
+
+    def collect(items):
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                chars.append(chr(av))
+            elif op is sre_constants.AT:
+                continue
+            elif op is sre_constants.SUBPATTERN and not av[1] and not av[2]:
+                collect(av[-1])
+            else:
+                chars and runs.append(''.join(chars))
+                chars.clear()
+
+    collect(parsed_pattern)
+    chars and runs.append(''.join(chars))
+    return runs
+
+
+def get_required_literal(pattern):
+    """get the longest literal which is mandatory for a pattern to match
+
+    Parameters
+    ----------
+    pattern (str): a regex pattern, e.g. LinePattern.
+
+    Returns
+    -------
+    tuple: a required literal and ignore case flag.  A literal is empty
+            if pattern does not have any mandatory literal.
+    """
+    try:
+        parsed_pattern = sre_parse.parse(str(pattern))
+    except Exception as ex:     # noqa
+        return '', False
+
+    state = getattr(parsed_pattern, 'state', None) or parsed_pattern.pattern
+    is_ignorecase = bool(state.flags & sre_constants.SRE_FLAG_IGNORECASE)
+
+    runs = get_literal_runs(parsed_pattern)
+    literal = max(runs, key=len) if runs else ''
+    if is_ignorecase:
+        if not is_ascii(literal):
+            return '', False
+        literal = literal.lower()
+    return literal, is_ignorecase
+
+
+class CombinedMatcher:
+    """Use to merge a list of line patterns into a single alternation so that
+    every test line is scanned once instead of once per pattern.
+
+    Each pattern becomes a branch which is tagged by a named group, i.e.
+    (?P<_p0>...)|(?P<_p1>...), and the variables of a branch are renamed
+    with the branch tag to prevent the collision of group names.  A test line
+    is attributed to the first branch which matches at the leftmost position,
+    and search_all checks the other candidate patterns of a matched line so
+    that every matching pattern is reported as it is by a per-pattern scan.
+
+    Attributes
+    ----------
+    patterns (list): a list of line patterns.
+    max_size (int): a size limit of a merged pattern.  Default is 100000.
+    cache (PatternCache): a store of compiled patterns.  Default is None.
+    pattern (str): a merged pattern.  Empty if patterns can not be merged.
+    is_combined (bool): True if patterns are merged.
+
+    Methods
+    -------
+    CombinedMatcher.get_branch_pattern(pattern, index) -> str
+    search(line) -> tuple
+    search_all(line) -> list
+    """
+    branch_fmt = '_p{}'
+    global_flags_pattern = r'\(\?(?P<flags>[aiLmsux]+)\)'
+    group_pattern = r'(?P<escape>\\.)|\(\?P(?P<kind>[<=])(?P<name>\w+)'
+    backreference_pattern = r'\\.'
+
+    def __init__(self, patterns, max_size=100000, cache=None):
+        self.patterns = list(patterns)
+        self.max_size = max_size
+        self.cache = cache
+        self.pattern = ''
+        self.is_combined = False
+        self._compiled_pattern = None
+        self._prefilter = None
+        self.combine()
+
+    def combine(self):
+        """merge patterns into a single alternation if it is possible"""
+        if not self.patterns:
+            return
+
+        branches = []
+        for index, pattern in enumerate(self.patterns):
+            branch = self.get_branch_pattern(pattern, index)
+            if not branch:
+                return
+            branches.append(branch)
+
+        merged_pattern = '|'.join(branches)
+        if len(merged_pattern) > self.max_size:
+            return
+
+        try:
+            if self.cache is not None:
+                self._compiled_pattern = self.cache.compile(merged_pattern)
+            else:
+                self._compiled_pattern = re.compile(merged_pattern)
+        except Exception as ex:     # noqa
+            return
+
+        self.pattern = merged_pattern
+        self.is_combined = True
+        self._prefilter = PrefilterIndex(self.patterns, cache=self.cache)
+
+    @classmethod
+    def get_branch_pattern(cls, pattern, index):
+        """convert a pattern to a tagged branch of an alternation
+
+        Parameters
+        ----------
+        pattern (str): a line pattern.
+        index (int): an index of pattern.
+
+        Returns
+        -------
+        str: a tagged branch or empty string if pattern can not be a branch,
+                e.g. pattern contains numbered back reference.
+        """
+        pattern = str(pattern)
+        tag = cls.branch_fmt.format(index)
+
+        flags = ''
+        match = re.match(cls.global_flags_pattern, pattern)
+        while match:
+            flags += match.group('flags')
+            pattern = pattern[match.end():]
+            match = re.match(cls.global_flags_pattern, pattern)
+
+        if re.search(cls.global_flags_pattern, pattern):
+            return ''
+
+        has_numbered_ref = [
+            True for item in re.findall(cls.backreference_pattern, pattern)
+            if item[1:].isdigit() and item[1:] != '0'
+        ]
+        if has_numbered_ref:
+            return ''
+
+        def rename(match_obj):
+            if match_obj.group('escape'):
+                return match_obj.group()
+            fmt = '(?P<{}_{}' if match_obj.group('kind') == '<' else '(?P={}_{}'
+            return fmt.format(tag, match_obj.group('name'))
+
+        pattern = re.sub(cls.group_pattern, rename, pattern)
+        if flags:
+            pattern = '(?{}:{})'.format(''.join(sorted(set(flags))), pattern)
+        branch = '(?P<{}>{})'.format(tag, pattern)
+        return branch
+
+    def search(self, line):
+        """scan a line through a merged pattern
+
+        Parameters
+        ----------
+        line (str): a test line.
+
+        Returns
+        -------
+        tuple: an index of matched pattern and its groupdict
+                or None if there is no match.
+
+        Raises
+        ------
+        MatcherError: if patterns can not be merged.
+        """
+        if not self.is_combined:
+            raise MatcherError('CANT search with unmerged patterns.')
+
+        match = self._compiled_pattern.search(line)
+        if not match:
+            return None
+
+        tag = match.lastgroup
+        index = int(tag[len(self.branch_fmt.format('')):])
+        prefix = '{}_'.format(tag)
+        groupdict = {
+            name[len(prefix):]: value
+            for name, value in match.groupdict().items()
+            if name.startswith(prefix)
+        }
+        return index, groupdict
+
+    def search_all(self, line):
+        """scan a line through a merged pattern and, if it matches, search
+        the other candidate patterns of the line one by one
+
+        Parameters
+        ----------
+        line (str): a test line.
+
+        Returns
+        -------
+        list: a list of (index of pattern, groupdict) pairs in order of
+                pattern index.  It is empty if there is no match.
+
+        Raises
+        ------
+        MatcherError: if patterns can not be merged.
+        """
+        result = self.search(line)
+        if not result:
+            return []
+
+        lst = [result]
+        for index in self._prefilter.get_candidates(line):
+            if index == result[0]:
+                continue
+            pattern = self.patterns[index]
+            if self.cache is not None:
+                match = self.cache.search(pattern, line)
+            else:
+                match = re.search(pattern, line)
+            match and lst.append((index, match.groupdict()))
+        return sorted(lst, key=lambda item: item[0])
+
+
+class PrefilterIndex:
+    """Use to rule out (pattern, line) pairs by a cheap substring check of
+    the required literal of each pattern before running any regex.
+
+    Attributes
+    ----------
+    patterns (list): a list of patterns.
+    cache (PatternCache): a store of compiled patterns.  Default is None.
+    literal_table (OrderedDict): a variable holds (literal, indexes of pattern) pair.
+    ignorecase_table (OrderedDict): a variable holds (literal, indexes of pattern)
+            pair for case-insensitive patterns.
+    unfiltered_indexes (list): indexes of pattern without a required literal.
+
+    Methods
+    -------
+    get_candidates(line) -> list
+    search(line) -> list
+    search_all(lines) -> generator
+    """
+    def __init__(self, patterns, cache=None):
+        self.patterns = list(patterns)
+        self.cache = cache
+        self.literal_table = OrderedDict()
+        self.ignorecase_table = OrderedDict()
+        self.unfiltered_indexes = []
+
+        for index, pattern in enumerate(self.patterns):
+            literal, is_ignorecase = get_required_literal(pattern)
+            if not literal:
+                self.unfiltered_indexes.append(index)
+            else:
+                tbl = self.ignorecase_table if is_ignorecase else self.literal_table
+                tbl.setdefault(literal, []).append(index)
+
+    def get_candidates(self, line):
+        """return indexes of pattern which possibly match a line
+
+        Parameters
+        ----------
+        line (str): a test line.
+
+        Returns
+        -------
+        list: a sorted list of pattern indexes.
+        """
+        indexes = self.unfiltered_indexes[:]
+        for literal, lst in self.literal_table.items():
+            literal in line and indexes.extend(lst)
+
+        if self.ignorecase_table:
+            if is_ascii(line):
+                lowered_line = line.lower()
+                for literal, lst in self.ignorecase_table.items():
+                    literal in lowered_line and indexes.extend(lst)
+            else:
+                for lst in self.ignorecase_table.values():
+                    indexes.extend(lst)
+
+        return sorted(indexes)
+
+    def search(self, line):
+        """search candidate patterns against a line
+
+        Parameters
+        ----------
+        line (str): a test line.
+
+        Returns
+        -------
+        list: a list of (index of pattern, match object) pairs.
+        """
+        result = []
+        for index in self.get_candidates(line):
+            pattern = self.patterns[index]
+            if self.cache is not None:
+                match = self.cache.search(pattern, line)
+            else:
+                match = re.search(pattern, line)
+            match and result.append((index, match))
+        return result
+
+    def search_all(self, lines):
+        """search patterns against many lines
+
+        Parameters
+        ----------
+        lines (iterable): an iterable of lines.
+
+        Returns
+        -------
+        generator: yield (line index, pattern index, match object) items.
+        """
+        for line_index, line in enumerate(lines):
+            for index, match in self.search(line):
+                yield line_index, index, match
+
+
+class MultilineMatcher:
+    """Use to match a multiline pattern line by line so that matching time is
+    linear in the size of test data.
+
+    A glued multiline pattern lets any number of lines appear between two
+    line patterns, i.e. ([^\\r\\n]*[\\r\\n]+)*, which backtracks heavily
+    when the last line pattern can not be found.  Instead, every line pattern
+    is tried once at every line start.  Because the gaps are greedy, the
+    regex engine settles on the latest possible line for each line pattern
+    after the first one, so the line patterns are located from the last one
+    backward and the first line pattern is located by a leftmost search.
+    This only holds if no line pattern can consume a line ending, e.g. \\s*
+    of or_empty, otherwise, search falls back to the glued multiline pattern.
+
+    Attributes
+    ----------
+    pattern (str): a multiline pattern, e.g. MultilinePattern.
+    line_patterns (list): a list of line patterns of a multiline pattern.
+    cache (PatternCache): a store of compiled patterns.  Default is None.
+    is_linear (bool): True if pattern can be matched line by line, i.e.
+            it has several line patterns and none of them can consume
+            a line ending.
+
+    Methods
+    -------
+    MultilineMatcher.is_single_line(compiled_pattern) -> bool
+    search(text) -> dict or None
+    reset() -> None
+    feed(line_number, line, window=1000) -> tuple or None
+    """
+    newline_pattern = r'[\r\n]'
+
+    def __init__(self, pattern, cache=None):
+        self.pattern = pattern
+        self.line_patterns = list(getattr(pattern, 'line_patterns', []))
+        self.cache = cache
+        self._compiled_patterns = []
+        if len(self.line_patterns) > 1:
+            self._compiled_patterns = [
+                self.compile(line_pat, re.MULTILINE)
+                for line_pat in self.line_patterns
+            ]
+        self.is_linear = bool(self._compiled_patterns) and all(
+            self.is_single_line(compiled_pattern)
+            for compiled_pattern in self._compiled_patterns
+        )
+        self.reset()
+
+    @classmethod
+    def is_single_line(cls, compiled_pattern):
+        """return True if a compiled pattern can not consume \\r or \\n
+
+        Parameters
+        ----------
+        compiled_pattern (re.Pattern): a compiled line pattern.
+
+        Returns
+        -------
+        bool: True if every match of pattern stays within a single line.
+        """
+        if compiled_pattern.flags & re.DOTALL:
+            return False
+        try:
+            parsed_pattern = sre_parse.parse(compiled_pattern.pattern,
+                                             compiled_pattern.flags)
+        except Exception:
+            return False
+        return not {'\r', '\n'} & get_charset(list(parsed_pattern))
+
+    def compile(self, pattern, flags=0):
+        """return a compiled pattern via cache if it is provided"""
+        if self.cache is not None:
+            return self.cache.compile(pattern, flags)
+        return re.compile(pattern, flags)
+
+    def search(self, text):
+        """match a multiline pattern against text
+
+        Parameters
+        ----------
+        text (str): a test data.
+
+        Returns
+        -------
+        dict: a groupdict of matched result or None if there is no match.
+        """
+        if not self.is_linear:
+            match = self.compile(self.pattern).search(text)
+            return match.groupdict() if match else None
+
+        starts = [0]
+        starts.extend(m.end() for m in re.finditer(self.newline_pattern, text))
+
+        def get_line_index(position):
+            return bisect_right(starts, position) - 1
+
+        first, *others = self._compiled_patterns
+        groupdicts = []
+        upper = len(starts)
+        for offset, compiled_pattern in enumerate(reversed(others)):
+            is_last = offset == 0
+            index = upper - 1
+            while index > 0:
+                match = compiled_pattern.match(text, starts[index])
+                if match and (is_last or get_line_index(match.end()) < upper):
+                    break
+                index -= 1
+            else:
+                return None
+            groupdicts.insert(0, match.groupdict())
+            upper = index
+
+        position, limit = 0, starts[upper]
+        while position < limit:
+            match = first.search(text, position)
+            if not match or match.start() >= limit:
+                return None
+            if get_line_index(match.end()) < upper:
+                groupdicts.insert(0, match.groupdict())
+                break
+            position = match.start() + 1
+        else:
+            return None
+
+        result = dict()
+        for groupdict in groupdicts:
+            result.update(groupdict)
+        return result
+
+    def reset(self):
+        """drop a partially matched record of feed"""
+        self._state = 0
+        self._start = 0
+        self._groupdict = dict()
+
+    def feed(self, line_number, line, window=1000):
+        """match a stream line by line and return a record once the last
+        line pattern is matched.  Unlike search, line patterns are matched
+        in order on the nearest following lines, so that repeated blocks
+        of a stream become separate records, and a partial record is dropped
+        once it spans window lines so that memory and time stay bounded.
+
+        Parameters
+        ----------
+        line_number (int): a line number of line.
+        line (str): a line without line ending.
+        window (int): a maximum number of lines of a record.  Default is 1000.
+
+        Returns
+        -------
+        tuple: a line number of the first line of a record and a groupdict
+                if a record is completed, otherwise, None.
+        """
+        if not self._compiled_patterns:
+            match = self.compile(self.pattern).search(line)
+            return (line_number, match.groupdict()) if match else None
+
+        if self._state and line_number - self._start >= window:
+            self.reset()
+
+        if self._state:
+            match = self._compiled_patterns[self._state].match(line)
+            if match:
+                self._groupdict.update(match.groupdict())
+                self._state += 1
+                if self._state == len(self._compiled_patterns):
+                    record = (self._start, self._groupdict)
+                    self.reset()
+                    return record
+                return None
+
+        match = self._compiled_patterns[0].search(line)
+        if match:
+            self._state, self._start = 1, line_number
+            self._groupdict = match.groupdict()
+        return None
@@ -0,0 +1,316 @@
+"""Module containing the logic for regexapp server mode.
+
+A server keeps references, symbols, and pattern caches warm between
+requests.  Each request and response is a JSON document on a single line.
+
+Request:
+    {"id": 1, "args": ["-u", "digits(var_v1)"], "cwd": "/path"}
+    {"id": 2, "action": "build", "user_data": "digits(var_v1)"}
+    {"id": 3, "action": "test", "user_data": "...", "test_data": "..."}
+    {"id": 4, "action": "unittest", "user_data": "...", "test_data": "..."}
+    {"id": 5, "action": "ping"}
+    {"id": 6, "action": "shutdown"}
+
+Response:
+    {"id": 1, "exit_code": 0, "output": "pattern = r\"(?P<v1>\\d+)\""}
+"""
+
+import io
+import os
+import sys
+import json
+import socket
+import argparse
+import socketserver
+from threading import RLock
+from contextlib import redirect_stderr
+
+from regexapp.constant import ECODE
+
+
+class RegexServer:
+    """Use to serve regexapp CLI requests over JSON lines
+
+    Attributes
+    ----------
+    is_stopped (bool): a flag if shutdown was requested.
+    ref_signature (tuple): a signature of user_references.yaml when
+            references were checked, or None if file is missing.
+
+    Methods
+    -------
+    RegexServer.get_arguments(request) -> list
+    RegexServer.is_stdin_request(args) -> bool
+    RegexServer.get_ref_signature() -> tuple
+    reload_references() -> bool
+    handle(request) -> dict
+    handle_line(line) -> str
+    serve_stream(input_stream, output_stream) -> None
+    serve_socket(path) -> None
+    """
+    actions = ('build', 'test', 'unittest', 'pytest', 'snippet')
+
+    def __init__(self):
+        self.is_stopped = False
+        self._lock = RLock()
+        self.ref_signature = self.get_ref_signature()
+
+    @classmethod
+    def get_arguments(cls, request):
+        """return CLI arguments of a request
+
+        Parameters
+        ----------
+        request (dict): a request.
+
+        Returns
+        -------
+        list: a list of CLI arguments.
+
+        Raises
+        ------
+        ValueError: if request is invalid.
+        """
+        if 'args' in request:
+            args = request.get('args')
+            if not isinstance(args, list):
+                raise ValueError('args must be a list of CLI arguments.')
+            return [str(arg) for arg in args]
+
+        action = request.get('action', '')
+        if action not in cls.actions:
+            fmt = 'unsupported action {!r}.  Use {}, ping, or shutdown.'
+            raise ValueError(fmt.format(action, ', '.join(cls.actions)))
+
+        args = ['-u', str(request.get('user_data', ''))]
+        if action != 'build':
+            args.extend(['-t', str(request.get('test_data', ''))])
+        if action == 'test':
+            args.append('-r')
+        elif action != 'build':
+            args.extend(['-p', action])
+        if request.get('config'):
+            args.extend(['--config', str(request.get('config'))])
+        if request.get('jobs'):
+            args.extend(['-j', str(request.get('jobs'))])
+        return args
+
+    @classmethod
+    def is_stdin_request(cls, args):
+        """return True if user data or test data of CLI arguments is stdin
+
+        Parameters
+        ----------
+        args (list): a list of CLI arguments.
+
+        Returns
+        -------
+        bool: True if -u/--user-data or -t/--test-data is -, otherwise, False.
+                Invalid arguments are left to regexapp CLI to report.
+        """
+        from regexapp.main import Cli
+
+        try:
+            with redirect_stderr(io.StringIO()):
+                options = Cli(args=args).options
+        except SystemExit:
+            return False
+        return '-' in (options.user_data, options.test_data)
+
+    @classmethod
+    def get_ref_signature(cls):
+        """return a signature of user_references.yaml or None if it is missing"""
+        from regexapp.collection import REF
+        from regexapp.cache import YAMLCache
+
+        try:
+            return YAMLCache.get_signature(REF.user_ref_loc)[1:]
+        except OSError:
+            return None
+
+    def reload_references(self):
+        """reload references if user_references.yaml is changed since the
+        last check so that a server builds the same patterns as regexapp CLI
+
+        Returns
+        -------
+        bool: True if references are reloaded, otherwise, False.
+        """
+        from regexapp.collection import REF
+
+        signature = self.get_ref_signature()
+        if signature == self.ref_signature:
+            return False
+        self.ref_signature = signature
+        REF.reload()
+        return True
+
+    def handle(self, request):
+        """process a request in the same way of regexapp CLI
+
+        Parameters
+        ----------
+        request (dict): a request.
+
+        Returns
+        -------
+        dict: a response of id, exit_code, and output.
+        """
+        from regexapp.main import run_cli
+
+        response = dict(id=request.get('id'))
+        action = request.get('action', '')
+        if action == 'ping':
+            response.update(exit_code=int(ECODE.SUCCESS), output='pong')
+            return response
+        elif action == 'shutdown':
+            self.is_stopped = True
+            response.update(exit_code=int(ECODE.SUCCESS), output='shutdown')
+            return response
+
+        try:
+            args = self.get_arguments(request)
+        except ValueError as ex:
+            response.update(exit_code=int(ECODE.BAD), output='*** {}'.format(ex))
+            return response
+
+        is_stdin = self.is_stdin_request(args)
+        if {'--gui', '--connect', '--watch'} & set(args) or args[:1] == ['serve'] or is_stdin:
+            output = ('*** CANT process --gui, --connect, --watch, serve, '
+                      'or stdin request on server.')
+            response.update(exit_code=int(ECODE.BAD), output=output)
+            return response
+
+        with self._lock:
+            cwd = os.getcwd()
+            try:
+                self.reload_references()
+                request.get('cwd') and os.chdir(request.get('cwd'))
+                exit_code, output = run_cli(args)
+            except Exception as ex:
+                exit_code, output = ECODE.BAD, '*** {}: {}'.format(type(ex).__name__, ex)
+            finally:
+                os.chdir(cwd)
+
+        response.update(exit_code=int(exit_code), output=output)
+        return response
+
+    def handle_line(self, line):
+        """process a JSON line request
+
+        Parameters
+        ----------
+        line (str): a JSON document of a request.
+
+        Returns
+        -------
+        str: a JSON document of a response.
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object.')
+        except ValueError as ex:
+            response = dict(id=None, exit_code=int(ECODE.BAD),
+                            output='*** INVALID-REQUEST - {}'.format(ex))
+        else:
+            response = self.handle(request)
+        return json.dumps(response)
+
+    def serve_stream(self, input_stream, output_stream):
+        """serve requests from an input stream until it is closed or
+        a shutdown request
+
+        Parameters
+        ----------
+        input_stream (io.TextIOBase): a stream of JSON lines requests.
+        output_stream (io.TextIOBase): a stream of JSON lines responses.
+        """
+        for line in input_stream:
+            if not line.strip():
+                continue
+            output_stream.write(self.handle_line(line) + '\n')
+            output_stream.flush()
+            if self.is_stopped:
+                break
+
+    def serve_socket(self, path):
+        """serve requests over a Unix domain socket until a shutdown request
+
+        Parameters
+        ----------
+        path (str): a socket file name.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.decode('utf-8')
+                    if not line.strip():
+                        continue
+                    response = server.handle_line(line) + '\n'
+                    self.wfile.write(response.encode('utf-8'))
+                    self.wfile.flush()
+                    if server.is_stopped:
+                        break
+
+        os.path.exists(path) and os.remove(path)
+        with socketserver.UnixStreamServer(path, Handler) as unix_server:
+            try:
+                while not self.is_stopped:
+                    unix_server.handle_request()
+            finally:
+                os.path.exists(path) and os.remove(path)
+
+
+def send_request(path, request, timeout=None):
+    """send a request to a server over a Unix domain socket
+
+    Parameters
+    ----------
+    path (str): a socket file name.
+    request (dict): a request.
+    timeout (float): a socket timeout in seconds.  Default is None.
+
+    Returns
+    -------
+    dict: a response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path)
+        client.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        with client.makefile('rb') as stream:
+            line = stream.readline()
+    return json.loads(line.decode('utf-8'))
+
+
+def serve(args=None):
+    """run regexapp server, i.e. regexapp serve [--socket PATH]
+
+    Parameters
+    ----------
+    args (list): a list of CLI arguments.  Default is None.
+
+    Returns
+    -------
+    None: will serve requests and call ``sys.exit(ECODE.SUCCESS)``
+    """
+    parser = argparse.ArgumentParser(
+        prog='regexapp serve',
+        usage='%(prog)s [options]',
+        description='%(prog)s keeps regexapp warm and processes JSON lines requests.',
+    )
+    parser.add_argument(
+        '--socket', type=str, default='',
+        help='A Unix domain socket file name.  Default is stdin/stdout.'
+    )
+    options = parser.parse_args(args)
+
+    server = RegexServer()
+    if options.socket:
+        server.serve_socket(options.socket)
+    else:
+        server.serve_stream(sys.stdin, sys.stdout)
+    sys.exit(ECODE.SUCCESS)
@@ -15,6 +15,52 @@ import yaml
 import typing
 
 
+class YAMLLoader:
+    """Use to parse YAML content with the libyaml C loader if PyYAML is
+    built with libyaml, otherwise, with the pure Python loader.
+
+    Attributes
+    ----------
+    Loader (class): a safe YAML loader class.
+    is_libyaml (bool): True if libyaml C loader is used.
+
+    Methods
+    -------
+    YAMLLoader.load(stream) -> object
+    YAMLLoader.load_all(stream) -> generator
+    """
+    Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    is_libyaml = Loader is not yaml.SafeLoader
+
+    @classmethod
+    def load(cls, stream):
+        """parse YAML content safely
+
+        Parameters
+        ----------
+        stream (str, file): a YAML content or an opened file.
+
+        Returns
+        -------
+        object: a parsed YAML object.
+        """
+        return yaml.load(stream, Loader=cls.Loader)
+
+    @classmethod
+    def load_all(cls, stream):
+        """parse every document of YAML content safely and incrementally
+
+        Parameters
+        ----------
+        stream (str, file): a YAML content or an opened file.
+
+        Returns
+        -------
+        generator: yield a parsed YAML object per document.
+        """
+        return yaml.load_all(stream, Loader=cls.Loader)
+
+
 class Text(str):
     def __new__(cls, *args, **kwargs):
         if not args and not kwargs:
@@ -300,7 +346,7 @@ class File:
                     content = content.strip()
 
                 if content:
-                    yaml_result = yaml.safe_load(content)
+                    yaml_result = YAMLLoader.load(content)
                     cls.message = 'loaded {}'.format(filename)
                     return yaml_result
                 else:
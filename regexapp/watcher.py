@@ -0,0 +1,312 @@
+"""Module containing the logic for regexapp watch mode."""
+
+import os
+import re
+import select
+import difflib
+from time import perf_counter
+from time import sleep
+from datetime import datetime
+
+from regexapp import RegexBuilder
+from regexapp.collection import REF
+from regexapp.cache import MemoryBuildCache
+from regexapp.cache import YAMLCache
+
+
+# inotify events of a watched directory, i.e. IN_MODIFY, IN_ATTRIB,
+# IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, and IN_DELETE
+INOTIFY_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+
+
+def create_inotify():
+    """return an inotify file descriptor and a function to add a watch
+
+    Returns
+    -------
+    tuple: a file descriptor and an add_watch function if inotify is
+            available, otherwise, (None, None).
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError, ImportError):
+        return None, None
+
+    fd = inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+    if fd < 0:
+        return None, None
+
+    def add_watch(path):
+        return inotify_add_watch(fd, os.fsencode(path), INOTIFY_MASK) >= 0
+
+    return fd, add_watch
+
+
+class FileWatcher:
+    """Use to detect changes of files via inotify where available,
+    otherwise, via stat polling
+
+    Parameters
+    ----------
+    filenames (list): a list of file names.  A file can be missing.
+    interval (float): a polling interval in seconds.  Default is 0.5.
+    use_inotify (bool): wait for inotify events if available.  Default is True.
+
+    Attributes
+    ----------
+    filenames (list): a list of absolute file names.
+    signatures (dict): signatures of files, keyed by file name.
+    is_inotify (bool): True if inotify is used.
+
+    Methods
+    -------
+    FileWatcher.get_signature(filename) -> tuple
+    get_changes() -> list
+    wait(timeout=None) -> list
+    close() -> None
+    """
+    def __init__(self, filenames, interval=0.5, use_inotify=True):
+        self.filenames = []
+        for filename in filenames:
+            filename = os.path.abspath(filename)
+            filename in self.filenames or self.filenames.append(filename)
+        self.interval = interval
+        self.signatures = {fn: self.get_signature(fn) for fn in self.filenames}
+
+        self._fd = None
+        if use_inotify:
+            self._fd, add_watch = create_inotify()
+            if self._fd is not None:
+                folders = {os.path.dirname(fn) for fn in self.filenames}
+                is_watched = [add_watch(folder) for folder in folders if os.path.isdir(folder)]
+                if not any(is_watched):
+                    self.close()
+        self.is_inotify = self._fd is not None
+
+    @classmethod
+    def get_signature(cls, filename):
+        """return a signature of a file or None if file is missing
+
+        Parameters
+        ----------
+        filename (str): a file name.
+
+        Returns
+        -------
+        tuple: a signature of modification time and size, or None.
+        """
+        try:
+            return YAMLCache.get_signature(filename)[1:]
+        except OSError:
+            return None
+
+    def get_changes(self):
+        """return changed files since the last check
+
+        Returns
+        -------
+        list: a list of changed file names.
+        """
+        changes = []
+        for filename in self.filenames:
+            signature = self.get_signature(filename)
+            if signature != self.signatures[filename]:
+                self.signatures[filename] = signature
+                changes.append(filename)
+        return changes
+
+    def wait(self, timeout=None):
+        """wait until any file is changed
+
+        Parameters
+        ----------
+        timeout (float): a maximum waiting time in seconds.  Default is None,
+                i.e. wait forever.
+
+        Returns
+        -------
+        list: a list of changed file names.  It is empty if timeout expires.
+        """
+        start = perf_counter()
+        while True:
+            changes = self.get_changes()
+            if changes:
+                return changes
+
+            remaining = None if timeout is None else timeout - (perf_counter() - start)
+            if remaining is not None and remaining <= 0:
+                return []
+            delay = self.interval if remaining is None else min(self.interval, remaining)
+            if self._fd is None:
+                sleep(delay)
+                continue
+
+            readable, _, _ = select.select([self._fd], [], [], delay)
+            if readable:
+                try:
+                    while os.read(self._fd, 65536):
+                        pass
+                except (BlockingIOError, OSError):
+                    pass
+                # let editors finish writing before comparing signatures
+                sleep(0.05)
+
+    def close(self):
+        """release inotify file descriptor"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_data(value):
+    """return a content of a file:: argument or an inline text
+
+    Parameters
+    ----------
+    value (str): an inline text or file:: argument.
+
+    Returns
+    -------
+    str: a content.
+    """
+    match = re.match(r'file( *name)?:: *(?P<filename>\S*)', value, re.I)
+    if not match:
+        return value
+    with open(match.group('filename')) as stream:
+        return stream.read()
+
+
+def get_filename(value):
+    """return a file name of a file:: argument or an empty string"""
+    match = re.match(r'file( *name)?:: *(?P<filename>\S*)', value, re.I)
+    return os.path.abspath(match.group('filename')) if match else ''
+
+
+class WatchSession:
+    """Use to rebuild and retest regex patterns of watched files.  Only
+    affected steps are re-run and built patterns are kept in memory so that
+    an edited user data only builds its changed lines.
+
+    Parameters
+    ----------
+    user_data (str): an inline user data or file:: argument.
+    test_data (str): an inline test data or file:: argument.  Default is empty.
+    kwargs (dict): keyword arguments of RegexBuilder.  Default is None.
+
+    Attributes
+    ----------
+    filenames (list): a list of watched file names, i.e. user data file,
+            test data file, and user_references.yaml.
+    cache (MemoryBuildCache): an in-memory build cache.
+    factory (RegexBuilder): a builder of the last run.
+    result_lines (list): lines of the last match result.
+    test_result (bool): a test result of the last run, or None if there is
+            no test data.
+
+    Methods
+    -------
+    run(changes=None) -> str
+    build() -> None
+    get_result_lines() -> list
+    """
+    def __init__(self, user_data, test_data='', kwargs=None):
+        self.user_data = user_data
+        self.test_data = test_data
+        self.kwargs = dict(kwargs or dict())
+        self.user_filename = get_filename(user_data)
+        self.test_filename = get_filename(test_data)
+        self.filenames = [
+            filename for filename in [self.user_filename, self.test_filename,
+                                      REF.user_ref_loc] if filename
+        ]
+        self.cache = MemoryBuildCache()
+        self.factory = None
+        self.result_lines = []
+        self.test_result = None
+
+    def build(self):
+        """build regex patterns of user data"""
+        user_data = read_data(self.user_data)
+        factory = RegexBuilder(user_data=user_data, **self.kwargs)
+        factory.build(cache=self.cache)
+        self.factory = factory
+
+    def get_result_lines(self):
+        """return lines of patterns and their matches of test data
+
+        Returns
+        -------
+        list: a list of lines.
+        """
+        test_data = read_data(self.test_data) if self.test_data else ''
+        self.factory.test_data = test_data
+        lines = []
+        self.test_result = None
+        if not test_data:
+            for pattern in self.factory.patterns:
+                lines.append('pattern: {}'.format(pattern))
+            return lines
+
+        lst_of_test_data = self.factory.get_lst_of_test_data()
+        matched_result = self.factory.get_matched_result(lst_of_test_data)
+        self.test_result = bool(matched_result) and all(matched_result)
+        self.factory.test_result = self.test_result
+        for pattern, matches in zip(self.factory.patterns, matched_result):
+            lines.append('pattern: {}'.format(pattern))
+            if not matches:
+                lines.append('  matched: NO')
+            for data, groupdict in matches:
+                data = data if self.factory.is_line else data.splitlines()[0]
+                lines.append('  matched: {!r} -> {}'.format(data, groupdict or 'YES'))
+        return lines
+
+    def run(self, changes=None):
+        """re-run affected build and test steps
+
+        Parameters
+        ----------
+        changes (list): a list of changed file names.  Default is None,
+                i.e. an initial run of every step.
+
+        Returns
+        -------
+        str: a report of timing and a full result on the first run,
+                otherwise, a diff of match results.
+        """
+        if changes is None:
+            changes, status = [], 'initial run'
+        else:
+            names = ', '.join(os.path.basename(filename) for filename in changes)
+            status = 'changed: {}'.format(names or 'none')
+        header = '--- {:%H:%M:%S} {}'.format(datetime.now(), status)
+        is_ref_changed = REF.user_ref_loc in changes
+        is_rebuilt = is_ref_changed or self.user_filename in changes or not self.factory
+
+        try:
+            start = perf_counter()
+            is_ref_changed and REF.reload()
+            is_rebuilt and self.build()
+            build_time = perf_counter() - start
+            start = perf_counter()
+            result_lines = self.get_result_lines()
+            test_time = perf_counter() - start
+        except Exception as ex:
+            return '{}\n*** {}: {}'.format(header, type(ex).__name__, ex)
+
+        fmt = '{} (build: {}, test: {:.3f} ms)'
+        build = '{:.3f} ms'.format(build_time * 1000) if is_rebuilt else 'skipped'
+        lst = [fmt.format(header, build, test_time * 1000)]
+        if self.test_result is not None:
+            lst.append('test result: {}'.format(self.test_result))
+
+        previous_lines, self.result_lines = self.result_lines, result_lines
+        if not previous_lines:
+            lst.extend(result_lines)
+        else:
+            diff = list(difflib.unified_diff(previous_lines, result_lines,
+                                             'previous', 'current', lineterm=''))
+            lst.extend(diff or ['no change of match result'])
+        return '\n'.join(lst)
@@ -0,0 +1,76 @@
+import pytest
+
+from regexapp import LinePattern
+from regexapp import MultilinePattern
+from regexapp import PatternBuilder
+from regexapp import RegexBuilder
+from regexapp.analyzer import PatternAnalyzer
+from regexapp.exceptions import AnalyzerError
+
+
+class TestPatternAnalyzer:
+    @pytest.mark.parametrize(
+        ('pattern', 'expected_result'),
+        [
+            (r'(a+)+$', [('nested_quantifier', 'exponential')]),
+            (r'(ab|\wb)+x', [('overlapping_alternation', 'exponential')]),
+            (r'.+ +x', [('adjacent_quantifiers', 'polynomial')]),
+            (r'(\d+\.)+', []),
+            (LinePattern('Interface word(var_name) is up'), []),
+            (PatternBuilder(['1.1.1.1', 'a.b.c'], var_name='addr'), []),
+            (
+                MultilinePattern(['Interface word(var_name) is up',
+                                  'mtu digits(var_mtu) bytes']),
+                [('adjacent_quantifiers', 'polynomial'),
+                 ('nested_quantifier', 'exponential')]
+            ),
+        ]
+    )
+    def test_static_analysis(self, pattern, expected_result):
+        analyzer = PatternAnalyzer(pattern)
+        result = [(issue['kind'], issue['severity']) for issue in analyzer.issues]
+        assert result == expected_result
+
+    def test_invalid_pattern(self):
+        with pytest.raises(AnalyzerError):
+            PatternAnalyzer('(abc')
+
+    def test_fuzzing_exponential_pattern(self):
+        analyzer = PatternAnalyzer(r'(a+)+$')
+        assert [issue['severity'] for issue in analyzer.issues] == ['exponential']
+        result = analyzer.fuzz(max_size=64, timeout=0.01)
+        assert result['sizes'][0] == 8 and result['sizes'][-1] <= 64
+        assert result['sizes'] == sorted(set(result['sizes']))
+        assert result['growth'] in ('linear', 'quadratic', 'cubic', 'exponential')
+        assert analyzer.is_safe is False
+
+    def test_fuzzing_linear_pattern(self):
+        analyzer = PatternAnalyzer(LinePattern('Interface word(var_name) is up'))
+        assert analyzer.issues == []
+        result = analyzer.fuzz(max_size=64)
+        assert result['sizes'][-1] <= 64
+        assert 'growth: ' in analyzer.get_report()
+
+
+def test_regexbuilder_analyze():
+    factory = RegexBuilder(
+        user_data='Interface word(var_name) is up\nmtu digits(var_mtu) bytes',
+        is_line=True
+    )
+    factory.build()
+    assert factory.analyze() is True
+    assert factory.analysis_report.count('safe: YES') == 2
+
+    factory = RegexBuilder(
+        user_data='Interface word(var_name) is up\nmtu digits(var_mtu) bytes'
+    )
+    factory.build()
+    assert factory.analyze() is True
+    assert 'glue: SKIPPED' in factory.analysis_report
+    assert factory.analysis_report.count('safe: YES') == 2
+
+    factory = RegexBuilder(user_data='Interface word(var_name) is up\nabc')
+    factory.build()
+    factory.patterns[0].line_patterns[1] = '(a+)+$'
+    assert factory.analyze() is False
+    assert 'nested quantifier' in factory.analysis_report
@@ -0,0 +1,97 @@
+import os
+import pytest
+
+from regexapp.batch import get_batch_items
+from regexapp.batch import run_batch
+from regexapp.batch import get_batch_report
+from regexapp.exceptions import BatchError
+from regexapp.main import run_cli
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    folder = tmp_path / 'templates'
+    folder.mkdir()
+    (folder / 'a.txt').write_text('abc digits(var_v1)\n')
+    (folder / 'a.test.txt').write_text('abc 12\n')
+    (folder / 'b.txt').write_text('word(var_w) end()\n')
+    return folder
+
+
+class TestBatch:
+    def test_get_batch_items_of_directory(self, template_dir):
+        items = get_batch_items(str(template_dir), platform='pytest', no_cache=True)
+        assert [name for name, _ in items] == ['a', 'b']
+        args_a, args_b = items[0][1], items[1][1]
+        assert args_a[0] == '--user-data=file::{}'.format(template_dir / 'a.txt')
+        assert args_a[1] == '--test-data=file::{}'.format(template_dir / 'a.test.txt')
+        assert args_a[2:] == ['--platform=pytest', '--no-cache']
+        assert args_b[1:] == ['--no-cache']
+
+    def test_get_batch_items_of_manifest(self, tmp_path, template_dir):
+        manifest = tmp_path / 'manifest.yaml'
+        manifest.write_text(
+            'defaults:\n'
+            '  config: "author: John"\n'
+            'items:\n'
+            '  - name: show version\n'
+            '    user_data: file::templates/a.txt\n'
+            '    test_data: file::templates/a.test.txt\n'
+            '    test: true\n'
+            '  - user_data: "digits(var_v1)"\n'
+            '  - name: show version\n'
+            '    user_data: "digits(var_v1)"\n'
+        )
+        items = get_batch_items(str(manifest))
+        assert [name for name, _ in items] == ['show_version', 'item_2', 'show_version_2']
+        assert items[0][1] == [
+            '--user-data=file::{}'.format(template_dir / 'a.txt'),
+            '--test-data=file::{}'.format(template_dir / 'a.test.txt'),
+            '--run-test',
+            '--config=author: John',
+        ]
+        assert items[1][1] == ['--user-data=digits(var_v1)', '--config=author: John']
+
+    @pytest.mark.parametrize(
+        'content',
+        [
+            'abc',
+            'items:\n  - test_data: abc\n',
+            'defaults: abc\nitems: []\n',
+        ]
+    )
+    def test_invalid_manifest(self, tmp_path, content):
+        manifest = tmp_path / 'manifest.yml'
+        manifest.write_text(content)
+        with pytest.raises(BatchError):
+            get_batch_items(str(manifest))
+
+    def test_no_template(self, tmp_path):
+        with pytest.raises(BatchError):
+            get_batch_items(str(tmp_path / '*.txt'))
+
+    def test_run_batch(self, tmp_path, template_dir):
+        output_dir = tmp_path / 'output'
+        items = get_batch_items(str(template_dir), test=True)
+        items.append(('missing', ['--user-data=file::{}'.format(tmp_path / 'none.txt')]))
+        results = run_batch(items, output_dir=str(output_dir))
+
+        assert [result['exit_code'] for result in results] == [0, 0, 1]
+        assert results[2]['failure'].startswith('*** FileNotFoundError')
+        assert sorted(os.listdir(output_dir)) == ['a.txt', 'b.txt', 'missing.txt']
+        assert "matched: [{'v1': '12'}]" in (output_dir / 'a.txt').read_text()
+        assert (output_dir / 'b.txt').read_text() == 'pattern = r"(?P<w>[a-zA-Z0-9]+)$"\n'
+
+        report = get_batch_report(results)
+        assert 'Processed 3 items, 1 failures' in report
+        assert 'missing (code 1): *** FileNotFoundError' in report
+
+    def test_run_cli_with_batch(self, tmp_path, template_dir):
+        output_dir = tmp_path / 'output'
+        args = ['--batch', str(template_dir), '-p', 'unittest',
+                '--output-dir', str(output_dir), '-j', '2']
+        exit_code, output = run_cli(args)
+        assert exit_code == 0
+        assert 'Processed 2 items, 0 failures' in output
+        assert sorted(os.listdir(output_dir)) == ['a.py', 'b.txt']
+        assert 'import unittest' in (output_dir / 'a.py').read_text()
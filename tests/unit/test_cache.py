@@ -0,0 +1,194 @@
+import os
+import pytest
+import yaml
+
+from regexapp import LinePattern
+from regexapp import RegexBuilder
+from regexapp import add_reference
+from regexapp import remove_reference
+from regexapp import core
+from regexapp.cache import YAMLCache
+from regexapp.cache import BuildCache
+from regexapp.cache import MemoryBuildCache
+
+
+@pytest.fixture
+def yaml_file(tmp_path):
+    filename = tmp_path / 'references.yaml'
+    filename.write_text('name:\n  pattern: "abc"\n')
+    yield filename
+
+
+class TestYAMLCache:
+    def test_load_and_reuse_cache(self, tmp_path, yaml_file, monkeypatch):
+        cache = YAMLCache(cache_dir=str(tmp_path / 'cache'))
+        assert cache.load(yaml_file) == dict(name=dict(pattern='abc'))
+        assert os.path.isfile(cache.get_cache_filename(yaml_file))
+
+        def fail(*args, **kwargs):
+            raise AssertionError('YAML file should not be parsed')
+        monkeypatch.setattr(yaml, 'load', fail)
+        assert cache.load(yaml_file) == dict(name=dict(pattern='abc'))
+
+    def test_stale_cache(self, tmp_path, yaml_file):
+        cache = YAMLCache(cache_dir=str(tmp_path / 'cache'))
+        cache.load(yaml_file)
+        yaml_file.write_text('name:\n  pattern: "abcdef"\n')
+        assert cache.load(yaml_file) == dict(name=dict(pattern='abcdef'))
+
+    def test_corrupted_or_unwritable_cache(self, tmp_path, yaml_file):
+        cache = YAMLCache(cache_dir=str(tmp_path / 'cache'))
+        cache.load(yaml_file)
+        with open(cache.get_cache_filename(yaml_file), 'wb') as stream:
+            stream.write(b'corrupted')
+        assert cache.load(yaml_file) == dict(name=dict(pattern='abc'))
+
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('')
+        cache = YAMLCache(cache_dir=str(blocker / 'cache'))
+        assert cache.load(yaml_file) == dict(name=dict(pattern='abc'))
+
+    def test_clear(self, tmp_path, yaml_file):
+        cache = YAMLCache(cache_dir=str(tmp_path / 'cache'))
+        cache.load(yaml_file)
+        cache.clear()
+        assert not os.listdir(cache.cache_dir)
+
+
+class TestBuildCache:
+    def test_save_and_load(self, tmp_path):
+        cache = BuildCache(filename=str(tmp_path / 'cache' / 'build.sqlite3'))
+        assert cache.load(['missing']) == dict()
+
+        pattern = LinePattern('abc digits(var_v1)')
+        key = BuildCache.get_key('abc digits(var_v1)', is_line=True)
+        cache.save({key: pattern})
+
+        table = cache.load([key, 'missing'])
+        assert list(table) == [key]
+        assert table[key] == pattern
+        assert table[key].statement == pattern.statement
+        assert [var.name for var in table[key].variables] == ['v1']
+
+    def test_key(self):
+        key = BuildCache.get_key('abc', is_line=True, digest='x')
+        assert key == BuildCache.get_key('abc', is_line=True, digest='x')
+        assert key != BuildCache.get_key('abc', is_line=True, digest='y')
+        assert key != BuildCache.get_key('abc', is_line=True, ignore_case=True, digest='x')
+
+    def test_max_entries(self, tmp_path):
+        cache = BuildCache(filename=str(tmp_path / 'build.sqlite3'), max_entries=2)
+        cache.save(dict(a=LinePattern('a')))
+        cache.save(dict(b=LinePattern('b'), c=LinePattern('c')))
+        assert sorted(cache.load(['a', 'b', 'c'])) == ['b', 'c']
+
+    def test_corrupted_or_unwritable_cache(self, tmp_path):
+        filename = tmp_path / 'build.sqlite3'
+        filename.write_bytes(b'corrupted')
+        cache = BuildCache(filename=str(filename))
+        cache.save(dict(a=LinePattern('a')))
+        assert cache.load(['a']) == dict()
+
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('')
+        cache = BuildCache(filename=str(blocker / 'build.sqlite3'))
+        cache.save(dict(a=LinePattern('a')))
+        assert cache.load(['a']) == dict()
+
+    def test_rebuild_changed_lines(self, tmp_path, monkeypatch):
+        cache = BuildCache(filename=str(tmp_path / 'build.sqlite3'))
+        user_data = ['abc digits(var_v1)', 'xyz words(var_v2)', 'end line']
+        factory = RegexBuilder(user_data=user_data, is_line=True)
+        factory.build(cache=cache)
+
+        built_data = []
+        original_build_patterns = core.build_patterns
+
+        def build_patterns(lst_of_user_data, **kwargs):
+            built_data.extend(lst_of_user_data)
+            return original_build_patterns(lst_of_user_data, **kwargs)
+        monkeypatch.setattr(core, 'build_patterns', build_patterns)
+
+        other_data = ['abc digits(var_v1)', 'xyz letters(var_v2)', 'end line']
+        other = RegexBuilder(user_data=other_data, is_line=True)
+        other.build(cache=cache)
+        assert built_data == ['xyz letters(var_v2)']
+        assert other.patterns[0] == factory.patterns[0]
+        assert other.patterns[2] == factory.patterns[2]
+
+        expected = RegexBuilder(user_data=other_data, is_line=True)
+        expected.build()
+        assert other.patterns == expected.patterns
+
+    def test_reference_change_invalidates_cache(self, tmp_path):
+        cache = BuildCache(filename=str(tmp_path / 'build.sqlite3'))
+        factory = RegexBuilder(user_data='abc cache_keyword()', is_line=True)
+        factory.build(cache=cache)
+        assert factory.patterns == ['abc cache_keyword\\(\\)']
+
+        add_reference(name='cache_keyword', pattern=r'\d+[a-z]')
+        try:
+            other = RegexBuilder(user_data='abc cache_keyword()', is_line=True)
+            other.build(cache=cache)
+            assert other.patterns == ['abc \\d+[a-z]']
+        finally:
+            remove_reference(name='cache_keyword')
+
+    def test_multiline_incremental_rebuild(self, tmp_path, monkeypatch):
+        cache = BuildCache(filename=str(tmp_path / 'build.sqlite3'))
+        user_data = 'abc digits(var_v1)\nmtu digits(var_mtu) bytes\nxyz word(var_w)'
+        factory = RegexBuilder(user_data=user_data)
+        factory.build(cache=cache)
+
+        built = []
+        original = RegexBuilder.build_patterns.__func__
+
+        def build_patterns(cls, lst_of_user_data, **kwargs):
+            built.extend(lst_of_user_data)
+            return original(cls, lst_of_user_data, **kwargs)
+
+        monkeypatch.setattr(RegexBuilder, 'build_patterns', classmethod(build_patterns))
+        user_data = user_data.replace('mtu digits', 'MTU digits')
+        factory = RegexBuilder(user_data=user_data)
+        factory.build(cache=cache)
+        assert built == ['MTU digits(var_mtu) bytes']
+
+        expected = RegexBuilder(user_data=user_data)
+        expected.build()
+        assert factory.patterns == expected.patterns
+        pattern = factory.patterns[0]
+        assert pattern.line_patterns == expected.patterns[0].line_patterns
+        assert [var.name for var in pattern.line_patterns[1].variables] == ['mtu']
+
+
+class TestMemoryBuildCache:
+    def test_save_and_load(self):
+        cache = MemoryBuildCache(max_entries=2)
+        cache.save(dict(a=LinePattern('a'), b=LinePattern('b')))
+        assert list(cache.load(['a', 'missing'])) == ['a']
+
+        cache.save(dict(c=LinePattern('c')))
+        assert list(cache.load(['a', 'b', 'c'])) == ['a', 'c']
+        assert len(cache) == 2
+
+        cache.clear()
+        assert cache.load(['a']) == dict()
+
+    def test_rebuild_changed_lines(self, monkeypatch):
+        cache = MemoryBuildCache()
+        factory = RegexBuilder(user_data='abc digits(var_v1)\nxyz', is_line=True)
+        factory.build(cache=cache)
+        assert len(cache) == 2
+
+        built = []
+        original = RegexBuilder.build_patterns.__func__
+
+        def build_patterns(cls, lst_of_user_data, **kwargs):
+            built.extend(lst_of_user_data)
+            return original(cls, lst_of_user_data, **kwargs)
+
+        monkeypatch.setattr(RegexBuilder, 'build_patterns', classmethod(build_patterns))
+        factory = RegexBuilder(user_data='abc digits(var_v1)\nxyz word(var_w)', is_line=True)
+        factory.build(cache=cache)
+        assert built == ['xyz word(var_w)']
+        assert factory.patterns[0] == 'abc (?P<v1>\\d+)'
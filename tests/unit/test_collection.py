@@ -1,13 +1,23 @@
 import pytest       # noqa
+import os
 import re
+import random
+import sys
+import subprocess
+from pathlib import Path
 from textwrap import dedent
 
+import regexapp
+
 from regexapp import PatternReference
 from regexapp import TextPattern
 from regexapp import ElementPattern
 from regexapp import LinePattern
 from regexapp import PatternBuilder
 from regexapp import MultilinePattern
+from regexapp.collection import do_soft_regex_escape
+from regexapp.exceptions import PatternReferenceError
+from regexapp.exceptions import EscapePatternError
 
 
 class TestPatternReference:
@@ -15,6 +25,286 @@ class TestPatternReference:
         obj = PatternReference()
         assert obj.get('word').get('pattern') == r'[a-zA-Z0-9]+'
 
+    def test_lazy_initialization(self):
+        obj = PatternReference(lazy=True)
+        assert obj.is_loaded is False
+        assert 'word' in obj
+        assert obj.is_loaded is True
+        assert obj.baseline['word'] == obj['word']
+
+    def test_inline_overlay(self):
+        obj = PatternReference()
+        generation = obj.generation
+        datetime_node = obj['datetime']
+
+        obj.set_inline('file_type', dict(pattern=r'\S'))
+        obj.set_inline('datetime', dict(datetime_node, format99='%Y'))
+        assert obj.is_inline('file_type') and obj.is_inline('datetime')
+        assert obj['datetime']['format99'] == '%Y'
+        assert 'format99' not in obj.baseline['datetime']
+        assert 'file_type' not in obj.baseline
+        assert obj.generation == generation + 2
+
+        snapshot = obj.snapshot()
+        obj.remove_inline('file_type')
+        obj.remove_inline('datetime')
+        assert 'file_type' not in obj
+        assert obj['datetime'] is datetime_node
+
+        obj.restore(snapshot)
+        assert obj['file_type'] == dict(pattern=r'\S')
+        assert obj['datetime']['format99'] == '%Y'
+
+        obj.restore(dict())
+        assert not obj.snapshot()
+        with pytest.raises(TypeError):
+            obj.baseline['word'] = dict()
+
+    def test_failed_loading_is_reset(self, tmp_path):
+        filename = tmp_path / 'user_references.yaml'
+        filename.write_text('file_type: [unclosed\n')
+        obj = PatternReference(lazy=True)
+        obj.user_ref_loc = str(filename)
+        for _ in range(2):
+            with pytest.raises(PatternReferenceError):
+                'word' in obj
+            assert obj.is_loaded is False
+            assert isinstance(obj.load_error, PatternReferenceError)
+            assert dict.__len__(obj) == 0 and not obj._baseline
+
+        filename.write_text('file_type:\n  pattern: "[a-z]+"\n')
+        assert obj['file_type']['pattern'] == '[a-z]+'
+        assert obj.is_loaded is True and obj.load_error is None
+        assert obj.baseline['word'] == obj['word']
+
+        obj.set_inline('interface', dict(pattern=r'\S+'))
+        filename.write_text('file_type: [unclosed\n')
+        with pytest.raises(PatternReferenceError):
+            obj.reload()
+        assert obj.is_loaded is False and not obj._baseline
+        filename.write_text('')
+        assert 'word' in obj and obj['interface'] == dict(pattern=r'\S+')
+
+    def test_pop_and_delete_inline(self):
+        obj = PatternReference()
+        word_node = obj['word']
+        obj.set_inline('file_type', dict(pattern=r'\S'))
+        obj.set_inline('word', dict(pattern=r'\w+'))
+
+        generation = obj.generation
+        assert obj.pop('file_type', None) == dict(pattern=r'\S')
+        assert 'file_type' not in obj and not obj.is_inline('file_type')
+        assert obj.pop('file_type', 'default') == 'default'
+        with pytest.raises(KeyError):
+            obj.pop('file_type')
+
+        obj['word'] = dict(pattern=r'\w{2,}')
+        assert obj.is_inline('word') and obj.baseline['word'] == word_node
+        del obj['word']
+        assert 'word' not in obj and 'word' not in obj.baseline
+        with pytest.raises(KeyError):
+            del obj['word']
+        assert obj.generation == generation + 3
+
+    def test_setdefault_popitem_and_clear(self):
+        obj = PatternReference()
+        generation = obj.generation
+        assert obj.setdefault('word') == obj['word']
+        assert obj.generation == generation
+
+        assert obj.setdefault('file_type', dict(pattern=r'\S')) == dict(pattern=r'\S')
+        assert obj.baseline['file_type'] == dict(pattern=r'\S')
+        assert obj.popitem() == ('file_type', dict(pattern=r'\S'))
+        assert 'file_type' not in obj.baseline
+        assert obj.generation == generation + 2
+
+        obj.set_inline('interface', dict(pattern=r'\S+'))
+        obj.clear()
+        assert len(obj) == 0 and not obj.baseline and not obj.snapshot()
+        assert obj.generation == generation + 4
+        with pytest.raises(KeyError):
+            obj.popitem()
+
+    def test_reload(self, tmp_path):
+        filename = tmp_path / 'user_references.yaml'
+        filename.write_text('file_type:\n  pattern: "[a-z]+"\n')
+        obj = PatternReference(lazy=True)
+        obj.user_ref_loc = str(filename)
+        assert obj['file_type']['pattern'] == '[a-z]+'
+
+        obj.set_inline('interface', dict(pattern=r'\S+'))
+        filename.write_text('file_type:\n  pattern: "[a-z]+[.][a-z]+"\n')
+        generation = obj.generation
+        obj.reload()
+        assert obj.generation > generation
+        assert obj['file_type']['pattern'] == '[a-z]+[.][a-z]+'
+        assert obj['interface'] == dict(pattern=r'\S+')
+        assert obj.baseline['word'] == obj['word']
+
+    def test_system_keys_are_cached(self):
+        sys_keys = PatternReference.get_system_keys()
+        assert isinstance(sys_keys, frozenset) and 'word' in sys_keys
+        assert PatternReference.get_system_keys() is sys_keys
+
+    def test_validating_content(self):
+        obj = PatternReference()
+        content = dedent("""
+            file_type:
+              group: "custom"
+              description: "a file type"
+              pattern: "\\\\S"
+            ---
+            file_size:
+              group: "custom"
+              description: "a file size"
+              pattern: "\\\\d+"
+        """)
+        assert obj.test(content) is True
+        assert obj.test_result == 'tested'
+
+    def test_reporting_every_violation(self):
+        obj = PatternReference()
+        content = dedent("""
+            word:
+              group: "custom"
+              description: "system keyword"
+              pattern: "\\\\w+"
+            file_type:
+              group: "custom"
+              pattern: "\\\\S"
+            ---
+            - a list document
+            ---
+            digits:
+              group: "custom"
+              description: "system keyword"
+              pattern: "\\\\d+"
+            file_type:
+              group: "custom"
+              description: "a file type"
+              pattern: "\\\\S"
+        """)
+        with pytest.raises(PatternReferenceError) as ex:
+            obj.test(content)
+        assert str(ex.value).splitlines() == [
+            'word is ALREADY existed in system_references.yaml',
+            'value of "file_type" MUST have "description" key',
+            'content must be structure of dictionary (document 2).',
+            'digits is ALREADY existed in system_references.yaml',
+            'file_type is DUPLICATED in document 3',
+        ]
+
+    def test_self_test_cases(self):
+        obj = PatternReference()
+        cases = {case[0]: case for case in obj.get_self_test_cases()}
+        name, patterns, positive, negative = cases['datetime.format1']
+        assert patterns == [obj['datetime']['format1']]
+        assert positive == [('pattern matches a datetime format1', '07/10/2021 08:56:45')]
+        assert len(negative) == 1
+        assert cases['word'][1] == [obj['word']['pattern']]
+
+    @pytest.mark.parametrize('workers', [None, 2])
+    def test_run_self_tests(self, workers):
+        obj = PatternReference()
+        node = {'pattern': '[a-z]+', 'positive test': dict(case='ABC')}
+        obj.set_inline('broken', node)
+        results = obj.run_self_tests(workers=workers)
+        assert [result['name'] for result in results] == [
+            case[0] for case in obj.get_self_test_cases()
+        ]
+        failed = [result for result in results if result['failures']]
+        assert [result['name'] for result in failed] == ['broken']
+        assert failed[0]['failures'] == ["positive test 'case' FAILED with 'ABC'"]
+
+        report = obj.get_self_test_report(results)
+        assert 'broken: positive test' in report
+        assert 'samples, 1 failures.' in report
+
+    @pytest.mark.skipif(not hasattr(sys, 'addaudithook'), reason='requires Python 3.8+')
+    def test_import_is_lazy(self):
+        code = dedent("""
+            import sys
+            opened = []
+            def audit(event, args):
+                if event == 'open' and str(args[0]).endswith(('.yaml', '.pickle')):
+                    opened.append(args[0])
+            sys.addaudithook(audit)
+
+            import regexapp
+            from regexapp.collection import REF, SYMBOL
+            print(REF.is_loaded, SYMBOL.is_loaded, len(opened))
+            regexapp.LinePattern('word(var_name) is up')
+            print(REF.is_loaded, SYMBOL.is_loaded, len(opened) > 0)
+        """)
+        env = dict(os.environ, PYTHONPATH=str(Path(regexapp.__file__).parent.parent))
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, env=env
+        )
+        # importing regexapp must not read any reference, symbol, or cache
+        # file while the eager path does, i.e. a deterministic check instead
+        # of a wall-clock budget.
+        assert result.stdout.split() == ['False', 'False', '0', 'True', 'False', 'True']
+
+
+def loop_based_soft_regex_escape(pattern, is_validated=True):
+    """the former loop-based implementation of do_soft_regex_escape"""
+    import string
+    pattern = str(pattern)
+    chk1, chk2 = string.punctuation + ' ', '^$.?*+|{}[]()'
+    result = []
+    for char in pattern:
+        echar = re.escape(char)
+        if char in chk1:
+            result.append(echar if char in chk2 else char)
+        else:
+            result.append(echar)
+    new_pattern = ''.join(result)
+    if is_validated:
+        try:
+            re.compile(new_pattern)
+        except Exception as ex:
+            raise EscapePatternError(ex)
+    return new_pattern
+
+
+class TestSoftRegexEscape:
+    def test_same_result_as_loop_based_escape(self):
+        alphabet = [chr(i) for i in range(128)] + list('\xe9\u212a\u3042\U0001f600')
+        rnd = random.Random(2021)
+        samples = [''.join(alphabet)]
+        samples += [
+            ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 40)))
+            for _ in range(3000)
+        ]
+        for text in samples:
+            try:
+                expected_result = loop_based_soft_regex_escape(text)
+            except EscapePatternError:
+                with pytest.raises(EscapePatternError):
+                    do_soft_regex_escape(text)
+            else:
+                assert do_soft_regex_escape(text) == expected_result
+            result = do_soft_regex_escape(text, is_validated=False)
+            assert result == loop_based_soft_regex_escape(text, is_validated=False)
+
+    @pytest.mark.parametrize(
+        ('data', 'expected_result'),
+        [
+            ('a.b (c) [d]', 'a\\.b \\(c\\) \\[d\\]'),
+            ('a\tb', 'a\\\tb'),
+            ('100% #1 @x', '100% #1 @x'),
+            ('\\d+', '\\d\\+'),
+        ]
+    )
+    def test_escape(self, data, expected_result):
+        assert do_soft_regex_escape(data) == expected_result
+
+    def test_invalid_escape(self):
+        with pytest.raises(EscapePatternError):
+            do_soft_regex_escape('abc\\')
+
 
 class TestTextPattern:
     @pytest.mark.parametrize(
@@ -398,6 +688,65 @@ class TestElementPattern:
         removed_tail_of_str_pattern = pattern.remove_tail_of_string()
         assert removed_tail_of_str_pattern == expected_pattern_after_removed
 
+    def test_memoized_pattern_keeps_metadata(self):
+        ElementPattern.clear_memo()
+        first = ElementPattern('words(var_v1, head_ws, or_empty)')
+        second = ElementPattern('words(var_v1, head_ws, or_empty)')
+        assert first == second
+        assert len(ElementPattern._memo) == 1
+        assert second.variable.name == 'v1'
+        assert second.variable is not first.variable
+        assert second.or_empty is True
+        assert second.prepended_pattern == first.prepended_pattern == '^\\s*'
+
+    def test_memo_invalidated_by_reference_change(self):
+        from regexapp import add_reference, remove_reference
+        pattern = ElementPattern('memo_keyword()')
+        assert pattern == 'memo_keyword\\(\\)'
+
+        add_reference(name='memo_keyword', pattern=r'\d+[a-z]')
+        try:
+            assert ElementPattern('memo_keyword()') == '\\d+[a-z]'
+        finally:
+            remove_reference(name='memo_keyword')
+        assert ElementPattern('memo_keyword()') == 'memo_keyword\\(\\)'
+
+    @pytest.mark.parametrize(
+        ('arg', 'expected_kind', 'expected_value'),
+        [
+            ('var_v1', 'var', 'v1'),
+            ('VAR_v1', 'var', 'v1'),
+            ('var_v 1', 'text', 'var_v 1'),
+            ('format1', 'format', 'format1'),
+            ('word_bound_left', 'word_bound', 'word_bound_left'),
+            ('head_just_ws_plus', 'head', 'head_just_ws_plus'),
+            ('tail_raw', 'tail', 'tail_raw'),
+            ('repetition_2_5', 'repetition', 'repetition_2_5'),
+            ('at_least_2_phrase_occurrences', 'occurrence', 'at_least_2_phrase_occurrences'),
+            ('meta_data_filldown', 'meta_data', 'meta_data_filldown'),
+            ('or_empty', 'or', 'empty'),
+            ('OR_digits', 'or', 'digits'),
+            ('word_bound_top', 'text', 'word_bound_top'),
+            ('abc', 'text', 'abc'),
+        ]
+    )
+    def test_classify_argument(self, arg, expected_kind, expected_value):
+        argument = ElementPattern.classify_argument(arg)
+        assert argument.kind == expected_kind
+        assert argument.text == arg
+        assert argument.value == expected_value
+
+    @pytest.mark.parametrize(
+        ('data', 'expected_pattern'),
+        [
+            ('choice(abc, repetition_2, format1)', 'abc|repetition_2|format1'),
+            ('data(a.b, or_empty)', '(a\\.b|)'),
+            ('digits(repetition_2, format1)', '(\\d+){2}|format1'),
+        ]
+    )
+    def test_unsupported_argument_kind_as_text(self, data, expected_pattern):
+        assert ElementPattern(data) == expected_pattern
+
 
 class TestLinePattern:
     @pytest.mark.parametrize(
@@ -1,10 +1,13 @@
 import pytest
+import re
 from textwrap import dedent
 from regexapp import RegexBuilder
 from regexapp import DynamicTestScriptBuilder
 from regexapp import add_reference
 from regexapp import remove_reference
+from regexapp.core import PatternCache
 from regexapp.exceptions import PatternReferenceError
+from regexapp.exceptions import RegexBuilderError
 from datetime import datetime
 from pathlib import Path, PurePath
 
@@ -436,3 +439,324 @@ class TestDynamicGenTestScript:
         )
         test_script = factory.create_python_test()
         assert test_script == tc_info.expected_snippet_script_for_multiline_pattern
+
+
+class TestPatternCache:
+    def test_compile_and_counters(self):
+        cache = PatternCache(maxsize=2)
+        first = cache.compile(r'\d+')
+        assert cache.compile(r'\d+') is first
+        assert cache.hits == 1 and cache.misses == 1
+
+        cache.compile(r'\d+', flags=re.I)
+        assert cache.misses == 2 and len(cache) == 2
+
+    def test_lru_eviction(self):
+        cache = PatternCache(maxsize=2)
+        cache.compile('a')
+        cache.compile('b')
+        cache.compile('a')
+        cache.compile('c')
+        assert 'a' in cache and 'c' in cache
+        assert 'b' not in cache
+
+    def test_regexbuilder_test_uses_cache(self, tc_info):
+        RegexBuilder.pattern_cache.clear()
+        factory = RegexBuilder(
+            user_data=tc_info.user_data, test_data=tc_info.test_data,
+            is_line=True
+        )
+        factory.build()
+        factory.test()
+        factory.test()
+        cache = RegexBuilder.pattern_cache
+        assert cache.misses == len(factory.patterns)
+        assert cache.hits > 0
+
+
+class TestConcurrentBuild:
+    @staticmethod
+    def get_user_data(index):
+        fmt = ('Interface Ethernet{0}/word(var_port{1}) is up, mac_address(var_mac{1}) '
+               'digits(var_mtu{1}, or_empty) data(MTU) words(var_desc{0}, head_ws)')
+        return fmt.format(index, index % 13)
+
+    @staticmethod
+    def get_signature(factory):
+        return [
+            (str(pattern), [v.value for v in getattr(pattern, 'variables', [])])
+            for pattern in factory.patterns
+        ]
+
+    def test_building_lines_from_many_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        import sys
+
+        lst_of_user_data = [
+            [self.get_user_data(i * 50 + j) for j in range(50)] for i in range(40)
+        ]
+
+        def build(user_data, is_line=True):
+            factory = RegexBuilder(user_data=user_data, is_line=is_line)
+            factory.build()
+            return self.get_signature(factory)
+
+        expected_result = [build(user_data) for user_data in lst_of_user_data]
+        expected_multiline = [
+            build(['\n'.join(user_data[:3])], is_line=False)
+            for user_data in lst_of_user_data
+        ]
+
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                lines = executor.map(build, lst_of_user_data)
+                multilines = executor.map(
+                    lambda data: build(['\n'.join(data[:3])], is_line=False),
+                    lst_of_user_data
+                )
+                result, multiline_result = list(lines), list(multilines)
+        finally:
+            sys.setswitchinterval(old_interval)
+
+        assert result == expected_result
+        assert multiline_result == expected_multiline
+
+
+class TestParallelBuild:
+    @staticmethod
+    def get_tables(factory):
+        return (
+            [str(pattern) for pattern in factory.patterns],
+            [(k, str(v)) for k, v in factory.user_data_pattern_table.items()],
+            [(str(k), v) for k, v in factory.pattern_user_data_table.items()],
+        )
+
+    @pytest.fixture
+    def lst_of_user_data(self):
+        lst = [
+            'Interface word(var_name{}) is up, mtu digits(var_mtu)'.format(i % 7)
+            for i in range(60)
+        ]
+        lst.append(lst[0])
+        lst.append('start() file_type(var_file_type) end()')
+        return lst
+
+    def test_building_over_thread_pool(self, lst_of_user_data):
+        from concurrent.futures import ThreadPoolExecutor
+
+        serial = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+        serial.build()
+
+        factory = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            factory.build(executor=executor)
+        assert self.get_tables(factory) == self.get_tables(serial)
+
+    def test_building_over_process_pool(self, lst_of_user_data):
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        add_reference(name='file_type', pattern=r'[-dl]')
+        try:
+            serial = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+            serial.build()
+
+            context = multiprocessing.get_context('spawn')
+            factory = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+            with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+                factory.build(executor=executor)
+        finally:
+            remove_reference(name='file_type')
+
+        assert self.get_tables(factory) == self.get_tables(serial)
+        assert factory.patterns[-1].variables[0].name == 'file_type'
+        assert factory.patterns[-1] == '^(?P<file_type>[-dl])$'
+
+    def test_building_with_workers(self, lst_of_user_data):
+        serial = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+        serial.build()
+
+        factory = RegexBuilder(user_data=lst_of_user_data, is_line=True)
+        factory.build(workers=2)
+        assert self.get_tables(factory) == self.get_tables(serial)
+
+
+class TestStreamTest:
+    @pytest.fixture
+    def stream_info(self):
+        user_data = dedent("""
+            Interface word(var_name) is up
+            mtu digits(var_mtu) bytes
+        """).strip()
+        lines = ['Interface eth{} is up\n'.format(i % 3) for i in range(20)]
+        lines.append('  mtu 1500 bytes\r\n')
+        yield user_data, lines
+
+    @pytest.mark.parametrize('use_mmap', [False, True])
+    def test_streaming_file(self, stream_info, tmp_path, use_mmap):
+        user_data, lines = stream_info
+        filename = tmp_path / 'test_data.log'
+        filename.write_bytes(''.join(lines).encode())
+
+        factory = RegexBuilder(user_data=user_data, is_line=True)
+        factory.build()
+        records = list(factory.test_stream(filename, use_mmap=use_mmap, sample_size=2))
+        assert len(records) == 21
+        assert records[-1]['line_number'] == 21
+        assert records[-1]['index'] == 1
+        assert records[-1]['groupdict'] == dict(mtu='1500')
+
+        result = factory.stream_test_result
+        assert result.total_lines == 21
+        assert result.counters == [20, 1]
+        assert result.samples[0] == [(1, dict(name='eth0')), (2, dict(name='eth1'))]
+        assert factory.test_result is True
+        assert 'Test Data' not in factory.test_report
+        assert 'matched: 20' in factory.test_report
+
+    def test_streaming_iterable(self, stream_info):
+        user_data, lines = stream_info
+        factory = RegexBuilder(user_data=user_data, is_line=True)
+        factory.build()
+        records = factory.test_stream(line for line in lines[:5])
+        assert next(records)['groupdict'] == dict(name='eth0')
+        assert len(list(records)) == 4
+        assert factory.stream_test_result.counters == [5, 0]
+        assert factory.test_result is False
+
+    def test_streaming_multiline_patterns(self, stream_info):
+        user_data, lines = stream_info
+        factory = RegexBuilder(user_data=user_data)
+        factory.build()
+        with pytest.raises(RegexBuilderError):
+            list(factory.test_stream(lines))
+
+
+class TestParse:
+    @pytest.fixture
+    def line_builder(self):
+        user_data = dedent("""
+            Interface word(var_name) is up
+            mtu digits(var_mtu) bytes
+        """).strip()
+        factory = RegexBuilder(user_data=user_data, is_line=True)
+        factory.build()
+        yield factory
+
+    def test_parse(self, line_builder):
+        data = 'Interface eth0 is up\n  mtu 1500 bytes\nother\nInterface eth1 is up'
+        records = line_builder.parse(data)
+        assert records == [
+            dict(line_number=1, index=0, name='eth0'),
+            dict(line_number=2, index=1, mtu='1500'),
+            dict(line_number=4, index=0, name='eth1'),
+        ]
+
+    def test_parse_columnar(self, line_builder):
+        data = ['Interface eth0 is up', 'mtu 1500 bytes', 'Interface eth1 is up']
+        columns = line_builder.parse(data, columnar=True)
+        assert list(columns) == ['line_number', 'index', 'name', 'mtu']
+        assert list(columns['line_number']) == [1, 2, 3]
+        assert list(columns['index']) == [0, 1, 0]
+        assert columns['name'] == ['eth0', None, 'eth1']
+        assert columns['mtu'] == [None, '1500', None]
+
+        columns = line_builder.parse('', columnar=True)
+        assert list(columns) == ['line_number', 'index']
+        assert len(columns['line_number']) == 0
+
+    def test_parse_iter_file(self, line_builder, tmp_path):
+        filename = tmp_path / 'test_data.log'
+        filename.write_text('Interface eth0 is up\r\nmtu 9000 bytes\r\n')
+        records = line_builder.parse_iter(filename)
+        assert next(records) == dict(line_number=1, index=0, name='eth0')
+        assert list(records) == [dict(line_number=2, index=1, mtu='9000')]
+        assert line_builder.test_report == ''
+
+    def test_parse_multiline(self):
+        user_data = 'Interface word(var_name) is up\nmtu digits(var_mtu) bytes'
+        factory = RegexBuilder(user_data=user_data)
+        factory.build()
+        data = 'other\nInterface eth0 is up\nmtu 1500 bytes'
+        records = factory.parse(data)
+        assert records == [dict(line_number=2, index=0, name='eth0', mtu='1500')]
+
+    def test_parse_multiline_blocks(self):
+        user_data = 'Interface word(var_name) is up\nmtu digits(var_mtu) bytes'
+        factory = RegexBuilder(user_data=user_data)
+        factory.build()
+        data = ('Interface eth0 is up\nmtu 1500 bytes\n'
+                'Interface eth1 is up\ndescription x\nmtu 9000 bytes')
+        records = factory.parse(data)
+        assert records == [
+            dict(line_number=1, index=0, name='eth0', mtu='1500'),
+            dict(line_number=3, index=0, name='eth1', mtu='9000'),
+        ]
+
+    def test_parse_adversarial_multiline(self):
+        user_data = 'Interface word(var_name) is up\nmtu digits(var_mtu) bytes'
+        factory = RegexBuilder(user_data=user_data)
+        factory.build()
+        factory.multiline_threshold = 100
+        lines = ['Interface eth{} is up'.format(i) if i % 50 == 0 else ' ' * 80
+                 for i in range(20000)]
+        records = factory.parse_iter(iter(lines))
+        assert list(records) == []
+
+        lines.extend(['Interface eth0 is up'] + ['x'] * 100 + ['mtu 1500 bytes'])
+        assert factory.parse(lines) == []
+
+    def test_parse_reserved_variable(self):
+        factory = RegexBuilder(user_data='line digits(var_index)', is_line=True)
+        factory.build()
+        with pytest.raises(RegexBuilderError):
+            factory.parse('line 1')
+
+
+class TestIterRecords:
+    def test_build_records(self):
+        factory = RegexBuilder(user_data='abc digits(var_v1)\nxyz', is_line=True)
+        factory.build()
+        records = list(factory.iter_records())
+        assert records == [
+            dict(type='pattern', index=0, pattern='abc (?P<v1>\\d+)',
+                 variables=[dict(name='v1', pattern='\\d+', option='')]),
+            dict(type='pattern', index=1, pattern='xyz', variables=[]),
+        ]
+
+    def test_line_test_records(self):
+        factory = RegexBuilder(user_data='abc digits(var_v1)\nxyz',
+                               test_data='abc 1\nother\nabc 2', is_line=True)
+        factory.build()
+        records = [r for r in factory.iter_records(tested=True) if r['type'] != 'pattern']
+        assert records == [
+            dict(type='match', index=0, line_number=1, groups=dict(v1='1')),
+            dict(type='match', index=0, line_number=3, groups=dict(v1='2')),
+            dict(type='result', index=0, match_count=2, matched=True),
+            dict(type='result', index=1, match_count=0, matched=False),
+            dict(type='summary', test_result=False),
+        ]
+
+    def test_multiline_test_records(self):
+        factory = RegexBuilder(user_data='abc digits(var_v1)\nxyz word(var_w)',
+                               test_data=['first\nline', 'abc 1\nxyz q'])
+        factory.build()
+        records = list(factory.iter_records(tested=True))
+        assert [r['name'] for r in records[0]['variables']] == ['v1', 'w']
+        assert records[1:] == [
+            dict(type='match', index=0, line_number=3, groups=dict(v1='1', w='q')),
+            dict(type='result', index=0, match_count=1, matched=True),
+            dict(type='summary', test_result=True),
+        ]
+
+    def test_stream_records(self):
+        factory = RegexBuilder(user_data='abc digits(var_v1)', is_line=True)
+        factory.build()
+        lines = iter(['abc 1\n', 'abc 2\n'])
+        records = factory.iter_records(tested=True, stream=lines)
+        assert next(records)['type'] == 'pattern'
+        assert next(records)['groups'] == dict(v1='1')
+        assert next(lines) == 'abc 2\n'
+        assert [r['type'] for r in records] == ['result', 'summary']
@@ -0,0 +1,53 @@
+import pickle
+
+from regexapp import ElementPattern
+from regexapp import LinePattern
+from regexapp.ir import TextNode
+from regexapp.ir import ElementNode
+from regexapp.ir import emit
+
+
+class TestNode:
+    def test_text_node_kind(self):
+        assert TextNode.create(' +', text='  ').kind == 'whitespace'
+        assert TextNode.create('abc', text='abc').kind == 'literal'
+        assert TextNode.create('abc').is_derived is False
+
+    def test_element_node_kind(self):
+        assert ElementNode.from_pattern(ElementPattern('start()')).kind == 'anchor'
+        assert ElementNode.from_pattern(ElementPattern('end(ws)')).kind == 'anchor'
+        node = ElementNode.from_pattern(ElementPattern('digits(var_v1)'))
+        assert node.kind == 'element'
+        assert node.statement == '${v1}'
+
+    def test_remove_head_and_tail_of_string(self):
+        node = ElementNode.from_pattern(ElementPattern('digits(head_ws, tail_ws)'))
+        assert node.pattern == '^\\s*\\d+\\s*$'
+        node.remove_head_of_string()
+        node.remove_tail_of_string()
+        assert node.pattern == '\\d+'
+        assert node.prepended_pattern == node.appended_pattern == ''
+
+
+class TestLinePatternNodes:
+    def test_nodes(self):
+        pattern = LinePattern('start() abc  digits(var_v1) end()', ignore_case=True)
+        kinds = [node.kind for node in pattern.nodes]
+        assert kinds == ['flag', 'anchor', 'literal', 'element', 'anchor']
+        assert emit(pattern.nodes) == pattern
+        assert pattern.items == ['(?i)', '^', 'abc +', '(?P<v1>\\d+)', '$']
+        assert pattern.statement == '(?i)^abc +${v1}$'
+
+    def test_rewritten_element_is_text(self):
+        pattern = LinePattern('digits(var_v1)\tword(or_empty)')
+        first, second = pattern.nodes[:2]
+        assert first.kind == 'element'
+        assert second.kind == 'whitespace'
+        assert second.pattern == '\\s*'
+
+    def test_pickled_pattern_keeps_nodes(self):
+        pattern = LinePattern('abc digits(var_v1)')
+        other = pickle.loads(pickle.dumps(pattern))
+        assert other == pattern
+        assert other.statement == pattern.statement
+        assert [node.kind for node in other.nodes] == ['literal', 'element']
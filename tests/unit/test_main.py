@@ -0,0 +1,85 @@
+import io
+import json
+import pytest
+
+from regexapp import RegexBuilder
+from regexapp.main import run_cli
+
+
+class TestCliOutput:
+    def test_json_output(self):
+        args = ['-u', 'abc digits(var_v1)', '-t', 'abc 12',
+                '-r', '--output', 'json', '--no-cache']
+        exit_code, output = run_cli(args)
+        document = json.loads(output)
+        assert exit_code == 0
+        assert document['test_result'] is True
+        assert document['patterns'][0]['match_count'] == 1
+        assert document['matches'] == [dict(index=0, line_number=1, groups=dict(v1='12'))]
+
+    def test_ndjson_output(self):
+        args = ['-u', 'digits(var_v1)', '--output', 'ndjson', '--no-cache']
+        exit_code, output = run_cli(args)
+        records = [json.loads(line) for line in output.splitlines()]
+        assert exit_code == 0
+        assert records == [
+            dict(type='pattern', index=0, pattern='(?P<v1>\\d+)',
+                 variables=[dict(name='v1', pattern='\\d+', option='')])
+        ]
+
+    @pytest.mark.parametrize('output_format', ['json', 'ndjson'])
+    def test_structured_output_with_platform(self, output_format):
+        args = ['-u', 'abc', '-t', 'abc', '-p', 'pytest', '--output', output_format]
+        exit_code, output = run_cli(args)
+        assert exit_code == 1
+        assert output == '*** CANT generate pytest test script with --output {}.'.format(output_format)
+
+    def test_structured_test_output_without_pattern(self, monkeypatch):
+        monkeypatch.setattr(RegexBuilder, 'build_patterns',
+                            classmethod(lambda cls, lst_of_user_data, **kwargs: []))
+        args = ['-u', 'abc', '-t', 'abc', '-r', '--output', 'ndjson', '--no-cache']
+        exit_code, output = run_cli(args)
+        assert exit_code == 1
+        assert [json.loads(line) for line in output.splitlines()] == [
+            dict(type='error', message='CANT generate regex pattern from\nabc')
+        ]
+
+    def test_text_output(self):
+        exit_code, output = run_cli(['-u', 'digits(var_v1)', '--no-cache'])
+        assert exit_code == 0
+        assert output == 'pattern = r"(?P<v1>\\d+)"'
+
+
+class TestCliStdin:
+    def test_user_data_from_stdin(self, monkeypatch):
+        monkeypatch.setattr('sys.stdin', io.StringIO('digits(var_v1)\n'))
+        exit_code, output = run_cli(['-u', '-', '--no-cache'])
+        assert exit_code == 0
+        assert output == 'pattern = r"(?P<v1>\\d+)"'
+
+    def test_test_data_from_stdin(self, monkeypatch):
+        monkeypatch.setattr('sys.stdin', io.StringIO('abc 1\nother\nabc 2\n'))
+        args = ['-u', 'abc digits(var_v1)', '-t', '-', '-r',
+                '--config', 'is_line: True', '--no-cache']
+        exit_code, output = run_cli(args)
+        lines = output.splitlines()
+        assert exit_code == 0
+        assert lines[:3] == ["line 1 - pattern1: {'v1': '1'}",
+                             "line 3 - pattern1: {'v1': '2'}",
+                             'Tested Lines: 3']
+        assert lines[-1] == 'True'
+
+    def test_multiline_test_data_from_stdin(self, monkeypatch):
+        monkeypatch.setattr('sys.stdin', io.StringIO('abc 1\nxyz q\n'))
+        args = ['-u', 'abc digits(var_v1)\nxyz word(var_w)', '-t', '-', '-r',
+                '--output', 'ndjson', '--no-cache']
+        exit_code, output = run_cli(args)
+        records = [json.loads(line) for line in output.splitlines()]
+        assert exit_code == 0
+        assert records[1]['groups'] == dict(v1='1', w='q')
+        assert records[-1] == dict(type='summary', test_result=True)
+
+    def test_both_from_stdin(self):
+        exit_code, output = run_cli(['-u', '-', '-t', '-'])
+        assert exit_code == 1
+        assert output == '*** CANT read both user data and test data from stdin.'
@@ -0,0 +1,267 @@
+import pytest       # noqa
+from textwrap import dedent
+
+import re
+import pickle
+from regexapp import LinePattern
+from regexapp import MultilinePattern
+from regexapp import RegexBuilder
+from regexapp.matcher import CombinedMatcher
+from regexapp.matcher import MultilineMatcher
+from regexapp.matcher import PrefilterIndex
+from regexapp.matcher import get_required_literal
+from regexapp.exceptions import MatcherError
+
+
+@pytest.fixture
+def tc_info():
+    class TestInfo:
+        pass
+
+    test_info = TestInfo()
+
+    user_data = """
+        Interface word(var_name) is up
+        mtu digits(var_mtu) bytes, word(var_duplex) duplex
+        Description: words(var_desc)
+        Hardware is word(var_name), address is mac_address(var_mac)
+    """
+    test_data = """
+        Interface Ethernet0 is up
+          mtu 1500 bytes, full duplex
+          Description: uplink to core
+          Hardware is Ethernet, address is 00:11:22:33:44:55
+        Interface Ethernet1 is up
+          mtu 9000 bytes, half duplex
+    """
+    test_info.user_data = dedent(user_data).strip()
+    test_info.test_data = dedent(test_data).strip()
+    yield test_info
+
+
+class TestCombinedMatcher:
+    def test_branch_pattern(self):
+        pattern = LinePattern('Name: word(var_name)', ignore_case=True)
+        branch = CombinedMatcher.get_branch_pattern(pattern, 3)
+        assert branch == '(?P<_p3>(?i:Name: (?P<_p3_name>[a-zA-Z0-9]+)))'
+
+    def test_unmerged_pattern(self):
+        assert CombinedMatcher.get_branch_pattern(r'(a)\1', 0) == ''
+        matcher = CombinedMatcher(['abc', r'(a)\1'])
+        assert matcher.is_combined is False
+        with pytest.raises(MatcherError):
+            matcher.search('abc')
+
+    def test_size_limit(self):
+        matcher = CombinedMatcher(['abc', 'xyz'], max_size=10)
+        assert matcher.is_combined is False
+
+    def test_search(self):
+        patterns = [
+            LinePattern('Interface word(var_name) is up'),
+            LinePattern('Hardware is word(var_name)'),
+        ]
+        matcher = CombinedMatcher(patterns)
+        assert matcher.search('Hardware is Ethernet') == (1, dict(name='Ethernet'))
+        assert matcher.search('Interface Ethernet0 is up') == (0, dict(name='Ethernet0'))
+        assert matcher.search('no match') is None
+
+    def test_search_all(self):
+        patterns = [LinePattern('digits(var_n)'), LinePattern('word(var_w) digits(var_m)')]
+        matcher = CombinedMatcher(patterns)
+        assert matcher.search('eth 100') == (1, dict(w='eth', m='100'))
+        assert matcher.search_all('eth 100') == [
+            (0, dict(n='100')), (1, dict(w='eth', m='100'))
+        ]
+        assert matcher.search_all('no match') == []
+
+
+class TestRegexBuilderCombinedEngine:
+    def test_same_result_as_default_engine(self, tc_info):
+        default = RegexBuilder(
+            user_data=tc_info.user_data, test_data=tc_info.test_data,
+            is_line=True
+        )
+        default.build()
+        default.test()
+
+        combined = RegexBuilder(
+            user_data=tc_info.user_data, test_data=tc_info.test_data,
+            is_line=True
+        )
+        combined.build()
+        combined.test(engine='combined')
+
+        assert combined.test_result is default.test_result is True
+        assert combined.test_report == default.test_report
+        assert combined.test_data_pattern_table == default.test_data_pattern_table
+        assert combined.pattern_test_data_table == default.pattern_test_data_table
+
+    @pytest.mark.parametrize(
+        ('user_data', 'test_data'),
+        [
+            ('digits(var_n)\nword(var_w) digits(var_m)', 'eth 100'),
+            ('word(var_w) digits(var_m)\ndigits(var_n)', 'eth 100\n200'),
+            ('abc\nabc word(var_w)\nword(var_w)', 'abc xyz\nabc\nfoo'),
+        ]
+    )
+    def test_overlapping_patterns(self, user_data, test_data):
+        default = RegexBuilder(user_data=user_data, test_data=test_data, is_line=True)
+        default.build()
+        default.test()
+
+        combined = RegexBuilder(user_data=user_data, test_data=test_data, is_line=True)
+        combined.build()
+        combined.test(engine='combined')
+
+        lst_of_test_data = default.get_lst_of_test_data()
+        assert (combined.get_matched_result(lst_of_test_data, engine='combined')
+                == default.get_matched_result(lst_of_test_data))
+        assert combined.test_result is default.test_result is True
+        assert combined.test_report == default.test_report
+
+    def test_fallback_to_default_engine(self, tc_info):
+        factory = RegexBuilder(
+            user_data=tc_info.user_data, test_data=tc_info.test_data,
+            is_line=True
+        )
+        factory.build()
+        factory.patterns.append(r'(Interface) \S+ is (up)( \1)?')
+        factory.test(engine='combined')
+        expected_result = 'pattern: (Interface) \\S+ is (up)( \\1)?\nmatched: YES'
+        assert expected_result in factory.test_report
+        assert 'matched: NO' not in factory.test_report
+
+
+class TestPrefilterIndex:
+    @pytest.mark.parametrize(
+        ('user_data', 'ignore_case', 'expected_result'),
+        [
+            ('Interface word(var_name) is up', False, ('Interface ', False)),
+            ('  Hardware is word(var_hw), address is mac_address(var_mac)',
+             False, (', address is ', False)),
+            ('data(MTU) digits(var_mtu)', False, ('MTU ', False)),
+            ('digits(var_mtu)', False, ('', False)),
+            ('Interface word(var_name)', True, ('interface ', True)),
+        ]
+    )
+    def test_required_literal(self, user_data, ignore_case, expected_result):
+        pattern = LinePattern(user_data, ignore_case=ignore_case)
+        assert get_required_literal(pattern) == expected_result
+
+    def test_get_candidates(self):
+        patterns = [
+            LinePattern('Interface word(var_name) is up'),
+            LinePattern('digits(var_mtu)'),
+            LinePattern('mtu digits(var_mtu) bytes', ignore_case=True),
+        ]
+        prefilter = PrefilterIndex(patterns)
+        assert prefilter.get_candidates('Interface eth0 is up') == [0, 1]
+        assert prefilter.get_candidates('  MTU 1500 bytes') == [1, 2]
+        assert prefilter.get_candidates('  MTU\u212a 1500 bytes') == [1, 2]
+
+    def test_search_all(self):
+        patterns = [
+            LinePattern('Interface word(var_name) is up'),
+            LinePattern('mtu digits(var_mtu) bytes'),
+        ]
+        prefilter = PrefilterIndex(patterns)
+        lines = ['Interface eth0 is up', '  mtu 1500 bytes', 'Interface eth1 is down']
+        result = [
+            (line_index, index, match.groupdict())
+            for line_index, index, match in prefilter.search_all(lines)
+        ]
+        assert result == [(0, 0, dict(name='eth0')), (1, 1, dict(mtu='1500'))]
+
+    def test_regexbuilder_bulk_search(self, tc_info):
+        factory = RegexBuilder(user_data=tc_info.user_data, is_line=True)
+        factory.build()
+        result = list(factory.bulk_search(tc_info.test_data))
+        assert [(i, factory.patterns.index(p)) for i, p, _ in result] == [
+            (0, 0), (1, 1), (2, 2), (3, 3), (4, 0), (5, 1)
+        ]
+        assert result[-1][-1].groupdict() == dict(mtu='9000', duplex='half')
+
+
+class TestMultilineMatcher:
+    @pytest.mark.parametrize(
+        'text',
+        [
+            'Interface eth0 is up\n  mtu 1500 bytes\n',
+            'Interface eth0 is up\n  mtu 1500 bytes\nInterface eth1 is up\nmtu 9000 bytes',
+            'junk\r\nInterface eth0 is up\r\n\r\nfiller\r\nmtu 1500 bytes\r\nmtu 9000 bytes\r\n',
+            'mtu 1500 bytes\nInterface eth0 is up',
+            'Interface eth0 is up\nmtu 1500 bytes',
+            'Interface eth0 is up',
+        ]
+    )
+    def test_same_result_as_regex(self, text):
+        pattern = MultilinePattern(['Interface word(var_name) is up',
+                                    'mtu digits(var_mtu) bytes', 'end()'])
+        match = re.search(pattern, text)
+        expected_result = match.groupdict() if match else None
+        assert MultilineMatcher(pattern).search(text) == expected_result
+
+    def test_non_linear_pattern(self):
+        matcher = MultilineMatcher(MultilinePattern('Interface word(var_name) is up'))
+        assert matcher.is_linear is False
+        assert matcher.search('Interface eth0 is up') == dict(name='eth0')
+
+        matcher = MultilineMatcher(r'(?m)^a\nb')
+        assert matcher.is_linear is False
+        assert matcher.search('a\nb') == dict()
+
+    @pytest.mark.parametrize(
+        ('user_data', 'is_linear'),
+        [
+            ('abc mixed_word(var_x, or_empty)\ndef', False),
+            ('abc mixed_word(var_x, or_empty)\ndigits(var_y, or_empty) def', False),
+            ('a letters(var_w, or_empty) end()\nb', False),
+            ('Interface word(var_name) is up\nmtu digits(var_mtu) bytes', True),
+            ('a word(var_w)\nb\nc digits(var_d)', True),
+        ]
+    )
+    def test_differential_with_regex(self, user_data, is_linear):
+        import random
+        pattern = MultilinePattern(user_data)
+        matcher = MultilineMatcher(pattern)
+        assert matcher.is_linear is is_linear
+
+        rnd = random.Random(1)
+        tokens = ['abc', 'def', 'a', 'b', 'c', ' ', '\n', '\n', '\r\n', 'x', '1',
+                  '22', 'bx', 'mtu', 'is up', 'Interface', 'eth0', 'bytes']
+        texts = ['abc\ndef\n\nbx']
+        texts += [''.join(rnd.choice(tokens) for _ in range(rnd.randint(0, 14)))
+                  for _ in range(3000)]
+        for text in texts:
+            match = re.search(pattern, text)
+            expected_result = match.groupdict() if match else None
+            assert matcher.search(text) == expected_result, repr(text)
+
+    def test_pickled_pattern_keeps_line_patterns(self):
+        pattern = MultilinePattern(['Interface word(var_name) is up', 'end()'])
+        other = pickle.loads(pickle.dumps(pattern))
+        assert other.line_patterns == pattern.line_patterns
+        assert MultilineMatcher(other).is_linear is True
+
+    def test_regexbuilder_above_threshold(self):
+        user_data = 'Interface word(var_name) is up\nmtu digits(var_mtu) bytes'
+        lines = ['Interface eth0 is up', 'mtu 1500 bytes']
+        lines += ['filler line {}'.format(i) for i in range(50)]
+        lines += ['Interface eth1 is down']
+        factory = RegexBuilder(user_data=user_data, test_data='\n'.join(lines))
+        factory.multiline_threshold = 10
+        factory.build()
+        assert factory.test() is True
+        assert "[{'name': 'eth0', 'mtu': '1500'}]" in factory.test_report
+
+        factory.test_data = '\n'.join(lines[2:])
+        assert factory.test() is False
+
+    def test_regexbuilder_threshold_keeps_result(self):
+        user_data = 'abc mixed_word(var_x, or_empty)\ndef'
+        factory = RegexBuilder(user_data=user_data, test_data='abc\ndef\n\nbx')
+        factory.build()
+        assert factory.test() is True
+        factory.multiline_threshold = 1
+        assert factory.test() is True
@@ -0,0 +1,127 @@
+import io
+import os
+import json
+import time
+import socket
+import pytest
+from threading import Thread
+
+from regexapp.collection import REF
+from regexapp.server import RegexServer
+from regexapp.server import send_request
+
+
+class TestRegexServer:
+    @pytest.mark.parametrize(
+        ('request_', 'expected_args'),
+        [
+            (dict(args=['-u', 'abc']), ['-u', 'abc']),
+            (dict(action='build', user_data='abc'), ['-u', 'abc']),
+            (dict(action='test', user_data='abc', test_data='abc'),
+             ['-u', 'abc', '-t', 'abc', '-r']),
+            (dict(action='unittest', user_data='abc', test_data='abc', jobs=2),
+             ['-u', 'abc', '-t', 'abc', '-p', 'unittest', '-j', '2']),
+        ]
+    )
+    def test_get_arguments(self, request_, expected_args):
+        assert RegexServer.get_arguments(request_) == expected_args
+
+    def test_handle(self, tmp_path):
+        server = RegexServer()
+        response = server.handle(dict(id=1, action='build', user_data='abc digits(var_v1)'))
+        assert response == dict(id=1, exit_code=0, output='pattern = r"abc (?P<v1>\\d+)"')
+
+        filename = tmp_path / 'user_data.txt'
+        filename.write_text('xyz digits(var_v1)')
+        request = dict(id=2, args=['-u', 'file::user_data.txt'], cwd=str(tmp_path))
+        response = server.handle(request)
+        assert response['output'] == 'pattern = r"xyz (?P<v1>\\d+)"'
+        assert os.getcwd() != str(tmp_path)
+
+    def test_handle_after_editing_user_references(self, tmp_path, monkeypatch):
+        filename = tmp_path / 'user_references.yaml'
+        filename.write_text('file_type:\n  pattern: "[a-z]+"\n')
+        monkeypatch.setattr(REF, 'user_ref_loc', str(filename))
+        try:
+            REF.reload()
+            server = RegexServer()
+            request = dict(args=['-u', 'file_type(var_f)', '--no-cache'])
+            assert server.handle(request)['output'] == 'pattern = r"(?P<f>[a-z]+)"'
+
+            filename.write_text('file_type:\n  pattern: "\\\\d+"\n')
+            assert server.handle(request)['output'] == 'pattern = r"(?P<f>\\d+)"'
+
+            filename.write_text('file_type: [unclosed\n')
+            response = server.handle(request)
+            assert response['exit_code'] == 1
+            assert 'PatternReferenceError' in response['output']
+        finally:
+            monkeypatch.undo()
+            REF.reload()
+
+    @pytest.mark.parametrize(
+        ('line', 'expected_code', 'expected_output'),
+        [
+            ('garbage', 1, 'INVALID-REQUEST'),
+            ('[1, 2]', 1, 'INVALID-REQUEST'),
+            ('{"action": "unknown"}', 1, 'unsupported action'),
+            ('{"args": ["--bogus"]}', 2, 'unrecognized arguments'),
+            ('{"args": ["--gui"]}', 1, 'CANT process'),
+            ('{"args": ["-u", "abc", "-t", "-", "-r"]}', 1, 'CANT process'),
+            ('{"action": "build", "user_data": ""}', 1, 'usage:'),
+        ]
+    )
+    def test_handle_failure(self, line, expected_code, expected_output):
+        response = json.loads(RegexServer().handle_line(line))
+        assert response['exit_code'] == expected_code
+        assert expected_output in response['output']
+
+    @pytest.mark.parametrize(
+        ('args', 'expected_result'),
+        [
+            (['-u', '-'], True),
+            (['--user-data=-'], True),
+            (['-u', 'abc', '--test-data=-', '-r'], True),
+            (['--user-data=a=-'], False),
+            (['-u', 'abc', '-t', 'x=-', '-r'], False),
+            (['-u', 'abc', '--config', '-'], False),
+            (['--bogus'], False),
+        ]
+    )
+    def test_is_stdin_request(self, args, expected_result):
+        assert RegexServer.is_stdin_request(args) is expected_result
+
+    def test_handle_inline_data_ending_with_dash(self):
+        response = RegexServer().handle(dict(id=1, args=['--user-data=a=-']))
+        assert response == dict(id=1, exit_code=0, output='pattern = r"a=-"')
+
+    def test_serve_stream(self):
+        requests = [
+            dict(id=1, action='ping'),
+            dict(id=2, action='test', user_data='abc digits(var_v1)', test_data='abc 12'),
+            dict(id=3, action='shutdown'),
+            dict(id=4, action='ping'),
+        ]
+        input_stream = io.StringIO(''.join(json.dumps(r) + '\n' for r in requests))
+        output_stream = io.StringIO()
+        RegexServer().serve_stream(input_stream, output_stream)
+        responses = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        assert [response['id'] for response in responses] == [1, 2, 3]
+        assert "matched: [{'v1': '12'}]" in responses[1]['output']
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='requires Unix domain socket')
+    def test_serve_socket(self, tmp_path):
+        path = str(tmp_path / 'regexapp.sock')
+        thread = Thread(target=RegexServer().serve_socket, args=(path,))
+        thread.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+            response = send_request(path, dict(id=1, action='build', user_data='digits(var_v1)'), timeout=10)
+            assert response['output'] == 'pattern = r"(?P<v1>\\d+)"'
+        finally:
+            send_request(path, dict(action='shutdown'), timeout=10)
+            thread.join(timeout=10)
+        assert not os.path.exists(path)
@@ -0,0 +1,18 @@
+import yaml
+
+from regexapp.utils import YAMLLoader
+
+
+class TestYAMLLoader:
+    def test_loader(self):
+        if hasattr(yaml, 'CSafeLoader'):
+            assert YAMLLoader.Loader is yaml.CSafeLoader
+            assert YAMLLoader.is_libyaml is True
+        else:
+            assert YAMLLoader.Loader is yaml.SafeLoader
+            assert YAMLLoader.is_libyaml is False
+
+    def test_load(self):
+        content = 'abc:\n  pattern: "\\\\d+"\n  format: [1, 2]\n'
+        expected_result = yaml.load(content, Loader=yaml.SafeLoader)
+        assert YAMLLoader.load(content) == expected_result
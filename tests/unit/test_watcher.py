@@ -0,0 +1,109 @@
+import os
+import time
+
+from regexapp import RegexBuilder
+from regexapp.collection import REF
+from regexapp.watcher import FileWatcher
+from regexapp.watcher import WatchSession
+
+
+def touch(path, content):
+    path.write_text(content)
+    stat = os.stat(str(path))
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestFileWatcher:
+    def test_get_changes(self, tmp_path):
+        filename = tmp_path / 'a.txt'
+        filename.write_text('abc')
+        missing = tmp_path / 'missing.txt'
+        watcher = FileWatcher([str(filename), str(missing)], use_inotify=False)
+        assert watcher.is_inotify is False
+        assert watcher.get_changes() == []
+
+        touch(filename, 'abcd')
+        missing.write_text('xyz')
+        assert watcher.get_changes() == [str(filename), str(missing)]
+        assert watcher.get_changes() == []
+
+    def test_wait(self, tmp_path):
+        filename = tmp_path / 'a.txt'
+        filename.write_text('abc')
+        watcher = FileWatcher([str(filename)], interval=0.01)
+        try:
+            start = time.perf_counter()
+            assert watcher.wait(timeout=0.05) == []
+            assert time.perf_counter() - start >= 0.05
+
+            touch(filename, 'abcd')
+            assert watcher.wait(timeout=5) == [str(filename)]
+        finally:
+            watcher.close()
+
+
+class TestWatchSession:
+    def test_run(self, tmp_path):
+        user_file = tmp_path / 'user.txt'
+        test_file = tmp_path / 'test.txt'
+        user_file.write_text('abc digits(var_v1)\n')
+        test_file.write_text('abc 12\nxyz 3\n')
+
+        session = WatchSession('file::{}'.format(user_file),
+                               test_data='file::{}'.format(test_file),
+                               kwargs=dict(is_line=True))
+        assert session.filenames == [str(user_file), str(test_file), REF.user_ref_loc]
+
+        report = session.run()
+        assert 'initial run' in report
+        assert 'test result: True' in report
+        assert report.endswith("  matched: 'abc 12' -> {'v1': '12'}")
+
+        user_file.write_text('abc digits(var_v1)\nxyz digits(var_v2)\n')
+        report = session.run([str(user_file)])
+        assert 'changed: user.txt' in report
+        assert "+  matched: 'xyz 3' -> {'v2': '3'}" in report.splitlines()
+
+        factory = session.factory
+        test_file.write_text('abc 12\n')
+        report = session.run([str(test_file)])
+        assert 'build: skipped' in report
+        assert 'test result: False' in report
+        assert session.test_result is False
+        assert session.factory is factory
+        assert "-  matched: 'xyz 3' -> {'v2': '3'}" in report.splitlines()
+        assert '+  matched: NO' in report.splitlines()
+
+        report = session.run([str(test_file)])
+        assert report.endswith('no change of match result')
+
+    def test_multiline_rebuild_is_per_line(self, tmp_path, monkeypatch):
+        user_file = tmp_path / 'user.txt'
+        user_file.write_text('abc digits(var_v1)\nmtu digits(var_mtu) bytes\n')
+        session = WatchSession('file::{}'.format(user_file),
+                               test_data='abc 1\nmtu 1500 bytes')
+        session.run()
+        assert session.test_result is True
+
+        built = []
+        original = RegexBuilder.build_patterns.__func__
+
+        def build_patterns(cls, lst_of_user_data, **kwargs):
+            built.extend(lst_of_user_data)
+            return original(cls, lst_of_user_data, **kwargs)
+
+        monkeypatch.setattr(RegexBuilder, 'build_patterns', classmethod(build_patterns))
+        user_file.write_text('abc digits(var_v1)\nmtu digits(var_mtu) octets\n')
+        session.run([str(user_file)])
+        assert built == ['mtu digits(var_mtu) octets']
+        assert session.test_result is False
+
+    def test_run_failure(self, tmp_path):
+        user_file = tmp_path / 'user.txt'
+        session = WatchSession('file::{}'.format(user_file))
+        report = session.run()
+        assert '*** FileNotFoundError' in report
+
+        user_file.write_text('digits(var_v1)')
+        report = session.run([str(user_file)])
+        assert report.endswith('pattern: (?P<v1>\\d+)')